@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Authority Topic Index
+Maps a claim to targeted WHO, CDC, NIH, FDA, ClinicalTrials.gov and Cochrane pages
+using a topic file (data/authority_topics.json) compiled once into a keyword automaton
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+from urllib.parse import quote
+
+from keyword_automaton import KeywordAutomaton
+from medical_types import Source
+
+TOPICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'authority_topics.json')
+
+# (source, title prefix, summary, type, reliability), in output order
+AUTHORITIES = [
+    ('WHO', 'WHO Health Information on', 'World Health Organization official guidance and fact sheets', 'guideline', 0.98),
+    ('CDC', 'CDC Guidelines on', 'Centers for Disease Control evidence-based information', 'guideline', 0.97),
+    ('NIH', 'NIH Research on', 'National Institutes of Health peer-reviewed research', 'research', 0.96),
+    ('FDA', 'FDA Safety Information on', 'Food and Drug Administration safety data and approvals', 'regulation', 0.95),
+    ('ClinicalTrials.gov', 'ClinicalTrials.gov Studies on', 'Active and completed clinical trials database', 'research', 0.94),
+    ('Cochrane Library', 'Cochrane Reviews on', 'Systematic reviews and meta-analyses', 'research', 0.97),
+]
+
+# Search pages used when no topic matches (same as the original per-call fallback)
+FALLBACK_URLS = {
+    'WHO': 'https://www.who.int/news-room/fact-sheets?keywords={query}',
+    'CDC': 'https://www.cdc.gov/search/?query={query}',
+    'NIH': 'https://www.nih.gov/search/?query={query}',
+    'FDA': 'https://www.fda.gov/search/?query={query}',
+    'ClinicalTrials.gov': 'https://clinicaltrials.gov/search?term={query}',
+    'Cochrane Library': 'https://www.cochranelibrary.com/search?q={query}',
+}
+
+class AuthorityIndex:
+    """Topic file compiled into an automaton, with per-topic source templates cached"""
+
+    def __init__(self, path=TOPICS_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.version = data.get('version', 0)
+        self.templates = data.get('templates', {})
+        self.topics = data.get('topics', [])
+        self.by_name = {topic['name']: topic for topic in self.topics}
+
+        keywords = []
+        for topic_id, topic in enumerate(self.topics):
+            for keyword in [topic['name']] + topic.get('synonyms', []):
+                keywords.append((keyword, topic_id))
+        self.automaton = KeywordAutomaton(keywords)
+
+        # Bound per instance so a reloaded index does not reuse stale entries
+        self.topic_sources = lru_cache(maxsize=None)(self._build_topic_sources)
+
+    def match(self, query):
+        """Best topic id for the query: longest keyword wins, ties go to file order"""
+        best = None
+        for start, end, _, topic_id in self.automaton.finditer(query):
+            key = (end - start, -topic_id)
+            if best is None or key > best[0]:
+                best = (key, topic_id)
+        return best[1] if best else None
+
+    def _topic_url(self, source, topic):
+        # A topic's own pages first, then its parent's (e.g. 'breast cancer' -> 'cancer')
+        parent = self.by_name.get(topic.get('parent'), {})
+        for explicit in (topic.get('urls', {}), parent.get('urls', {})):
+            if source in explicit:
+                return explicit[source]
+        if source == 'WHO' and topic.get('who'):
+            return self.templates['WHO_fact_sheet'].format(who=topic['who'])
+        if source == 'NIH' and topic.get('medlineplus'):
+            return self.templates['NIH_medlineplus'].format(medlineplus=topic['medlineplus'])
+        return self.templates[source].format(term=quote(topic['name']))
+
+    def _build_topic_sources(self, topic_id):
+        """Static part of the six sources for a topic (everything except the title)"""
+        topic = self.topics[topic_id]
+        return tuple(
+            (title_prefix, source, self._topic_url(source, topic), summary, source_type, reliability)
+            for source, title_prefix, summary, source_type, reliability in AUTHORITIES
+        )
+
+    def topic_name(self, query):
+        topic_id = self.match(query)
+        return self.topics[topic_id]['name'] if topic_id is not None else None
+
+    def sources_for(self, query):
+        """Authoritative Source records for a query (fresh records, safe for callers to annotate)"""
+        topic_id = self.match(query)
+        if topic_id is not None:
+            return [Source(f"{title_prefix} {query}", source, url, summary, source_type, reliability)
+                    for title_prefix, source, url, summary, source_type, reliability in self.topic_sources(topic_id)]
+
+        query_encoded = query.replace(' ', '%20').replace(',', '')
+        return [Source(f"{title_prefix} {query}", source, FALLBACK_URLS[source].format(query=query_encoded),
+                       summary, source_type, reliability)
+                for source, title_prefix, summary, source_type, reliability in AUTHORITIES]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_authority_index():
+    """Process-wide authority index, loaded on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = AuthorityIndex()
+        return _index
+
+def authoritative_sources(query):
+    """WHO, CDC, NIH, FDA, ClinicalTrials.gov and Cochrane sources targeted to the query's topic"""
+    return get_authority_index().sources_for(query)
+
+if __name__ == "__main__":
+    # Test the module
+    import time
+
+    index = get_authority_index()
+    print(f"📚 {len(index.topics)} topics, {index.automaton.size} keywords")
+
+    queries = [
+        "Vaccines cause autism in children",
+        "Drinking bleach cures COVID-19",
+        "High blood pressure can be cured with garlic",
+        "Vitamin D prevents the flu",
+        "Heartburn means you are having a heart attack",
+        "Crystals align your chakras",
+    ]
+    for query in queries:
+        sources = authoritative_sources(query)
+        print(f"  {query!r} -> {index.topic_name(query)}")
+        for source in sources[:3]:
+            print(f"      {source['source']}: {source['url']}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        for query in queries:
+            authoritative_sources(query)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"⚡ {len(queries) * 1000} lookups in {elapsed:.1f} ms")
@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Reproducible end-to-end benchmark: local stand-in servers replay recorded Groq,
+Gemini, PubMed E-utilities and article-page responses (data/bench_fixtures.json)
+with configurable latency and error injection, while the phase 1→6 pipeline and
+the HTTP backend are driven at fixed concurrency levels
+
+Usage:
+  python benchmark_pipeline.py [--concurrency 1,4,16] [--requests 32] [--duration 5]
+                               [--latency groq=250,gemini=400,pubmed=120,pages=80]
+                               [--error-rate 0.02] [--backends rules,ai] [--compare FILE]
+  python benchmark_pipeline.py --startup   # cold-start check only; exits 1 over budget
+  python benchmark_pipeline.py --transport # keep-alive and compression only
+  python benchmark_pipeline.py --record    # refresh the fixtures from the live APIs
+
+Each run is saved to bench_results/<time>-<commit>.json and compared with the
+previous run (or --compare FILE), so regressions show up between commits.
+"""
+
+import contextlib
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from prefork_server import DrainingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_PATH = os.path.join(BASE_DIR, 'data', 'bench_fixtures.json')
+RESULTS_DIR = os.path.join(BASE_DIR, 'bench_results')
+
+# Simulated upstream latency (milliseconds) and the +/- fraction it varies by
+DEFAULT_LATENCY_MS = {'groq': 250, 'gemini': 400, 'pubmed': 120, 'pages': 80}
+LATENCY_JITTER = 0.2
+
+# Status code of an injected failure, per upstream (PubMed's limiter retries 429s)
+ERROR_STATUS = {'groq': 500, 'gemini': 500, 'pubmed': 429, 'pages': 503}
+
+# Import-time budget (ms) of each entry point in a fresh interpreter: batch
+# workers and serverless instances pay it on every start
+COLD_START_BUDGET_MS = {
+    'simple_analyzer': 20,
+    'health_analyzer': 20,
+    'universal_health_analyzer': 20,
+    'robust_backend': 75,
+}
+
+STAGES = ['phase1_input', 'phase2_content', 'phase4_detection', 'phase5_sources', 'phase6_fact_check']
+
+UNCERTAIN_ANALYSIS = json.dumps({
+    'verdict': 'uncertain', 'confidence': 0.5, 'risk_level': 'medium',
+    'reasoning': 'No recorded analysis for this claim', 'medical_entities': [], 'action_needed': 'verify'
+})
+
+# -- stand-in upstream servers ------------------------------------------------
+
+def render_page(page):
+    """Article HTML for a fixture page, with the script/nav noise real pages carry"""
+    paragraphs = ''.join(f"<p>{text}</p>" for text in page['paragraphs']) * page.get('repeat', 1)
+    return (f"<html><head><title>{page['title']}</title>"
+            "<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>"
+            "<style>body { font-family: sans-serif; }</style></head><body>"
+            "<nav><a href='/'>Home</a> | <a href='/health'>Health</a></nav>"
+            f"<article><h1>{page['title']}</h1>{paragraphs}</article>"
+            "<footer>© Health News</footer></body></html>")
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Replays fixture responses; the server carries fixtures, latency and error_rate"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _claim_for(self, text):
+        text = text.lower()
+        for claim in self.server.fixtures['claims']:
+            if claim['match'] in text:
+                return claim
+        return None
+
+    def _delay(self, upstream):
+        """Sleep for the upstream's latency; True if this request should fail"""
+        latency = self.server.latency.get(upstream, 0) / 1000.0
+        time.sleep(latency * random.uniform(1 - LATENCY_JITTER, 1 + LATENCY_JITTER))
+        if random.random() < self.server.error_rate:
+            self._send(ERROR_STATUS[upstream], b'{"error": "injected failure"}')
+            return True
+        return False
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, value):
+        self._send(200, json.dumps(value).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8', 'replace')
+        claim = self._claim_for(body)
+        if self.path.startswith('/groq/'):
+            if not self._delay('groq'):
+                content = claim['groq'] if claim else UNCERTAIN_ANALYSIS
+                self._send_json({'choices': [{'message': {'role': 'assistant', 'content': content}}]})
+        elif self.path.startswith('/gemini/'):
+            if not self._delay('gemini'):
+                text = claim['gemini'] if claim else "**VERDICT:** UNVERIFIED"
+                self._send_json({'candidates': [{'content': {'parts': [{'text': text}]}}]})
+        else:
+            self._send(404, b'{}')
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path == '/eutils/esearch.fcgi':
+            if not self._delay('pubmed'):
+                claim = self._claim_for(params.get('term', ''))
+                pmids = claim['pmids'] if claim else []
+                self._send_json({'esearchresult': {'idlist': pmids[:int(params.get('retmax', 20))]}})
+        elif parsed.path == '/eutils/esummary.fcgi':
+            if not self._delay('pubmed'):
+                ids = [pmid for pmid in params.get('id', '').split(',') if pmid]
+                articles = self.server.fixtures['articles']
+                result = {'uids': ids}
+                result.update({pmid: articles[pmid] for pmid in ids if pmid in articles})
+                self._send_json({'result': result})
+        elif parsed.path.startswith('/pages/'):
+            page = self.server.fixtures['pages'].get(os.path.splitext(os.path.basename(parsed.path))[0])
+            if page is None:
+                self._send(404, b'not found', 'text/html')
+            elif not self._delay('pages'):
+                self._send(200, render_page(page).encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self._send(404, b'{}')
+
+def _serve_stand_ins(fixtures_path, latency, error_rate, ports):
+    """Stand-in server process (its own GIL, so it never slows the code under test)"""
+    with open(fixtures_path, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    server = DrainingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.fixtures = fixtures
+    server.latency = latency
+    server.error_rate = error_rate
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+def start_stand_ins(latency, error_rate, fixtures_path=FIXTURES_PATH):
+    """Start the stand-ins in a child process; returns (process, base URL)"""
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    process = context.Process(target=_serve_stand_ins, args=(fixtures_path, latency, error_rate, ports), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ports.get(timeout=30)}"
+
+def point_pipeline_at(base_url):
+    """Send the phases' upstream calls to the stand-ins"""
+    import phase4_misinformation_detection
+    import phase5_trusted_source_retrieval
+    import phase6_fact_correction
+    phase4_misinformation_detection.GROQ_ENDPOINT = f"{base_url}/groq/chat/completions"
+    phase5_trusted_source_retrieval.PUBMED_BASE = f"{base_url}/eutils/"
+    phase6_fact_correction.GEMINI_BASE = f"{base_url}/gemini/models/"
+
+def reset_state(workdir):
+    """Empty PubMed caches and claim index, so every level starts cold"""
+    import pubmed_cache
+    cache_dir = tempfile.mkdtemp(dir=workdir)
+    pubmed_cache.SEARCH_CACHE = pubmed_cache.TieredCache('pubmed_search', pubmed_cache.SEARCH_TTL, cache_dir=cache_dir)
+    pubmed_cache.ARTICLE_CACHE = pubmed_cache.TieredCache('pubmed_articles', pubmed_cache.ARTICLE_TTL,
+                                                          max_entries=10000, cache_dir=cache_dir)
+    try:
+        import claim_index
+        claim_index._index = claim_index.ClaimIndex(index_dir=tempfile.mkdtemp(dir=workdir))
+    except ImportError:
+        pass
+
+# -- pipeline ------------------------------------------------------------------
+
+class StageRecorder:
+    """Per-request stage timings, plus traced allocations when alloc=True"""
+
+    def __init__(self, alloc=False):
+        self.alloc = alloc
+        self.times = {}
+        self.allocations = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.alloc:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = time.perf_counter() - start
+            if self.alloc:
+                current, peak = tracemalloc.get_traced_memory()
+                self.allocations[name] = (peak - before, current - before)
+
+def run_pipeline(user_input, recorder):
+    """Phases 1→6 as simple_analyzer runs them; returns the phase 4 verdict"""
+    from phase1_user_input import classify_input_type
+    from phase2_content_retrieval import extract_from_url
+    from phase4_misinformation_detection import detect_misinformation
+    from phase5_trusted_source_retrieval import retrieve_trusted_sources
+    from phase6_fact_correction import gemini_fact_correction
+
+    with recorder.stage('phase1_input'):
+        processed = classify_input_type(user_input)
+    content = user_input
+    if processed['type'] == 'url':
+        with recorder.stage('phase2_content'):
+            extracted = extract_from_url(user_input)
+        if extracted and extracted.get('content'):
+            content = extracted['content']
+    with recorder.stage('phase4_detection'):
+        analysis = detect_misinformation(content)
+    with recorder.stage('phase5_sources'):
+        sources = retrieve_trusted_sources(content, max_results=5)
+    with recorder.stage('phase6_fact_check'):
+        gemini_fact_correction(content, sources, analysis)
+    return analysis.get('verdict') if analysis else None
+
+def pipeline_inputs(fixtures, base_url):
+    return [f"{base_url}/{claim['url']}" if 'url' in claim else claim['text'] for claim in fixtures['claims']]
+
+def percentiles(samples):
+    """p50/p95/p99 of durations in seconds, in milliseconds"""
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+def bench_pipeline(inputs, levels, requests, workdir):
+    """Throughput, latency and per-stage latency of the pipeline at each concurrency level"""
+    def one(user_input):
+        recorder = StageRecorder()
+        start = time.perf_counter()
+        try:
+            run_pipeline(user_input, recorder)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, recorder.times, ok
+
+    results = {}
+    for concurrency in levels:
+        reset_state(workdir)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            runs = list(pool.map(one, [inputs[i % len(inputs)] for i in range(requests)]))
+        elapsed = time.perf_counter() - start
+        results[f"c{concurrency}"] = {
+            'throughput': round(requests / elapsed, 2),
+            'latency_ms': percentiles([latency for latency, _, _ in runs]),
+            'errors': sum(1 for _, _, ok in runs if not ok),
+            'stages_ms': {stage: percentiles([times[stage] for _, times, _ in runs if stage in times])
+                          for stage in STAGES},
+        }
+    return results
+
+def bench_allocations(inputs, workdir):
+    """Traced memory per stage (KB): peak while it runs and what it leaves allocated"""
+    from cpu_pool import disable_cpu_pool
+    disable_cpu_pool()  # keep CPU stages in this process, where tracemalloc sees them
+    reset_state(workdir)
+    peaks = {stage: [] for stage in STAGES}
+    retained = {stage: [] for stage in STAGES}
+    tracemalloc.start()
+    try:
+        for user_input in inputs:
+            recorder = StageRecorder(alloc=True)
+            run_pipeline(user_input, recorder)
+            for stage, (peak, net) in recorder.allocations.items():
+                peaks[stage].append(peak)
+                retained[stage].append(net)
+    finally:
+        tracemalloc.stop()
+    return {stage: {'peak_kb': round(sum(peaks[stage]) / len(peaks[stage]) / 1024, 1),
+                    'retained_kb': round(sum(retained[stage]) / len(retained[stage]) / 1024, 1)}
+            for stage in STAGES if peaks[stage]}
+
+# -- HTTP backend --------------------------------------------------------------
+
+def _load_client(url, texts, duration, threads, results):
+    """Client process: threads POST claims for `duration` seconds, recording latencies"""
+    parsed = urlparse(url)
+    deadline = time.monotonic() + duration
+    latencies = []
+    counts = {'errors': 0, 'degraded': 0}
+    lock = threading.Lock()
+
+    def client(index):
+        sent = 0
+        while time.monotonic() < deadline:
+            body = json.dumps({'text': texts[(index + sent) % len(texts)]})
+            # A fresh client id per request measures the server, not the per-client rate limit
+            headers = {'Content-Type': 'application/json', 'X-Client-Id': f"bench-{os.getpid()}-{index}-{sent}"}
+            sent += 1
+            start = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+                conn.request('POST', parsed.path, body, headers)
+                response = conn.getresponse()
+                payload = response.read()
+                conn.close()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if response.status != 200:
+                        counts['errors'] += 1
+                    else:
+                        latencies.append(elapsed)
+                        if json.loads(payload).get('degraded'):
+                            counts['degraded'] += 1
+            except (OSError, ValueError):
+                with lock:
+                    counts['errors'] += 1
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((latencies, counts))
+
+def bench_backend(mode, texts, levels, duration, workdir):
+    """robust_backend's /api/verify (in this process) under load from client processes"""
+    import robust_backend
+    robust_backend.SCHEDULER = robust_backend.build_scheduler(ai=(mode == 'ai'))
+    robust_backend.VERDICT_CACHE = None
+    server = DrainingHTTPServer(('127.0.0.1', 0), robust_backend.MedicalFactHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/verify"
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    try:
+        for concurrency in levels:
+            reset_state(workdir)
+            processes = min(concurrency, 4)
+            queue = context.Queue()
+            clients = [context.Process(target=_load_client,
+                                       args=(url, texts, duration, concurrency // processes + (i < concurrency % processes), queue))
+                       for i in range(processes)]
+            for client in clients:
+                client.start()
+            collected = [queue.get() for _ in clients]
+            for client in clients:
+                client.join()
+            latencies = [latency for client_latencies, _ in collected for latency in client_latencies]
+            results[f"c{concurrency}"] = {
+                'throughput': round(len(latencies) / duration, 2),
+                'latency_ms': percentiles(latencies),
+                'errors': sum(counts['errors'] for _, counts in collected),
+                'degraded': sum(counts['degraded'] for _, counts in collected),
+            }
+    finally:
+        server.shutdown()
+        server.server_close()
+        robust_backend.SCHEDULER.shutdown()
+    return results
+
+def bench_transport(texts, requests=300):
+    """Connection reuse and response compression against robust_backend (rules mode, one client)
+
+    Reports ms per /api/verify with a fresh connection per request versus one
+    keep-alive connection, and the bytes on the wire for a 50-claim batch with
+    and without Accept-Encoding: gzip, from the server's transport counters.
+    """
+    import robust_backend
+    robust_backend.SCHEDULER = robust_backend.build_scheduler()
+    robust_backend.VERDICT_CACHE = None
+    server = DrainingHTTPServer(('127.0.0.1', 0), robust_backend.MedicalFactHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    results = {}
+
+    def run(label, path, body_for, count, keep_alive, headers=None):
+        before = server.get_transport_stats()
+        conn = None
+        start = time.perf_counter()
+        for i in range(count):
+            if conn is None:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.request('POST', path, body_for(i), dict(headers or {}, **{'Content-Type': 'application/json',
+                                                                           'X-Client-Id': f"bench-{i}"}))
+            conn.getresponse().read()
+            if not keep_alive:
+                conn.close()
+                conn = None
+        elapsed = time.perf_counter() - start
+        if conn is not None:
+            conn.close()
+        after = server.get_transport_stats()
+        connections = after['connections'] - before['connections']
+        results[label] = {
+            'ms_per_request': round(elapsed * 1000 / count, 3),
+            'requests_per_connection': round(count / max(1, connections), 1),
+            'bytes_per_response': round((after['bytes_out'] - before['bytes_out']) / count),
+        }
+
+    try:
+        verify_body = lambda i: json.dumps({'text': texts[i % len(texts)]})
+        run('fresh_connections', '/api/verify', verify_body, requests, keep_alive=False)
+        run('keep_alive', '/api/verify', verify_body, requests, keep_alive=True)
+        batch_body = lambda i: json.dumps({'texts': [texts[(i + j) % len(texts)] for j in range(50)]})
+        run('batch_identity', '/api/verify/batch', batch_body, 20, keep_alive=True)
+        run('batch_gzip', '/api/verify/batch', batch_body, 20, keep_alive=True, headers={'Accept-Encoding': 'gzip'})
+    finally:
+        server.drain(5)
+        robust_backend.SCHEDULER.shutdown()
+    return results
+
+def print_transport(transport):
+    print("\n🔌 Transport (robust_backend, one client)")
+    for label, data in transport.items():
+        print(f"  {label:18s} {data['ms_per_request']:7.3f} ms/request  "
+              f"{data['requests_per_connection']:6.1f} requests/connection  {data['bytes_per_response']:7d} bytes/response")
+
+# -- cold start ----------------------------------------------------------------
+
+COLD_START_SNIPPET = ("import time; start = time.perf_counter(); import {module}; "
+                      "print((time.perf_counter() - start) * 1000)")
+
+def bench_cold_start(runs=5):
+    """Median import time of each entry point, and of the whole process, in fresh interpreters"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BASE_DIR, os.environ.get('PYTHONPATH')])))
+    results = {}
+    for module, budget in COLD_START_BUDGET_MS.items():
+        imports, processes = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, '-c', COLD_START_SNIPPET.format(module=module)],
+                                       capture_output=True, text=True, env=env, timeout=60)
+            processes.append(time.perf_counter() - start)
+            if completed.returncode != 0:
+                raise RuntimeError(f"import {module} failed: {completed.stderr.strip().splitlines()[-1:]}")
+            imports.append(float(completed.stdout.strip().splitlines()[-1]) / 1000)
+        results[module] = {'import_ms': percentiles(imports)['p50'], 'process_ms': percentiles(processes)['p50'],
+                           'budget_ms': budget}
+    return results
+
+def print_cold_start(cold_start):
+    print("\n🥶 Cold start (median of fresh interpreters)")
+    for module, data in cold_start.items():
+        status = '✅' if data['import_ms'] <= data['budget_ms'] else '❌ over budget'
+        print(f"  {module:26s} import {data['import_ms']:6.1f} ms (budget {data['budget_ms']} ms)  "
+              f"process {data['process_ms']:6.1f} ms  {status}")
+    return all(data['import_ms'] <= data['budget_ms'] for data in cold_start.values())
+
+# -- results -------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{results['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def previous_results(exclude):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    paths = sorted(os.path.join(RESULTS_DIR, name) for name in os.listdir(RESULTS_DIR) if name.endswith('.json'))
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+def _metric_rows(results):
+    """(label, value, higher_is_better) for every comparable number"""
+    rows = []
+    for level, data in results.get('pipeline', {}).items():
+        rows.append((f"pipeline {level} throughput (req/s)", data['throughput'], True))
+        rows.append((f"pipeline {level} p95 (ms)", data['latency_ms']['p95'], False))
+    for mode, levels in results.get('backends', {}).items():
+        for level, data in levels.items():
+            rows.append((f"backend {mode} {level} throughput (req/s)", data['throughput'], True))
+            rows.append((f"backend {mode} {level} p95 (ms)", data['latency_ms']['p95'], False))
+    for stage, data in results.get('allocations', {}).items():
+        rows.append((f"{stage} peak (KB)", data['peak_kb'], False))
+    for module, data in results.get('cold_start', {}).items():
+        rows.append((f"{module} import (ms)", data['import_ms'], False))
+    for label, data in results.get('transport', {}).items():
+        rows.append((f"{label} (ms/request)", data['ms_per_request'], False))
+        rows.append((f"{label} (bytes/response)", data['bytes_per_response'], False))
+    return rows
+
+def compare(current, baseline):
+    """Print each metric next to the baseline run's, flagging >10% regressions"""
+    before = {label: value for label, value, _ in _metric_rows(baseline)}
+    print(f"\n📈 Compared with {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for label, value, higher_is_better in _metric_rows(current):
+        old = before.get(label)
+        if old in (None, 0) or value is None:
+            continue
+        change = (value - old) / old
+        worse = change < -0.10 if higher_is_better else change > 0.10
+        print(f"  {'⚠️' if worse else '  '} {label:42s} {old:10.2f} → {value:10.2f}  ({change:+.1%})")
+
+def print_results(results):
+    if results.get('cold_start'):
+        print_cold_start(results['cold_start'])
+    print(f"\n🏁 Pipeline (phases 1→6, {results['config']['requests']} requests per level)")
+    for level, data in results['pipeline'].items():
+        latency = data['latency_ms']
+        print(f"  {level:>4s}: {data['throughput']:7.2f} req/s  p50 {latency['p50']:8.1f} ms  "
+              f"p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms  errors {data['errors']}")
+        stages = '  '.join(f"{stage.split('_', 1)[1]} {value['p50']:.0f}"
+                           for stage, value in data['stages_ms'].items() if value['p50'] is not None)
+        print(f"        stage p50 (ms): {stages}")
+    if results.get('allocations'):
+        print("\n🧮 Allocations per request (tracemalloc, CPU pool off)")
+        for stage, data in results['allocations'].items():
+            print(f"  {stage:18s} peak {data['peak_kb']:8.1f} KB  retained {data['retained_kb']:8.1f} KB")
+    for mode, levels in results.get('backends', {}).items():
+        print(f"\n🌐 robust_backend /api/verify ({mode} mode, {results['config']['duration']}s per level)")
+        for level, data in levels.items():
+            latency = data['latency_ms']
+            print(f"  {level:>4s}: {data['throughput']:8.1f} req/s  p50 {latency['p50'] or 0:8.1f} ms  "
+                  f"p95 {latency['p95'] or 0:8.1f} ms  p99 {latency['p99'] or 0:8.1f} ms  "
+                  f"degraded {data['degraded']}  errors {data['errors']}")
+    if results.get('transport'):
+        print_transport(results['transport'])
+
+# -- recording -----------------------------------------------------------------
+
+def record_fixtures(fixtures_path=FIXTURES_PATH):
+    """Re-capture Groq, Gemini and PubMed responses for every fixture claim from the live APIs"""
+    import requests
+
+    with open(fixtures_path, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    original_get, original_post = requests.get, requests.post
+    captured = {}
+
+    def recording_post(url, *args, **kwargs):
+        response = original_post(url, *args, **kwargs)
+        if response.status_code == 200:
+            if 'groq' in url:
+                captured['groq'] = response.json()['choices'][0]['message']['content']
+            elif 'generativelanguage' in url:
+                captured['gemini'] = response.json()['candidates'][0]['content']['parts'][0]['text']
+        return response
+
+    def recording_get(url, *args, **kwargs):
+        response = original_get(url, *args, **kwargs)
+        if response.status_code == 200 and 'esearch.fcgi' in url:
+            captured['pmids'] = response.json().get('esearchresult', {}).get('idlist', [])
+        elif response.status_code == 200 and 'esummary.fcgi' in url:
+            result = response.json().get('result', {})
+            for uid in result.get('uids', []):
+                fixtures['articles'][uid] = {key: result[uid].get(key) for key in ('uid', 'title', 'authors', 'pubdate')}
+        return response
+
+    requests.get, requests.post = recording_get, recording_post
+    workdir = tempfile.mkdtemp(prefix='bench-record-')
+    try:
+        for claim in fixtures['claims']:
+            reset_state(workdir)
+            captured.clear()
+            page = fixtures['pages'].get(os.path.splitext(os.path.basename(claim.get('url', '')))[0])
+            text = claim.get('text') or ' '.join([page['title']] + page['paragraphs'])
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                run_pipeline(text, StageRecorder())
+            claim.update(captured)
+            print(f"  {'✅' if len(captured) >= 3 else '⚠️'} {text[:50]}: recorded {sorted(captured) or 'nothing'}")
+    finally:
+        requests.get, requests.post = original_get, original_post
+
+    with open(fixtures_path, 'w', encoding='utf-8') as f:
+        json.dump(fixtures, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"💾 Fixtures written to {fixtures_path}")
+
+# -- main ----------------------------------------------------------------------
+
+def _option(name, default):
+    """Value following a --name command-line flag"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+def main():
+    if '--record' in sys.argv:
+        record_fixtures()
+        return
+    if '--startup' in sys.argv:
+        sys.exit(0 if print_cold_start(bench_cold_start(int(_option('--runs', '7')))) else 1)
+    if '--transport' in sys.argv:
+        with open(FIXTURES_PATH, encoding='utf-8') as f:
+            texts = [claim['text'] for claim in json.load(f)['claims'] if 'text' in claim]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            transport = bench_transport(texts, int(_option('--requests', '300')))
+        print_transport(transport)
+        return
+
+    levels = [int(level) for level in _option('--concurrency', '1,4,16').split(',')]
+    requests = int(_option('--requests', '32'))
+    duration = float(_option('--duration', '5'))
+    error_rate = float(_option('--error-rate', '0'))
+    backends = [mode for mode in _option('--backends', 'rules,ai').split(',') if mode]
+    latency = dict(DEFAULT_LATENCY_MS)
+    for item in _option('--latency', '').split(','):
+        if '=' in item:
+            upstream, value = item.split('=', 1)
+            latency[upstream.strip()] = float(value)
+
+    with open(FIXTURES_PATH, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    stand_ins, base_url = start_stand_ins(latency, error_rate)
+    print(f"🧪 Stand-ins at {base_url} (latency ms {latency}, error rate {error_rate:.0%})")
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {'concurrency': levels, 'requests': requests, 'duration': duration,
+                   'latency_ms': latency, 'error_rate': error_rate, 'fixtures_version': fixtures.get('version')},
+    }
+    results['cold_start'] = bench_cold_start()
+    try:
+        # The phases print progress for every request; keep it out of the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            point_pipeline_at(base_url)
+            inputs = pipeline_inputs(fixtures, base_url)
+            results['pipeline'] = bench_pipeline(inputs, levels, requests, workdir)
+            texts = [claim['text'] for claim in fixtures['claims'] if 'text' in claim]
+            results['backends'] = {mode: bench_backend(mode, texts, levels, duration, workdir) for mode in backends}
+            results['allocations'] = bench_allocations(inputs, workdir)
+            results['transport'] = bench_transport(texts)
+    finally:
+        stand_ins.terminate()
+
+    print_results(results)
+    path = save_results(results)
+    print(f"\n💾 Saved {os.path.relpath(path, BASE_DIR)}")
+    baseline_path = _option('--compare', None) or previous_results(path)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
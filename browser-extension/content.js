@@ -53,16 +53,78 @@ chrome.runtime.onMessage.addListener((request) => {
   }
 });
 
+// == Verdict cache ==
+// Verdicts are kept in chrome.storage under the hash of the normalized text,
+// tagged with the backend's cache_version (from /status, re-checked at most
+// once a minute). When the rules change the version does too, and old entries
+// are simply treated as misses; nothing is refetched until it is asked for.
+const VERDICT_CACHE_MAX = 500;
+const STATUS_TTL_MS = 60000;
+const inFlightVerdicts = new Map(); // text hash -> pending verdict promise
+
+async function getCacheVersion() {
+  const { cacheStatus } = await chrome.storage.local.get("cacheStatus");
+  if (cacheStatus && Date.now() - cacheStatus.checkedAt < STATUS_TTL_MS)
+    return cacheStatus.version;
+  try {
+    const resp = await fetch(`${BACKEND_URL}/status`);
+    const version = (await resp.json()).cache_version || null;
+    await chrome.storage.local.set({ cacheStatus: { version, checkedAt: Date.now() } });
+    return version;
+  } catch (e) {
+    // Backend unreachable: keep answering from what we have
+    return cacheStatus ? cacheStatus.version : null;
+  }
+}
+
+async function readCachedVerdict(hash, version) {
+  const key = `verdict:${hash}`;
+  const entry = (await chrome.storage.local.get(key))[key];
+  return entry && entry.version === version ? entry.data : null;
+}
+
+async function storeVerdict(hash, version, data) {
+  // verdictIndex keeps insertion order; the oldest entries go once it is full
+  const { verdictIndex = [] } = await chrome.storage.local.get("verdictIndex");
+  const index = verdictIndex.filter((h) => h !== hash);
+  index.push(hash);
+  const evicted = index.splice(0, Math.max(0, index.length - VERDICT_CACHE_MAX));
+  await chrome.storage.local.set({ [`verdict:${hash}`]: { version, data }, verdictIndex: index });
+  if (evicted.length) await chrome.storage.local.remove(evicted.map((h) => `verdict:${h}`));
+}
+
+async function fetchVerdict(hash, factText) {
+  const version = await getCacheVersion();
+  if (version) {
+    const cached = await readCachedVerdict(hash, version);
+    if (cached) return cached;
+  }
+  const resp = await fetch(`${BACKEND_URL}/api/verify`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ text: factText }),
+  });
+  const data = await resp.json();
+  const dataVersion = data.cache_version || version;
+  if (dataVersion !== version) {
+    // The backend moved on since the last /status check
+    await chrome.storage.local.set({ cacheStatus: { version: dataVersion, checkedAt: Date.now() } });
+  }
+  // Degraded answers came from the fallback engine; ask again next time
+  if (resp.ok && dataVersion && !data.degraded) await storeVerdict(hash, dataVersion, data);
+  return data;
+}
+
 async function verifyFact(factText) {
   try {
     // Clean up the floating button as we start verification
     removeFloatButton();
-    const resp = await fetch(`${BACKEND_URL}/api/verify`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ text: factText }),
-    });
-    const data = await resp.json();
+    const hash = blockHash(normalizeBlock(factText));
+    // Repeated clicks (or the context menu) while a check runs share one request
+    if (!inFlightVerdicts.has(hash)) {
+      inFlightVerdicts.set(hash, fetchVerdict(hash, factText).finally(() => inFlightVerdicts.delete(hash)));
+    }
+    const data = await inFlightVerdicts.get(hash);
     showVerdictPopup(data, factText);
   } catch (e) {
     showVerdictPopup({ 
@@ -143,4 +205,116 @@ function escapeHtml(s) {
     .replace(/>/g, "&gt;");
 }
 
+// == Page scanning ==
+// Opt-in (popup setting): text blocks not yet scanned in this page view are sent
+// to /api/scan, which answers from its per-block-hash cache and only verifies new
+// blocks, so scrolling a long feed costs work for the new content only.
+const BLOCK_SELECTOR = "p, li, blockquote, h1, h2, h3, h4, figcaption, td";
+const MIN_BLOCK_CHARS = 40;
+const SCAN_BATCH = 200; // the backend's MAX_BLOCKS_PER_SCAN
+const SCAN_DEBOUNCE_MS = 800;
+
+const blockVerdicts = new Map(); // block hash -> verdict (null while in flight)
+const blockElements = new WeakMap(); // element -> block hash, so each element is hashed once
+let scanTimer = null;
+let scanObserver = null;
+
+function normalizeBlock(text) {
+  return text.replace(/\s+/g, " ").trim().toLowerCase();
+}
+
+function blockHash(normalized) {
+  // FNV-1a 64 over UTF-8, the same as page_scan.block_hash on the backend
+  let h = 0xcbf29ce484222325n;
+  for (const byte of new TextEncoder().encode(normalized)) {
+    h = BigInt.asUintN(64, (h ^ BigInt(byte)) * 0x100000001b3n);
+  }
+  return h.toString(16).padStart(16, "0");
+}
+
+function markBlock(el, verdict) {
+  if (!verdict || !verdict.health) return;
+  if (verdict.status === "harmful" || verdict.status === "caution") {
+    el.classList.add("mv-flagged", `mv-flagged-${verdict.status}`);
+    el.title = verdict.corrected_fact || "";
+  }
+}
+
+function collectNewBlocks() {
+  const pending = [];
+  for (const el of document.querySelectorAll(BLOCK_SELECTOR)) {
+    // Leaf blocks only, and never our own UI
+    if (blockElements.has(el) || el.querySelector(BLOCK_SELECTOR) || el.closest(".medical-verifier-popup"))
+      continue;
+    const normalized = normalizeBlock(el.innerText || "");
+    if (normalized.length < MIN_BLOCK_CHARS) continue;
+    const hash = blockHash(normalized);
+    blockElements.set(el, hash);
+    if (blockVerdicts.has(hash)) {
+      markBlock(el, blockVerdicts.get(hash));
+      continue;
+    }
+    blockVerdicts.set(hash, null);
+    pending.push({ el, hash, text: normalized });
+  }
+  return pending;
+}
+
+async function scanPage() {
+  const pending = collectNewBlocks();
+  for (let i = 0; i < pending.length; i += SCAN_BATCH) {
+    const batch = pending.slice(i, i + SCAN_BATCH);
+    let results = [];
+    try {
+      const resp = await fetch(`${BACKEND_URL}/api/scan`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          page: location.href,
+          blocks: batch.map(({ hash, text }) => ({ hash, text })),
+        }),
+      });
+      results = (await resp.json()).results || [];
+    } catch (e) {
+      console.warn("Page scan failed:", e);
+    }
+    const verdicts = new Map(results.map((verdict) => [verdict.hash, verdict]));
+    for (const { el, hash } of batch) {
+      const verdict = verdicts.get(hash);
+      if (!verdict || verdict.degraded) {
+        // No (full) answer yet: let a later scan ask again
+        blockVerdicts.delete(hash);
+        blockElements.delete(el);
+        continue;
+      }
+      blockVerdicts.set(hash, verdict);
+      markBlock(el, verdict);
+    }
+  }
+}
+
+function scheduleScan() {
+  clearTimeout(scanTimer);
+  scanTimer = setTimeout(scanPage, SCAN_DEBOUNCE_MS);
+}
+
+function setPageScan(enabled) {
+  if (enabled && !scanObserver) {
+    scanObserver = new MutationObserver(scheduleScan);
+    scanObserver.observe(document.body, { childList: true, subtree: true });
+    window.addEventListener("scroll", scheduleScan, { passive: true });
+    scheduleScan();
+  } else if (!enabled && scanObserver) {
+    scanObserver.disconnect();
+    scanObserver = null;
+    window.removeEventListener("scroll", scheduleScan);
+    clearTimeout(scanTimer);
+  }
+}
+
+chrome.storage.local.get({ pageScan: false }, (settings) => setPageScan(settings.pageScan));
+chrome.storage.onChanged.addListener((changes, area) => {
+  if (area === "local" && changes.pageScan) setPageScan(changes.pageScan.newValue);
+});
+
 console.log('Medical Fact Verifier content script loaded');
@@ -24,6 +24,10 @@ function checkBackendStatus() {
         .then(data => {
             statusElement.textContent = 'Connected';
             statusElement.className = '';
+            // Shared with the content scripts, which drop verdicts cached under an older version
+            chrome.storage.local.set({
+                cacheStatus: { version: data.cache_version || null, checkedAt: Date.now() }
+            });
         })
         .catch(error => {
             console.error('Backend connection error:', error);
@@ -76,6 +80,17 @@ function setupEventListeners() {
         });
     }
     
+    // Page scanning toggle (read by the content script)
+    const pageScanToggle = document.getElementById('page-scan');
+    if (pageScanToggle) {
+        chrome.storage.local.get({ pageScan: false }, function(settings) {
+            pageScanToggle.checked = settings.pageScan;
+        });
+        pageScanToggle.addEventListener('change', function() {
+            chrome.storage.local.set({ pageScan: pageScanToggle.checked });
+        });
+    }
+    
     // Refresh button
     const refreshBtn = document.getElementById('refresh-stats');
     if (refreshBtn) {
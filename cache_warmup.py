@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Cache Warm-up
+Replays seed claims through verification at a controlled rate after a start or
+deploy, so the first wave of viral claims finds warm caches instead of all
+hitting Groq, Gemini and PubMed at once. robust_backend runs it in each serving
+process when it has a shared verdict cache (--ai or --shared-cache), each worker
+replaying its own share of the seeds, and answers /api/health with 503 until it
+is done.
+
+Seeds, most valuable first and without duplicates:
+  1. claims trending on a running instance (GET <url>/api/trending), if given
+  2. the most verified claims of the last hours in the verification log
+  3. the test claims in the phase modules' __main__ blocks (read, not imported)
+
+Usage (replay against a running backend as a one-off job):
+  python cache_warmup.py [--url http://localhost:5000] [--rate 5] [--limit 200] [--hours 24]
+"""
+
+import ast
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose __main__ test claims are worth having warm
+SEED_MODULES = ('phase2_content_retrieval', 'phase4_misinformation_detection', 'phase5_trusted_source_retrieval',
+                'phase6_fact_correction', 'real_medical_apis', 'rule_engine', 'claim_index')
+
+WARMUP_RATE = 5.0           # claims started per second
+WARMUP_CONCURRENCY = 4      # claims in flight at once
+WARMUP_LIMIT = 200          # seeds replayed at most
+WARMUP_HOURS = 24           # verification log look-back
+WARMUP_MAX_SECONDS = 120.0  # report ready after this long even if seeds remain
+
+def _is_main_guard(node):
+    return (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+            and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__')
+
+def _claim_strings(value):
+    """Claim-like string constants in a literal (a string, or a list/tuple of strings, tuples or dicts)"""
+    if isinstance(value, ast.Constant) and isinstance(value.value, str):
+        return [value.value]
+    strings = []
+    if isinstance(value, (ast.List, ast.Tuple)):
+        for element in value.elts:
+            if isinstance(element, ast.Tuple) and element.elts:
+                strings.extend(_claim_strings(element.elts[0]))  # (claim, expected verdict) pairs
+            elif isinstance(element, ast.Dict):
+                for key, item in zip(element.keys, element.values):
+                    if isinstance(key, ast.Constant) and key.value == 'content':
+                        strings.extend(_claim_strings(item))
+            else:
+                strings.extend(_claim_strings(element))
+    return strings
+
+def module_test_claims(modules=SEED_MODULES, base_dir=BASE_DIR):
+    """Claims assigned in each module's __main__ block, found by parsing (importing would pull in requests, config...)"""
+    claims = []
+    for module in modules:
+        path = os.path.join(base_dir, f"{module}.py")
+        try:
+            with open(path, encoding='utf-8') as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError):
+            continue
+        for block in (node for node in tree.body if _is_main_guard(node)):
+            for node in ast.walk(block):
+                if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and
+                                                        ('test' in target.id or target.id in ('claims', 'verified'))
+                                                        for target in node.targets):
+                    claims.extend(claim for claim in _claim_strings(node.value)
+                                  if ' ' in claim and not claim.startswith(('http://', 'https://')))
+    return claims
+
+def trending_seeds(url, limit=WARMUP_LIMIT):
+    """Claims trending on a running instance (e.g. the one being replaced)"""
+    import json
+    import urllib.request
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/api/trending?n={min(limit, 100)}", timeout=5) as response:
+            return [row['claim'] for row in json.loads(response.read())['trending'] if row.get('claim')]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Trending claims unavailable from {url}: {e}")
+        return []
+
+def log_seeds(hours=WARMUP_HOURS, limit=WARMUP_LIMIT):
+    """Most verified claims of the last hours in the verification log"""
+    try:
+        from verification_log import recent_claims
+        return [claim for claim, _ in recent_claims(hours, limit)]
+    except (ImportError, OSError, ValueError) as e:
+        print(f"⚠️ Verification log unavailable for warm-up: {e}")
+        return []
+
+def collect_seeds(limit=WARMUP_LIMIT, hours=WARMUP_HOURS, trending_url=None):
+    """[(claim, origin)] in priority order, deduplicated on the lowercased claim"""
+    sources = [('trending', trending_seeds(trending_url, limit) if trending_url else []),
+               ('log', log_seeds(hours, limit)),
+               ('modules', module_test_claims())]
+    seeds = []
+    seen = set()
+    for origin, claims in sources:
+        for claim in claims:
+            key = ' '.join(claim.lower().split())
+            if key not in seen:
+                seen.add(key)
+                seeds.append((claim, origin))
+    return seeds[:limit]
+
+class CacheWarmup:
+    """Replays seeds through verify(text) -> (result, info) in a background thread
+
+    Claims start at most `rate` per second with at most `concurrency` in flight,
+    so warm-up never saturates the upstream APIs (or the scheduler, whose batch
+    priority it should use). ready turns true when every seed is done or after
+    max_seconds. shard=(index, count) replays only seeds[index::count], so
+    pre-forked workers split the seeds instead of all verifying each one.
+    """
+
+    def __init__(self, verify, seeds=None, rate=WARMUP_RATE, concurrency=WARMUP_CONCURRENCY,
+                 max_seconds=WARMUP_MAX_SECONDS, seed_options=None, shard=(0, 1)):
+        self.verify = verify
+        self.seeds = seeds
+        self.shard = shard
+        self.rate = rate
+        self.concurrency = concurrency
+        self.max_seconds = max_seconds
+        self.seed_options = seed_options or {}
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.started = None
+        self.stats = {'total': 0, 'done': 0, 'cached': 0, 'degraded': 0, 'errors': 0, 'by_origin': {}}
+
+    @property
+    def ready(self):
+        return self.finished.is_set() or (self.started is not None and time.monotonic() - self.started > self.max_seconds)
+
+    def start(self):
+        self.started = time.monotonic()
+        threading.Thread(target=self.run, name='cache-warmup', daemon=True).start()
+        return self
+
+    def _replay(self, text):
+        try:
+            _, info = self.verify(text)
+            with self.lock:
+                self.stats['cached'] += 1 if info.get('cached') else 0
+                self.stats['degraded'] += 1 if info.get('degraded') else 0
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+            print(f"⚠️ Warm-up claim failed: {e}")
+        finally:
+            with self.lock:
+                self.stats['done'] += 1
+            self.slots.release()
+
+    def run(self):
+        if self.started is None:
+            self.started = time.monotonic()
+        if self.seeds is None:
+            self.seeds = collect_seeds(**self.seed_options)
+        index, count = self.shard
+        self.seeds = self.seeds[index::count]
+        with self.lock:
+            self.stats['total'] = len(self.seeds)
+            for _, origin in self.seeds:
+                self.stats['by_origin'][origin] = self.stats['by_origin'].get(origin, 0) + 1
+        interval = 1.0 / self.rate if self.rate else 0.0
+        workers = []
+        for text, _ in self.seeds:
+            if time.monotonic() - self.started > self.max_seconds:
+                break
+            next_start = time.monotonic() + interval
+            self.slots.acquire()
+            worker = threading.Thread(target=self._replay, args=(text,), daemon=True)
+            worker.start()
+            workers.append(worker)
+            time.sleep(max(0.0, next_start - time.monotonic()))
+        for worker in workers:
+            worker.join(max(0.0, self.max_seconds - (time.monotonic() - self.started)))
+        self.finished.set()
+        print(f"🔥 Cache warm-up finished: {self.progress()}")
+
+    def progress(self):
+        with self.lock:
+            stats = dict(self.stats, by_origin=dict(self.stats['by_origin']))
+        stats['ready'] = self.ready
+        stats['elapsed_s'] = round(time.monotonic() - self.started, 1) if self.started is not None else 0.0
+        return stats
+
+def _http_verify(url):
+    """verify() that posts to a running backend's batch endpoint (served at batch priority)"""
+    import http.client
+    import json
+    from urllib.parse import urlparse
+
+    parsed = urlparse(url)
+    local = threading.local()
+
+    def verify(text):
+        if getattr(local, 'conn', None) is None:
+            local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=120)
+        try:
+            local.conn.request('POST', '/api/verify/batch', json.dumps({'texts': [text]}),
+                               {'Content-Type': 'application/json', 'X-Client-Id': 'cache-warmup'})
+            response = local.conn.getresponse()
+            data = json.loads(response.read())['results'][0]
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            local.conn = None
+            raise
+        return data, {'cached': data.get('cached', False), 'degraded': data.get('degraded', False)}
+
+    return verify
+
+if __name__ == "__main__":
+    import sys
+
+    def option(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    url = option('--url', None)
+    limit = int(option('--limit', WARMUP_LIMIT))
+    seeds = collect_seeds(limit, float(option('--hours', WARMUP_HOURS)), url)
+    print(f"🌱 {len(seeds)} seed claims:")
+    for claim, origin in seeds[:15]:
+        print(f"  [{origin:8s}] {claim[:70]}")
+    if len(seeds) > 15:
+        print(f"  ... and {len(seeds) - 15} more")
+
+    if url:
+        warmup = CacheWarmup(_http_verify(url), seeds, rate=float(option('--rate', WARMUP_RATE)), max_seconds=3600)
+        warmup.start().finished.wait()
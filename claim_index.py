@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Claim Similarity Index
+Nearest previously verified claims by cosine similarity over hashed n-gram vectors
+
+Saves run on a background thread, never on the request path. Pre-forked
+workers each hold their own index in memory: a save merges in the claims
+other workers saved before writing, under a file lock, so no worker's
+entries are overwritten (and each worker picks up the others' claims).
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'claim_index')
+
+VECTOR_DIM = 2 ** 11
+DIRECT_ANSWER_THRESHOLD = 0.92  # reuse a prior verdict without calling the LLM (same negations only)
+EVIDENCE_THRESHOLD = 0.55       # inject as evidence into the detection prompt
+AUTOSAVE_EVERY = 20
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Negation words (after normalize_claim, "don't" is "don t"): a claim and its
+# negation are near neighbors by n-gram cosine but have opposite verdicts
+NEGATIONS = frozenset((
+    'not', 'no', 'never', 'nor', 'none', 'cannot', 'without', 't',
+    'nunca', 'sin', 'ni', 'nada', 'não', 'nao', 'jamais', 'ne', 'pas',
+    'nicht', 'kein', 'keine', 'nahi', 'नहीं', 'मत', 'न'
+))
+
+# Detection results from these sources are verdicts worth indexing (not pattern
+# fallbacks, nor answers that came from the index itself)
+INDEXED_SOURCES = frozenset(('groq',))
+
+def normalize_claim(text):
+    """Normalized claim text used for hashing and vectorizing"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ' '.join(_WORD_RE.findall(text))
+
+def negation_count(normalized):
+    """Number of negation words in a normalized claim"""
+    return sum(word in NEGATIONS for word in normalized.split())
+
+def is_direct_match(text, neighbor):
+    """True if a neighbor's verdict may answer the claim without the LLM
+
+    Exact normalized matches always may; near matches only above
+    DIRECT_ANSWER_THRESHOLD and with as many negations as the claim.
+    """
+    normalized = normalize_claim(text)
+    stored = neighbor.get('normalized', '')
+    if normalized == stored:
+        return True
+    return neighbor['similarity'] >= DIRECT_ANSWER_THRESHOLD and negation_count(normalized) == negation_count(stored)
+
+def _features(normalized):
+    """Word unigrams, word bigrams and character trigrams"""
+    words = normalized.split()
+    features = [f"w:{w}" for w in words]
+    features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    padded = f" {normalized} "
+    features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+def vectorize(texts, dim=VECTOR_DIM):
+    """L2-normalized hashed feature vectors, one float32 row per text"""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(normalize_claim(text)):
+            h = zlib.crc32(feature.encode('utf-8'))
+            # Sign bit from the hash reduces collision bias
+            matrix[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class ClaimIndex:
+    """Growable matrix of verified-claim vectors with batched top-k cosine search"""
+
+    def __init__(self, index_dir=INDEX_DIR, dim=VECTOR_DIM, autosave_every=AUTOSAVE_EVERY):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.autosave_every = autosave_every
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.records = []
+        self.positions = {}  # normalized claim -> row, so re-verified claims overwrite
+        self.unsaved = 0
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # one save at a time (saves take self.lock only briefly)
+        self.save_wanted = threading.Event()
+        self.saver_pid = None
+        self.load()
+
+    def __len__(self):
+        return len(self.records)
+
+    def _read_saved(self):
+        """(vectors, records) saved by save(), or None if absent or inconsistent"""
+        vectors_path = os.path.join(self.index_dir, 'vectors.npy')
+        records_path = os.path.join(self.index_dir, 'claims.jsonl')
+        if not (os.path.exists(vectors_path) and os.path.exists(records_path)):
+            return None
+        with open(records_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        vectors = np.load(vectors_path)
+        if vectors.shape != (len(records), self.dim):
+            print("⚠️ Saved claim index is inconsistent, ignoring it")
+            return None
+        return vectors, records
+
+    def load(self):
+        """Load vectors and records saved by save()"""
+        saved = self._read_saved()
+        if saved is None:
+            return
+        self.vectors, self.records = saved
+        self.positions = {record['normalized']: row for row, record in enumerate(self.records)}
+
+    def save(self):
+        """Merge in claims saved by other processes, then write vectors and records atomically"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self.save_lock, _file_lock(os.path.join(self.index_dir, 'save.lock')):
+            saved = self._read_saved()
+            with self.lock:
+                if saved is not None:
+                    # Claims only another worker verified; ours win for claims both have
+                    for vector, record in zip(*saved):
+                        if record['normalized'] not in self.positions:
+                            self._append(record, vector)
+                vectors = self.vectors[:len(self.records)].copy()
+                records = list(self.records)
+                self.unsaved = 0
+            self._write(vectors, records)
+
+    def _write(self, vectors, records):
+        # Unique temp names: a crashed save never collides with the next one
+        vectors_fd, tmp_vectors = tempfile.mkstemp(dir=self.index_dir, suffix='.npy.tmp')
+        records_fd, tmp_records = tempfile.mkstemp(dir=self.index_dir, suffix='.jsonl.tmp')
+        try:
+            with os.fdopen(vectors_fd, 'wb') as f:
+                np.save(f, vectors)
+            with os.fdopen(records_fd, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+            os.replace(tmp_vectors, os.path.join(self.index_dir, 'vectors.npy'))
+            os.replace(tmp_records, os.path.join(self.index_dir, 'claims.jsonl'))
+        finally:
+            for path in (tmp_vectors, tmp_records):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _saver(self):
+        while True:
+            self.save_wanted.wait()
+            self.save_wanted.clear()
+            try:
+                self.save()
+            except Exception as e:
+                print(f"⚠️ Claim index save failed: {e}")
+
+    def _request_save(self):
+        """Wake this process's saver thread (started on first use; threads do not survive fork)"""
+        if self.saver_pid != os.getpid():
+            with self.lock:
+                if self.saver_pid != os.getpid():
+                    self.saver_pid = os.getpid()
+                    self.save_wanted = threading.Event()
+                    threading.Thread(target=self._saver, name='claim-index-saver', daemon=True).start()
+        self.save_wanted.set()
+
+    def _append(self, record, vector):
+        """New row for a claim (caller holds self.lock)"""
+        row = len(self.records)
+        if row >= self.vectors.shape[0]:
+            # Grow capacity geometrically so adds stay amortized O(1)
+            grown = np.zeros((max(64, row * 2), self.dim), dtype=np.float32)
+            grown[:row] = self.vectors[:row]
+            self.vectors = grown
+        self.records.append(record)
+        self.positions[record['normalized']] = row
+        self.vectors[row] = vector
+
+    def add(self, claim, record):
+        """Add (or replace) a verified claim and its verdict record"""
+        normalized = normalize_claim(claim)
+        if not normalized:
+            return
+        vector = vectorize([claim], self.dim)[0]
+        record = dict(record, claim=claim[:500], normalized=normalized)
+
+        with self.lock:
+            row = self.positions.get(normalized)
+            if row is None:
+                self._append(record, vector)
+            else:
+                self.records[row] = record
+                self.vectors[row] = vector
+            self.unsaved += 1
+            should_save = self.unsaved >= self.autosave_every
+
+        if should_save:
+            self._request_save()
+
+    def search(self, claims, k=3):
+        """Top-k neighbors for each claim: list of [(similarity, record), ...]"""
+        with self.lock:
+            count = len(self.records)
+            if count == 0:
+                return [[] for _ in claims]
+            vectors = self.vectors[:count]
+            records = self.records
+
+        queries = vectorize(claims, self.dim)
+        similarities = queries @ vectors.T  # rows are unit length, so this is cosine
+
+        k = min(k, count)
+        results = []
+        for row in similarities:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(float(row[i]), records[i]) for i in top])
+        return results
+
+class _file_lock:
+    """Blocking exclusive lock file across processes (no-op where fcntl is missing)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        self.file = open(self.path, 'a')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()  # releases the lock
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_claim_index():
+    """Process-wide claim index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ClaimIndex()
+        return _index
+
+def find_similar_claims(text, k=3, min_similarity=EVIDENCE_THRESHOLD):
+    """Nearest verified claims above min_similarity, most similar first"""
+    neighbors = get_claim_index().search([text], k)[0]
+    return [dict(record, similarity=round(similarity, 3)) for similarity, record in neighbors if similarity >= min_similarity]
+
+def format_neighbor_evidence(neighbors):
+    """Prior fact-checks as prompt context"""
+    lines = ["Previously verified similar claims:"]
+    for neighbor in neighbors:
+        lines.append(f"- \"{neighbor['claim'][:150]}\" -> {neighbor['verdict']} "
+                     f"(confidence {neighbor['confidence']}, similarity {neighbor['similarity']})")
+    return "\n".join(lines)
+
+def record_verified_claim(claim, analysis, fact_check=None):
+    """Store a claim's detection result (and optional fact-check text) in the index
+
+    Only LLM verdicts are stored (analysis['detection_source'] in INDEXED_SOURCES).
+    """
+    if not analysis or analysis.get('detection_source') not in INDEXED_SOURCES:
+        return
+    get_claim_index().add(claim, {
+        'verdict': analysis.get('verdict', 'uncertain'),
+        'confidence': analysis.get('confidence', 0.5),
+        'risk_level': analysis.get('risk_level', 'medium'),
+        'reasoning': analysis.get('reasoning', ''),
+        'medical_entities': analysis.get('medical_entities', []),
+        'action_needed': analysis.get('action_needed', ''),
+        'fact_check': (fact_check or '')[:2000]
+    })
+
+if __name__ == "__main__":
+    # Test the module
+    import tempfile
+    import time
+
+    index = ClaimIndex(index_dir=tempfile.mkdtemp(), autosave_every=10 ** 6)
+    verified = [
+        ("Vaccines cause autism in children", 'misinformation'),
+        ("Drinking bleach cures COVID-19", 'misinformation'),
+        ("Regular exercise helps prevent heart disease", 'likely_accurate'),
+        ("Vitamin C cures the common cold", 'potential_misinformation'),
+        ("Forwarded many times: doctors confirm that you should drink hot water with lemon and turmeric "
+         "every morning because it kills the virus in the throat before it reaches the lungs", 'misinformation'),
+    ]
+    for claim, verdict in verified:
+        index.add(claim, {'verdict': verdict, 'confidence': 0.9})
+
+    # Pad the index to a realistic size
+    for i in range(20000):
+        index.add(f"Synthetic verified claim number {i} about supplement {i % 97}", {'verdict': 'uncertain', 'confidence': 0.5})
+
+    negated = ("Forwarded many times: doctors confirm that you should not drink hot water with lemon and turmeric "
+               "every morning because it kills the virus in the throat before it reaches the lungs")
+    queries = ["vaccines can cause autism in kids", "Does drinking bleach cure covid?", "exercise prevents heart disease",
+               "drinking bleach cures covid 19!", negated]
+    start = time.perf_counter()
+    results = index.search(queries, k=2)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Searched {len(queries)} claims against {len(index)} in {elapsed:.1f} ms")
+    for query, neighbors in zip(queries, results):
+        similarity, record = neighbors[0]
+        direct = is_direct_match(query, dict(record, similarity=similarity))
+        print(f"  {query[:45]!r} -> {record['claim'][:45]!r} ({record['verdict']}, similarity {similarity:.2f}, "
+              f"{'direct answer' if direct else 'evidence only'})")
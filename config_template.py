@@ -9,6 +9,10 @@ GROQ_API_KEY = "your_groq_api_key_here"
 # Get your free API key at: https://ai.google.dev/
 GEMINI_API_KEY = "your_gemini_api_key_here"
 
+# Optional: NCBI E-utilities API key (raises the PubMed limit from 3 to 10 requests/sec)
+# Get one at: https://www.ncbi.nlm.nih.gov/account/settings/
+NCBI_API_KEY = ""
+
 # Optional: OpenAI API (if you want to compare)
 OPENAI_API_KEY = ""
 
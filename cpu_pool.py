@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+CPU Worker Pool
+Persistent process pool for CPU-bound stages (HTML cleaning, pattern scanning),
+so they run off the request threads and outside the server's GIL
+
+The pool exists only once a server has called start_cpu_pool(); CLI runs and
+batch workers run every stage inline rather than paying for spawning it.
+Sentence splitting (prompt_budget) always stays inline: one precompiled regex
+split costs less than the IPC round trip.
+"""
+
+import atexit
+import importlib
+import os
+import signal
+import threading
+
+# Modules imported by each worker at startup; their pattern automata and
+# lexicons are compiled at import (or by the module's warm_up()), so tasks never pay for it
+WARM_MODULES = [
+    'phase2_content_retrieval',
+    'phase4_misinformation_detection',
+]
+
+# Below this many characters the IPC round trip costs more than the work itself
+INLINE_MAX_CHARS = 2000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_pool_disabled = False
+
+def _warm_worker(modules):
+    """Worker initializer: leave Ctrl+C to the parent and preload modules"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name in modules:
+        try:
+            module = importlib.import_module(name)
+            if hasattr(module, 'warm_up'):
+                module.warm_up()
+        except Exception as e:
+            print(f"⚠️ CPU worker could not preload {name}: {e}")
+
+def _ping(_=None):
+    return os.getpid()
+
+def start_cpu_pool(workers=None, modules=None):
+    """Start the pool and wait until every worker is up and warm"""
+    global _pool, _pool_workers
+    # Imported here: concurrent.futures.process is a noticeable share of server start-up
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server is unsafe, and it matches Windows behaviour
+            context = multiprocessing.get_context('spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                        initializer=_warm_worker,
+                                        initargs=(modules or WARM_MODULES,))
+            _pool_workers = workers
+        pool = _pool
+
+    # One ping per worker forces all of them to start (and run the initializer) now
+    pids = set(pool.map(_ping, range(_pool_workers * 4)))
+    return pool, len(pids)
+
+def get_cpu_pool():
+    """The process-wide pool if start_cpu_pool() was called (None if not started or disabled)"""
+    if _pool_disabled:
+        return None
+    return _pool
+
+def disable_cpu_pool():
+    """Run CPU stages inline from now on (e.g. in pre-forked workers, which already use every core)"""
+    global _pool_disabled
+    _pool_disabled = True
+
+def _disable_pool(error):
+    global _pool, _pool_disabled
+    print(f"⚠️ CPU pool unavailable, running CPU stages inline: {error}")
+    with _pool_lock:
+        _pool_disabled = True
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def run_cpu(fn, text, *args, timeout=30):
+    """Run fn(text, *args) in the pool; small inputs, no pool, a broken pool or a timeout run inline
+
+    fn must be a module-level function so it pickles by reference; only the
+    arguments and the result cross the process boundary.
+    """
+    if len(text) < INLINE_MAX_CHARS:
+        return fn(text, *args)
+    pool = get_cpu_pool()
+    if pool is None:
+        return fn(text, *args)
+    from concurrent.futures import TimeoutError as FutureTimeout
+    from concurrent.futures.process import BrokenProcessPool
+    future = pool.submit(fn, text, *args)
+    try:
+        return future.result(timeout=timeout)
+    except BrokenProcessPool as e:
+        _disable_pool(e)
+        return fn(text, *args)
+    except FutureTimeout:
+        # A slow or hung worker must not fail the request; the pool itself stays up
+        future.cancel()
+        print(f"⚠️ CPU pool task timed out after {timeout}s, running {fn.__name__} inline")
+        return fn(text, *args)
+
+def map_cpu(fn, texts, chunksize=16):
+    """fn over many texts in the pool, batched so each IPC message carries chunksize items"""
+    pool = get_cpu_pool()
+    if pool is None:
+        return [fn(text) for text in texts]
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        return list(pool.map(fn, texts, chunksize=chunksize))
+    except BrokenProcessPool as e:
+        _disable_pool(e)
+        return [fn(text) for text in texts]
+
+def shutdown_cpu_pool():
+    """Stop the workers (called automatically at exit)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+atexit.register(shutdown_cpu_pool)
+
+def _analyze_page(html):
+    """Benchmark task: HTML cleaning followed by pattern scanning"""
+    from phase2_content_retrieval import clean_html
+    from phase4_misinformation_detection import pattern_based_detection
+    title, text = clean_html(html)
+    return pattern_based_detection(text)['verdict']
+
+if __name__ == "__main__":
+    # Scaling benchmark: pattern scanning + HTML cleaning over synthetic articles
+    import multiprocessing
+    import time
+    from concurrent.futures import ProcessPoolExecutor as Executor
+
+    paragraph = ("<p>Local doctors say drinking bleach cures COVID-19 instantly and vaccines cause autism. "
+                 "Consult your doctor and follow CDC guidelines; a balanced diet and exercise regularly help.</p>")
+    page = ("<html><head><title>Health news</title><script>var x = 1;</script></head><body>"
+            + paragraph * 150 + "</body></html>")
+    pages = [page.replace('Local', f'Local {i}') for i in range(512)]
+
+    def run(workers):
+        context = multiprocessing.get_context('spawn')
+        with Executor(max_workers=workers, mp_context=context, initializer=_warm_worker, initargs=(WARM_MODULES,)) as pool:
+            list(pool.map(_ping, range(workers * 4)))
+            start = time.perf_counter()
+            results = list(pool.map(_analyze_page, pages, chunksize=8))
+            return time.perf_counter() - start, results
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    print(f"🧮 {len(pages)} pages of {len(page) // 1024} KB, {cores} cores")
+    start = time.perf_counter()
+    for html in pages[:64]:
+        _analyze_page(html)
+    print(f"   inline: {64 / (time.perf_counter() - start):7.1f} pages/s")
+    baseline = None
+    for workers in counts:
+        elapsed, results = run(workers)
+        baseline = baseline or elapsed
+        print(f"  {workers:2d} workers: {len(pages) / elapsed:7.1f} pages/s  (speedup {baseline / elapsed:.2f}x)")
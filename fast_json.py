@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Fast JSON
+Serialization layer for the HTTP handlers: orjson when installed (stdlib json
+otherwise), pre-encoded static values, and extraction of the JSON object from
+LLM replies
+"""
+
+import json
+
+from medical_types import Record
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+_DECODER = json.JSONDecoder()
+
+class StaticJSON(tuple):
+    """Constant JSON array encoded once at import
+
+    Behaves like a tuple (so results can still be iterated, sliced and cached),
+    but dumps() splices its pre-encoded bytes into responses instead of
+    re-encoding the same source links on every request.
+    """
+
+    def __new__(cls, items):
+        value = super().__new__(cls, items)
+        value.encoded = _dumps(list(value))
+        return value
+
+def _default(obj):
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def _dumps(obj):
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+else:
+    # ASCII output keeps the str -> bytes step a plain copy
+    _ENCODER = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+    def _dumps(obj):
+        return _ENCODER.encode(obj).encode('ascii')
+
+    def loads(data):
+        """Parse a request body (bytes or str)"""
+        if not isinstance(data, str):
+            data = data.decode('utf-8')
+        return _DECODER.decode(data)
+
+# '"key":' fragments, filled as keys are first seen
+_KEYS = {}
+
+def _encoded_key(key):
+    encoded = _KEYS.get(key)
+    if encoded is None:
+        encoded = _KEYS[key] = _dumps(key) + b':'
+    return encoded
+
+def dumps(obj):
+    """JSON bytes of obj; StaticJSON values of a top-level dict are spliced in pre-encoded"""
+    if type(obj) is not dict:
+        return _dumps(obj)
+    dynamic = {}
+    static = []
+    for key, value in obj.items():
+        if type(value) is StaticJSON:
+            static.append(_encoded_key(key) + value.encoded)
+        else:
+            dynamic[key] = value
+    if not static:
+        return _dumps(obj)
+    if not dynamic:
+        return b'{' + b','.join(static) + b'}'
+    return _dumps(dynamic)[:-1] + b',' + b','.join(static) + b'}'
+
+def dumps_list(key, items):
+    """{"key": [...]} for a list of responses, each encoded with dumps()"""
+    return b'{' + _encoded_key(key) + b'[' + b','.join(dumps(item) for item in items) + b']}'
+
+def extract_json(text):
+    """First JSON object in an LLM reply (prose or code fences around it), or None
+
+    raw_decode parses forward from each '{' and stops at the end of the object,
+    so trailing text (or braces in it) no longer breaks the parse the way a
+    find('{')/rfind('}') slice did.
+    """
+    start = text.find('{')
+    while start != -1:
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
+if __name__ == "__main__":
+    # Microbenchmark: per-request serialization cost of a verification response
+    import time
+    from datetime import datetime
+
+    LINKS = ['https://www.who.int/news-room/feature-stories/detail/how-to-report-misinformation-online',
+             'https://www.cdc.gov/healthliteracy/researchevaluate.html',
+             'https://pubmed.ncbi.nlm.nih.gov/34234532/']
+    STATIC_LINKS = StaticJSON(LINKS)
+
+    def response(links):
+        return {
+            'status': 'harmful',
+            'corrected_fact': "⚠️ DANGEROUS: This claim is harmful misinformation that could cause serious health risks.",
+            'explanation': "Medical misinformation can lead to dangerous self-treatment, delayed medical care, or rejection of proven treatments.",
+            'source_links': links,
+            'degraded': False,
+            'cached': False,
+            'original_text': 'drinking bleach cures covid-19 instantly',
+            'verification_timestamp': datetime.now().isoformat()
+        }
+
+    body = json.dumps({'text': 'Drinking bleach cures COVID-19 instantly. ' * 5}).encode()
+    reply = ('Here is my analysis:\n```json\n{"verdict": "misinformation", "confidence": 0.95, '
+             '"risk_level": "critical", "reasoning": "Bleach is toxic {see CDC}", "medical_entities": ["bleach"]}\n```\n'
+             'Note: {this} is not medical advice.')
+
+    def bench(label, fn, rounds=100_000):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        print(f"  {label:42s} {(time.perf_counter() - start) * 1e6 / rounds:6.2f} µs")
+
+    print(f"⚡ JSON backend: {JSON_BACKEND}")
+    bench('response: json.dumps().encode()', lambda: json.dumps(response(LINKS)).encode())
+    bench('response: fast_json.dumps', lambda: dumps(response(LINKS)))
+    bench('response: fast_json.dumps (static links)', lambda: dumps(response(STATIC_LINKS)))
+    bench('body: json.loads(body.decode())', lambda: json.loads(body.decode('utf-8')))
+    bench('body: fast_json.loads(body)', lambda: loads(body))
+
+    def slice_parse():
+        try:
+            return json.loads(reply[reply.find('{'):reply.rfind('}') + 1])
+        except ValueError:
+            return None
+
+    print(f"  LLM reply, find/rfind slice: {'parsed' if slice_parse() else 'FAILED (trailing brace)'}")
+    print(f"  LLM reply, extract_json:     {extract_json(reply)['verdict']}")
+    bench('LLM reply: extract_json', lambda: extract_json(reply))
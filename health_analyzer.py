@@ -5,9 +5,8 @@ Main application combining all functionality in one file
 Handles: URLs | Articles | Messages | Text Claims
 """
 
-import sys
-import os
-from real_medical_apis import ComprehensiveMedicalAPIs, process_input, simple_nlp_preprocess, generate_report
+# Stages (and the requests/config imports behind them) load on first use
+from pipeline_stages import get_stage
 
 def main_health_analyzer():
     """Main health information analyzer"""
@@ -21,9 +20,6 @@ def main_health_analyzer():
     print("🏥 Sources: PubMed | WHO | CDC | NIH | FDA | ClinicalTrials.gov")
     print("=" * 70 + "\n")
     
-    # Initialize medical APIs
-    medical_api = ComprehensiveMedicalAPIs()
-    
     # Phase 1: Input Processing
     print("📥 Phase 1: Input Processing...")
     print("Enter any of the following:")
@@ -38,7 +34,7 @@ def main_health_analyzer():
     
     # Phase 2: Content Analysis
     print("\n🔍 Phase 2: Content Analysis...")
-    processed_input = process_input(user_input)
+    processed_input = get_stage('input_processor')(user_input)
     print(f"📋 Input Type: {processed_input['type'].upper()}")
     print(f"📄 Source: {processed_input['source']}")
     print(f"📰 Title: {processed_input['title']}")
@@ -46,7 +42,7 @@ def main_health_analyzer():
     
     # Phase 3: Medical Research
     print("\n🔬 Phase 3: Comprehensive Medical Research...")
-    medical_sources = medical_api.search_medical_sources(processed_input['content'])
+    medical_sources = get_stage('medical_search')(processed_input['content'])
     
     research_count = len([s for s in medical_sources if s['type'] == 'research'])
     guideline_count = len([s for s in medical_sources if s['type'] == 'guideline'])
@@ -68,13 +64,13 @@ def main_health_analyzer():
     
     # Phase 4: Language Processing
     print("🧠 Phase 4: Language Processing...")
-    language, cleaned_text = simple_nlp_preprocess(processed_input['content'])
+    language, cleaned_text = get_stage('nlp_preprocess')(processed_input['content'])
     print(f"🌐 Language: {language}")
     print(f"🧹 Cleaned text: {cleaned_text[:50]}...")
     
     # Phase 5: AI Detection
     print("\n🚨 Phase 5: Enhanced Misinformation Detection (Groq AI)...")
-    detection_result = medical_api.detect_misinformation_groq(processed_input['content'])
+    detection_result = get_stage('groq_detection')(processed_input['content'])
     
     verdict_emoji = "✅" if detection_result['verdict'] == 'likely_accurate' else "⚠️" if detection_result['verdict'] == 'uncertain' else "❌"
     print(f"{verdict_emoji} AI Analysis: {detection_result['verdict'].replace('_', ' ').upper()} ({detection_result['verdict'].replace('_', ' ').title()})")
@@ -84,7 +80,7 @@ def main_health_analyzer():
     
     # Phase 6: Fact Checking
     print("\n🏥 Phase 6: Medical Fact-Checking (Gemini AI)...")
-    fact_check_result = medical_api.fact_check_gemini(processed_input['content'], medical_sources)
+    fact_check_result = get_stage('fact_check')(processed_input['content'], medical_sources, detection_result)
     print("✅ Medical fact-check completed")
     
     # Phase 7: Generate Report
@@ -94,7 +90,8 @@ def main_health_analyzer():
     verdict_map = {
         'likely_accurate': '✅ LIKELY ACCURATE',
         'uncertain': '⚠️ UNCERTAIN', 
-        'likely_misinformation': '❌ LIKELY MISINFORMATION'
+        'potential_misinformation': '⚠️ POTENTIAL MISINFORMATION',
+        'misinformation': '❌ LIKELY MISINFORMATION'
     }
     
     input_type_emoji = {
@@ -129,7 +126,8 @@ This analysis is for informational purposes only.
 Always consult qualified healthcare professionals for medical decisions."""
     
     # Generate final report
-    report = generate_report(verdict, reasoning, medical_sources, fact_check_result)
+    citations = [f"{source['source']} - {source['title']} ({source['url']})" for source in medical_sources]
+    report = get_stage('report')(verdict, reasoning, citations, fact_check_result)
     print("✅ Analysis completed!")
     
     print(f"\n{report}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+HTTP Response Compression
+Accept-Encoding negotiation and body compression for the stdlib backends:
+brotli when the brotli package is installed, gzip otherwise. Small bodies are
+sent as they are, since compressing a few hundred bytes saves less than it costs.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024   # single verdicts (~600 bytes) go out uncompressed
+GZIP_LEVEL = 5              # JSON compresses nearly as well at 5 as at 9, at a fraction of the CPU
+BROTLI_QUALITY = 5
+
+SUPPORTED = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0), from an Accept-Encoding header"""
+    accepted = set()
+    for part in (header or '').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+def choose_encoding(header, size):
+    """Content-Encoding for a body of `size` bytes, or None to send it as is"""
+    if size < MIN_COMPRESS_BYTES or not header:
+        return None
+    accepted = accepted_encodings(header)
+    for coding in SUPPORTED:
+        if coding in accepted or '*' in accepted:
+            return coding
+    return None
+
+def gzip_compress(data):
+    # zlib directly: gzip.compress() stamps the current time and is slower for small bodies
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if coding == 'gzip':
+        return gzip_compress(data)
+    return data
+
+def encode_body(body, accept_encoding):
+    """(body to send, Content-Encoding or None) for the client's Accept-Encoding"""
+    coding = choose_encoding(accept_encoding, len(body))
+    if coding is None:
+        return body, None
+    compressed = compress(body, coding)
+    if len(compressed) >= len(body):
+        return body, None
+    return compressed, coding
+
+if __name__ == "__main__":
+    # Test the module: sizes and cost for typical response bodies
+    import json
+    import time
+
+    verdict = {'status': 'harmful', 'corrected_fact': "⚠️ DANGEROUS: This claim is harmful misinformation.",
+               'explanation': 'Matched high-risk pattern: cure claims for serious disease. Consult a doctor.',
+               'source_links': ['https://www.who.int/', 'https://www.cdc.gov/', 'https://medlineplus.gov/'],
+               'degraded': False, 'cached': False, 'original_text': 'drinking bleach cures covid',
+               'verification_timestamp': '2026-10-19T12:00:00', 'lexicon_version': 3, 'cache_version': 'r4.1a2b.l3'}
+    bodies = {'single verdict': json.dumps(verdict).encode(),
+              'batch of 50': json.dumps({'results': [verdict] * 50}).encode(),
+              'page scan (200 blocks)': json.dumps({'results': [dict(verdict, hash=f"{i:016x}") for i in range(200)]}).encode()}
+
+    print(f"🗜️ Encodings available: {', '.join(SUPPORTED)}")
+    for label, body in bodies.items():
+        for header in ('gzip, deflate, br', 'identity'):
+            start = time.perf_counter()
+            for _ in range(20):
+                sent, coding = encode_body(body, header)
+            elapsed = (time.perf_counter() - start) * 1000 / 20
+            print(f"  {label:24s} {header:18s} {len(body):7d} -> {len(sent):6d} bytes "
+                  f"({coding or 'uncompressed'}, {elapsed:.2f} ms)")
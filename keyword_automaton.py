@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Keyword Automaton
+Aho-Corasick multi-pattern matcher: finds every keyword in one pass over the text
+"""
+
+class KeywordAutomaton:
+    """Compiled set of keywords, each carrying a payload
+
+    Matching is case-insensitive. With whole_words=True a match must not be
+    preceded or followed by a letter or digit ('cure' does not match 'secure').
+    """
+
+    def __init__(self, keywords=None, whole_words=True):
+        self.whole_words = whole_words
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.size = 0
+        self.compiled = False
+        if keywords:
+            for keyword, payload in keywords:
+                self.add(keyword, payload)
+            self.compile()
+
+    def add(self, keyword, payload=None):
+        """Add a keyword (before compile)"""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append((len(keyword), keyword, payload))
+        self.size += 1
+        self.compiled = False
+
+    def compile(self):
+        """Build failure links (breadth-first)"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        self.compiled = True
+        return self
+
+    def finditer(self, text):
+        """Yield (start, end, keyword, payload) for every match"""
+        if not self.compiled:
+            self.compile()
+        lowered = text.lower()
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        whole_words = self.whole_words
+        length = len(lowered)
+
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            for keyword_length, keyword, payload in output[state]:
+                start = end - keyword_length
+                if whole_words:
+                    if start > 0 and lowered[start - 1].isalnum():
+                        continue
+                    if end < length and lowered[end].isalnum():
+                        continue
+                yield start, end, keyword, payload
+
+    def find_all(self, text):
+        """List of (keyword, payload) matches in text order"""
+        return [(keyword, payload) for _, _, keyword, payload in self.finditer(text)]
+
+    def matched_keywords(self, text):
+        """Unique matched keywords, in order of first appearance"""
+        seen = []
+        for _, _, keyword, _ in self.finditer(text):
+            if keyword not in seen:
+                seen.append(keyword)
+        return seen
+
+if __name__ == "__main__":
+    # Test the module
+    automaton = KeywordAutomaton([
+        ('cure cancer', 'high'),
+        ('cancer', 'topic'),
+        ('miracle cure', 'high'),
+        ('cure', 'word'),
+        ('vaccines cause autism', 'high'),
+    ])
+    text = "This miracle cure will cure cancer, unlike secure vaccines! Vaccines cause autism, they say."
+    for start, end, keyword, payload in automaton.finditer(text):
+        print(f"  [{start}:{end}] {keyword!r} -> {payload}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Lexicon Store
+Versioned pattern lexicons (data/lexicons/lexicons-<version>.json) for phase 4
+pattern detection, the Groq fallback analysis and phase 5 drug extraction, with
+optional per-language lists for claims phase 3 detects as non-English
+
+A watcher thread compiles newly published versions in the background and swaps
+them in with a single reference assignment (copy-on-write): callers take one
+snapshot per request, so they never see a half-built automaton, and a reload
+never makes a request wait.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from keyword_automaton import KeywordAutomaton
+from phase3_nlp_preprocessing import DEFAULT_LANGUAGE, match_form
+
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lexicons')
+LEXICON_FILE_RE = re.compile(r'^lexicons-(\d+)\.json$')
+
+# Seconds between directory scans for a newer version
+POLL_INTERVAL = 5.0
+
+class Lexicons:
+    """One compiled, read-only lexicon version
+
+    Lists under 'languages' compile into one Lexicons per language, matched
+    together with the English lists on the language's match form (phase 3
+    normalization; accent-folded for Latin scripts); for_language() picks one.
+    """
+
+    def __init__(self, data, base=None, language=DEFAULT_LANGUAGE):
+        self.version = data.get('version', base.version if base is not None else 0)
+        self.language = language
+        groups = {group: [match_form(word, language) for word in words] for group, words in data.get('groups', {}).items()}
+        if base is not None:
+            for group, words in base.groups.items():
+                groups[group] = groups.get(group, []) + words
+        # A word listed twice (or shared with the English list) keeps its first position
+        self.groups = {group: list(dict.fromkeys(words)) for group, words in groups.items()}
+        # List position of each word, so match() sorts only what it found
+        self.rank = {group: {word: i for i, word in enumerate(words)} for group, words in self.groups.items()}
+        # Substring matching (whole_words=False) keeps the original `pattern in text` semantics
+        self.automaton = KeywordAutomaton(
+            [(word, group) for group, words in self.groups.items() for word in words],
+            whole_words=False
+        )
+        self.drug_patterns = base.drug_patterns if base is not None else \
+            [re.compile(pattern, re.IGNORECASE) for pattern in data.get('drug_patterns', [])]
+        self.languages = {code: Lexicons(spec, self, code) for code, spec in data.get('languages', {}).items()} \
+            if base is None else {}
+
+    def for_language(self, language):
+        """Lexicons for claims in a language (the English lists if it has none of its own)"""
+        return self.languages.get(language, self)
+
+    def match(self, text):
+        """Matched words per group, each in its list order"""
+        text = match_form(text, self.language)
+        found = {group: set() for group in self.groups}
+        for _, _, word, group in self.automaton.finditer(text):
+            found[group].add(word)
+        return {group: sorted(words, key=self.rank[group].__getitem__) for group, words in found.items()}
+
+    def contains_any(self, text, group):
+        """True if any word of the group occurs in the text"""
+        text = match_form(text, self.language)
+        return any(matched_group == group for _, _, _, matched_group in self.automaton.finditer(text))
+
+class LexiconStore:
+    """Directory of versioned lexicon files; the highest version is active"""
+
+    def __init__(self, directory=LEXICON_DIR, poll_interval=POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.current = None
+        self.failed = set()
+        self.watcher_pid = None
+        self.start_lock = threading.Lock()
+        self.reload()
+
+    def latest(self):
+        """(version, path) of the newest lexicon file, or (None, None)"""
+        best = (None, None)
+        for entry in os.scandir(self.directory):
+            match = LEXICON_FILE_RE.match(entry.name)
+            if match and (best[0] is None or int(match.group(1)) > best[0]):
+                best = (int(match.group(1)), entry.path)
+        return best
+
+    def reload(self):
+        """Compile the newest version if it is not active yet; True if a new version was swapped in"""
+        version, path = self.latest()
+        if version is None or version in self.failed:
+            return False
+        if self.current is not None and version <= self.current.version:
+            return False
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            data.setdefault('version', version)
+            lexicons = Lexicons(data)
+        except (OSError, ValueError, re.error) as e:
+            # Reported once; the active version keeps serving
+            self.failed.add(version)
+            print(f"⚠️ Lexicon version {version} rejected: {e}")
+            return False
+        # The swap: one assignment, visible to the next snapshot() call
+        self.current = lexicons
+        return True
+
+    def snapshot(self):
+        """Active lexicons; hold on to the returned object for the whole request"""
+        if self.watcher_pid != os.getpid():
+            self._start_watcher()
+        return self.current
+
+    def _start_watcher(self):
+        # Threads do not survive fork, so each (pre-forked or pool) process runs its own
+        with self.start_lock:
+            if self.watcher_pid == os.getpid():
+                return
+            self.watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name='lexicon-watcher', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self.reload():
+                    print(f"🔁 Lexicons version {self.current.version} active (pid {os.getpid()})")
+            except OSError as e:
+                print(f"⚠️ Lexicon watcher: {e}")
+
+    def publish(self, data):
+        """Write data as the next version (atomically) and return its number"""
+        version, _ = self.latest()
+        version = (version or 0) + 1
+        data = dict(data, version=version)
+        path = os.path.join(self.directory, f"lexicons-{version}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, path)
+        return version
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_lexicon_store():
+    """Process-wide lexicon store, loaded on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LexiconStore()
+        return _store
+
+def get_lexicons():
+    """Snapshot of the active lexicons"""
+    return get_lexicon_store().snapshot()
+
+def lexicon_version():
+    """Version number of the active lexicons"""
+    return get_lexicons().version
+
+if __name__ == "__main__":
+    # Test the module: publish a new version while readers keep matching
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    shutil.copy(os.path.join(LEXICON_DIR, 'lexicons-1.json'), directory)
+    store = LexiconStore(directory, poll_interval=0.05)
+    text = "Colloidal silver cures everything and doctors don't want you to know"
+
+    # One reader thread stands in for request handling; lookups are grouped by
+    # phase so a reload shows up as a stall if it ever blocked readers
+    timings = {'before': [], 'reloading': [], 'after': []}
+    phase = ['before']
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            lexicons = store.snapshot()
+            lexicons.match(text)
+            current_phase = 'after' if lexicons.version > 1 else phase[0]
+            timings[current_phase].append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.5)
+
+    with open(os.path.join(directory, 'lexicons-1.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    data['groups']['medium_risk'].append('colloidal silver')
+    data['groups']['high_risk'].extend(f"synthetic pattern {i}" for i in range(5000))
+    phase[0] = 'reloading'
+    print(f"📚 Published version {store.publish(data)} with {sum(len(w) for w in data['groups'].values())} patterns")
+    while store.current.version == 1:
+        time.sleep(0.01)
+    time.sleep(0.5)
+    stop.set()
+    thread.join()
+
+    print(f"   medium-risk matches now: {store.snapshot().match(text)['medium_risk']}")
+    for name, samples in timings.items():
+        samples.sort()
+        if samples:
+            print(f"   {name:9s}: {len(samples):6d} lookups, p50 {samples[len(samples) // 2] * 1e6:5.0f} µs, "
+                  f"p99 {samples[int(len(samples) * 0.99)] * 1e6:5.0f} µs, max {samples[-1] * 1e3:5.1f} ms")
+    shutil.rmtree(directory)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Medical Types
+Slotted Source, DetectionResult and VerificationResult records that replace the
+per-request dicts passed between phases
+
+Records keep the dict interface the phases already use (record['url'],
+record.get('reliability'), record['rank_score'] = ..., dict(record)), so they can
+be introduced one producer at a time. Fields live in __slots__ (no per-instance
+__dict__), repeated strings such as source names and verdicts are interned, and
+keys not declared as fields go to a small overflow dict created only when needed.
+"""
+
+import json
+import sys
+from json.encoder import encode_basestring_ascii
+
+_MISSING = object()
+
+class Record:
+    """dict-compatible base for slotted records
+
+    Subclasses list their fields in FIELDS (also their __slots__); fields in
+    OPTIONAL are omitted from keys() while they are None, so e.g. a Source has
+    no 'rank_score' key until ranking sets one.
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    OPTIONAL = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        # Pre-encoded '"key": ' fragments for to_json()
+        cls._JSON_KEYS = {name: encode_basestring_ascii(name) + ': ' for name in cls.FIELDS}
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is None and key in self.OPTIONAL:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        names = [name for name in self.FIELDS if name not in self.OPTIONAL or getattr(self, name) is not None]
+        if self._extra:
+            names.extend(self._extra)
+        return names
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def update(self, other=(), **fields):
+        for key, value in dict(other, **fields).items():
+            self[key] = value
+
+    def copy(self):
+        clone = object.__new__(type(self))
+        for name in self.FIELDS:
+            setattr(clone, name, getattr(self, name))
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def to_json(self):
+        """JSON text of the record; field keys are pre-encoded and strings use the C encoder"""
+        parts = []
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is None and name in self.OPTIONAL:
+                continue
+            if type(value) is str:
+                parts.append(self._JSON_KEYS[name] + encode_basestring_ascii(value))
+            else:
+                parts.append(self._JSON_KEYS[name] + json.dumps(value, default=json_default))
+        if self._extra:
+            for key, value in self._extra.items():
+                parts.append(encode_basestring_ascii(key) + ': ' + json.dumps(value, default=json_default))
+        return '{' + ', '.join(parts) + '}'
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+def json_default(obj):
+    """json.dumps(..., default=json_default) support for records"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class Source(Record):
+    """A consulted source (phase 5)"""
+
+    FIELDS = ('title', 'source', 'url', 'summary', 'type', 'reliability', 'relevance_score', 'rank_score')
+    OPTIONAL = frozenset(('relevance_score', 'rank_score'))
+    __slots__ = FIELDS
+
+    def __init__(self, title, source, url, summary, type='research', reliability=0.0, **extra):
+        self.title = title
+        self.source = sys.intern(source)
+        self.url = url
+        self.summary = summary
+        self.type = sys.intern(type)
+        self.reliability = reliability
+        self.relevance_score = None
+        self.rank_score = None
+        self._extra = extra or None
+
+class DetectionResult(Record):
+    """Phase 4 misinformation analysis"""
+
+    FIELDS = ('verdict', 'confidence', 'risk_level', 'reasoning', 'medical_entities', 'action_needed')
+    __slots__ = FIELDS
+
+    def __init__(self, verdict, confidence, risk_level, reasoning, medical_entities=(), action_needed='', **extra):
+        self.verdict = sys.intern(verdict)
+        self.confidence = confidence
+        self.risk_level = sys.intern(risk_level)
+        self.reasoning = reasoning
+        self.medical_entities = list(medical_entities)
+        self.action_needed = action_needed
+        self._extra = extra or None
+
+class VerificationResult(Record):
+    """Extension-facing verification result (backends)"""
+
+    FIELDS = ('status', 'corrected_fact', 'explanation', 'source_links', 'confidence', 'risk_level')
+    OPTIONAL = frozenset(('confidence', 'risk_level'))
+    __slots__ = FIELDS
+
+    def __init__(self, status, corrected_fact, explanation, source_links, confidence=None, risk_level=None, **extra):
+        self.status = sys.intern(status)
+        self.corrected_fact = corrected_fact
+        self.explanation = explanation
+        self.source_links = source_links
+        self.confidence = confidence
+        self.risk_level = sys.intern(risk_level) if risk_level else None
+        self._extra = extra or None
+
+if __name__ == "__main__":
+    # Memory benchmark: a 1M-entry cache of sources as dicts vs slotted records
+    import gc
+    import time
+    import tracemalloc
+
+    COUNT = 1_000_000
+    summary = 'National Institutes of Health peer-reviewed research'
+
+    def build_dicts():
+        return [{
+            'title': f"NIH Research on claim {i}",
+            'source': 'NIH',
+            'url': f"https://medlineplus.gov/topic{i % 250}.html",
+            'summary': summary,
+            'type': 'research',
+            'reliability': 0.96
+        } for i in range(COUNT)]
+
+    def build_records():
+        return [Source(f"NIH Research on claim {i}", 'NIH', f"https://medlineplus.gov/topic{i % 250}.html",
+                       summary, 'research', 0.96) for i in range(COUNT)]
+
+    for label, build in (('dict', build_dicts), ('Source', build_records)):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        items = build()
+        elapsed = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {label:7s}: {current / COUNT:6.1f} bytes/entry, {current / 2 ** 20:6.1f} MB total, built in {elapsed:.2f}s")
+
+        start = time.perf_counter()
+        for item in items[:100_000]:
+            json.dumps(item, default=json_default)
+        print(f"           json.dumps: {(time.perf_counter() - start) * 10:.2f} µs/entry", end='')
+        if label == 'Source':
+            start = time.perf_counter()
+            for item in items[:100_000]:
+                item.to_json()
+            print(f", to_json: {(time.perf_counter() - start) * 10:.2f} µs/entry", end='')
+        print()
+        del items
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Incremental Page Scanning
+Verdicts for a page's text blocks, cached per block hash, so revisiting or
+scrolling a long article or feed only processes blocks not seen before
+
+Blocks are identified by the FNV-1a 64-bit hash of their normalized text
+(whitespace collapsed, lowercased), which the extension computes the same way.
+A block sent without text is answered from the cache, or listed as unknown so
+the client resends it with its text.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from rule_engine import classify
+
+MIN_BLOCK_CHARS = 40        # shorter blocks (menus, captions, buttons) are ignored
+MAX_BLOCK_CHARS = 2000      # longer blocks are verified on their first part
+MAX_BLOCKS_PER_SCAN = 200
+BLOCK_CACHE_SIZE = 50000
+BLOCK_TTL = 6 * 3600
+
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = (1 << 64) - 1
+
+def normalize_block(text):
+    """Whitespace-collapsed, lowercased block text (what the block hash covers)"""
+    return ' '.join(text.split()).lower()
+
+def block_hash(text):
+    """16-hex-digit FNV-1a 64 hash of the normalized block's UTF-8 bytes"""
+    h = FNV_OFFSET
+    for byte in normalize_block(text).encode('utf-8'):
+        h = ((h ^ byte) * FNV_PRIME) & MASK_64
+    return f"{h:016x}"
+
+class BlockCache:
+    """LRU of block hash -> compact verdict, with a TTL per entry"""
+
+    def __init__(self, max_entries=BLOCK_CACHE_SIZE, ttl=BLOCK_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, verdict):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, verdict)
+            self.entries.move_to_end(key)
+            self.stats['stores'] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries))
+
+def scan_blocks(blocks, verify, cache, version=None):
+    """Verdicts for the blocks not yet in the cache; returns (results, unknown ids, counts)
+
+    blocks: [{'hash': id, 'text': optional text}]. verify(text) -> (result, info)
+    runs only for new blocks that mention health topics (any classification
+    rule tier); degraded answers are returned but not cached, so a later scan
+    can still get the full verdict. Entries cached under another version
+    (rules or lexicons changed since) count as misses.
+    """
+    results = []
+    unknown = []
+    counts = {'new': 0, 'cached': 0, 'ignored': 0}
+    for block in blocks[:MAX_BLOCKS_PER_SCAN]:
+        block_id = str(block.get('hash') or '')
+        text = block.get('text') or ''
+        # Look up by the client's hash: a client lying about it only misleads itself
+        verdict = cache.get(block_id) if block_id else None
+        if verdict is not None and verdict.get('cache_version') != version:
+            verdict = None
+        if verdict is None and not text:
+            if block_id:
+                unknown.append(block_id)
+            continue
+        if verdict is not None:
+            counts['cached'] += 1
+        else:
+            # Stored only under the hash of the text actually verified
+            key = block_hash(text)
+            text = normalize_block(text)
+            if len(text) < MIN_BLOCK_CHARS:
+                counts['ignored'] += 1
+                continue
+            text = text[:MAX_BLOCK_CHARS]
+            counts['new'] += 1
+            if classify(text).name == 'general':
+                verdict = {'health': False, 'cache_version': version}
+                degraded = False
+            else:
+                result, info = verify(text)
+                degraded = info['degraded']
+                verdict = {
+                    'health': True,
+                    'status': result['status'],
+                    'corrected_fact': result['corrected_fact'],
+                    'explanation': result['explanation'],
+                    'source_links': result['source_links'],
+                    'degraded': degraded,
+                    'cache_version': version
+                }
+            if not degraded:
+                cache.put(key, verdict)
+        results.append(dict(verdict, hash=block_id or key))
+    return results, unknown, counts
+
+if __name__ == "__main__":
+    # Test the module: a first view, a scroll that adds blocks, and a revisit
+    import random
+
+    random.seed(7)
+    health = ["Drinking bleach cures COVID-19 and doctors hide it from you",
+              "This herbal remedy boosts immunity better than any vaccine",
+              "Regular exercise and a balanced diet lower blood pressure"]
+    filler = ["The city council met on Tuesday to discuss the new bus timetable for the autumn season",
+              "Our reporters spoke with residents about the renovated library and its longer opening hours"]
+    feed = [f"{random.choice(health + filler * 3)} (post {i})" for i in range(600)]
+
+    calls = []
+
+    def verify(text):
+        calls.append(text)
+        time.sleep(0.002)  # stand-in for the verification pipeline
+        return {'status': 'caution', 'corrected_fact': '...', 'explanation': '...', 'source_links': []}, {'degraded': False}
+
+    cache = BlockCache()
+    seen = set()
+    for label, visible in [('first view', 100), ('scrolled', 200), ('scrolled', 300), ('revisit', 300)]:
+        if label == 'revisit':
+            seen.clear()  # new page view: the client forgot, the server did not
+        blocks = [{'hash': block_hash(text), 'text': text} for text in feed[:visible]]
+        new_blocks = [block for block in blocks if block['hash'] not in seen]
+        seen.update(block['hash'] for block in new_blocks)
+        calls.clear()
+        start = time.perf_counter()
+        counts = {'new': 0, 'cached': 0, 'ignored': 0}
+        for i in range(0, len(new_blocks), MAX_BLOCKS_PER_SCAN):
+            _, _, chunk_counts = scan_blocks(new_blocks[i:i + MAX_BLOCKS_PER_SCAN], verify, cache)
+            counts = {name: counts[name] + chunk_counts[name] for name in counts}
+        print(f"  {label:10s} {visible:3d} blocks on page, {len(new_blocks):3d} sent: {counts}, "
+              f"{len(calls)} verified, {(time.perf_counter() - start) * 1000:6.1f} ms")
+    print(f"📊 {cache.get_stats()}")
+
+    start = time.perf_counter()
+    for text in feed:
+        block_hash(text)
+    print(f"⚡ block_hash: {(time.perf_counter() - start) * 1e6 / len(feed):.1f} µs per {len(feed[0])}-char block")
@@ -4,9 +4,20 @@ Phase 2: Content Retrieval
 Extracts content from URLs, processes articles, messages
 """
 
+import re
 import requests
 from urllib.parse import urlparse
 
+from cpu_pool import run_cpu
+
+# Compiled once per process (and preloaded in CPU pool workers)
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+_STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile('<[^<]+?>')
+_SPACE_RE = re.compile(r'\s+')
+_SPECIAL_RE = re.compile(r'[^\w\s.,!?;:()\-\'"]+')
+CODE_MARKERS = ('javascript', 'script', 'function', 'var ', 'window.', 'document.')
+
 def retrieve_content(input_data):
     """Retrieve and process content based on input type"""
     print("🔍 Phase 2: Content Analysis...")
@@ -35,39 +46,8 @@ def extract_from_url(url):
         response = requests.get(url, headers=headers, timeout=15)
         
         if response.status_code == 200:
-            # Simple text extraction (would use BeautifulSoup in production)
-            content = response.text
-            
-            # Extract title (simple method)
-            title_start = content.find('<title>')
-            title_end = content.find('</title>')
-            if title_start != -1 and title_end != -1:
-                title = content[title_start+7:title_end].strip()
-            else:
-                title = "Web Article"
-            
-            # Simple content extraction (remove HTML tags)
-            import re
-            
-            # Remove script and style tags completely
-            content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            
-            # Remove HTML tags
-            text_content = re.sub('<[^<]+?>', '', content)
-            
-            # Clean up whitespace and special characters
-            text_content = re.sub(r'\s+', ' ', text_content).strip()
-            text_content = re.sub(r'[^\w\s.,!?;:()\-\'"]+', ' ', text_content)
-            
-            # Try to extract main content (look for common content indicators)
-            paragraphs = text_content.split('.')
-            meaningful_paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > 50 and not any(keyword in p.lower() for keyword in ['javascript', 'script', 'function', 'var ', 'window.', 'document.'])]
-            
-            if meaningful_paragraphs:
-                clean_content = '. '.join(meaningful_paragraphs[:10])  # Take first 10 meaningful paragraphs
-            else:
-                clean_content = text_content[:1000]  # Fallback to first 1000 chars
+            # HTML cleaning is CPU-bound; large pages go to the worker pool
+            title, clean_content = run_cpu(clean_html, response.text)
             
             return {
                 'type': 'url',
@@ -96,6 +76,38 @@ def extract_from_url(url):
             'url': url
         }
 
+def clean_html(html):
+    """Title and main text of an HTML page (pure function, safe to run in a worker process)"""
+    # Extract title (simple method)
+    title_start = html.find('<title>')
+    title_end = html.find('</title>')
+    if title_start != -1 and title_end != -1:
+        title = html[title_start+7:title_end].strip()
+    else:
+        title = "Web Article"
+    
+    # Remove script and style tags completely
+    content = _SCRIPT_RE.sub('', html)
+    content = _STYLE_RE.sub('', content)
+    
+    # Remove HTML tags
+    text_content = _TAG_RE.sub('', content)
+    
+    # Clean up whitespace and special characters
+    text_content = _SPACE_RE.sub(' ', text_content).strip()
+    text_content = _SPECIAL_RE.sub(' ', text_content)
+    
+    # Try to extract main content (look for common content indicators)
+    paragraphs = text_content.split('.')
+    meaningful_paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > 50 and not any(keyword in p.lower() for keyword in CODE_MARKERS)]
+    
+    if meaningful_paragraphs:
+        clean_content = '. '.join(meaningful_paragraphs[:10])  # Take first 10 meaningful paragraphs
+    else:
+        clean_content = text_content[:1000]  # Fallback to first 1000 chars
+    
+    return title, clean_content
+
 def process_forwarded_message(content):
     """Process forwarded message content"""
     # Clean forwarded message indicators
@@ -4,18 +4,59 @@ Phase 4: Misinformation Detection
 AI-powered detection using Groq and pattern matching
 """
 
-import json
 import requests
 from config import GROQ_API_KEY, GROQ_ENDPOINT, GROQ_MODEL
+from prompt_budget import build_detection_prompt, format_prompt_stats
+from lexicon_store import get_lexicons
+from phase3_nlp_preprocessing import detect_language
+from medical_types import DetectionResult
+from fast_json import extract_json
+
+try:
+    from claim_index import find_similar_claims, format_neighbor_evidence, is_direct_match
+except ImportError:
+    print("⚠️ Claim similarity index unavailable (numpy not installed)")
+    find_similar_claims = None
+
+def warm_up():
+    """Compile the active lexicons now, so the first request (or CPU pool task) does not pay for it"""
+    get_lexicons()
+
+def match_patterns(text, lexicons=None):
+    """Matched patterns per lexicon group (high_risk, medium_risk, positive, credibility_*), each in list order"""
+    return (lexicons or get_lexicons()).match(text)
 
 def detect_misinformation(text, context=None):
     """Main misinformation detection function"""
     print("🚨 Phase 4: Enhanced Misinformation Detection (Groq AI)...")
     
+    # Check previously verified claims first
+    if find_similar_claims is not None:
+        neighbors = find_similar_claims(text)
+        # Near matches with different negations ("does not cure") are evidence, never answers
+        if neighbors and is_direct_match(text, neighbors[0]):
+            prior = neighbors[0]
+            print(f"♻️ Matched a verified claim (similarity {prior['similarity']:.2f}): {prior['verdict'].upper()}")
+            return DetectionResult(
+                verdict=prior['verdict'],
+                confidence=prior['confidence'],
+                risk_level=prior['risk_level'],
+                reasoning=prior['reasoning'],
+                medical_entities=prior['medical_entities'],
+                action_needed=prior['action_needed'],
+                similar_claim=prior['claim'],
+                detection_source='claim_index'
+            )
+        if neighbors:
+            print(f"📎 Adding {len(neighbors)} similar verified claims as evidence")
+            evidence = format_neighbor_evidence(neighbors)
+            context = f"{context}\n{evidence}" if context else evidence
+    
     # Try AI detection first
     ai_analysis = groq_misinformation_detection(text, context)
     
     if ai_analysis:
+        ai_analysis['detection_source'] = 'groq'
         verdict = ai_analysis.get('verdict', 'uncertain')
         confidence = ai_analysis.get('confidence', 0.5)
         risk_level = ai_analysis.get('risk_level', 'medium')
@@ -39,41 +80,15 @@ def detect_misinformation(text, context=None):
     else:
         # Fallback to pattern matching
         print("⚠️ AI detection unavailable, using pattern matching...")
-        return pattern_based_detection(text)
+        result = pattern_based_detection(text)
+        result['detection_source'] = 'patterns'
+        return result
 
 def groq_misinformation_detection(text, context=None):
     """AI-powered misinformation detection using Groq"""
     try:
-        context_info = f"\nContext: {context}" if context else ""
-        
-        prompt = f"""
-You are a medical expert AI analyzing health information for potential misinformation.
-
-Text to analyze: "{text}"{context_info}
-
-Provide analysis in this exact JSON format:
-{{
-    "verdict": "misinformation|potential_misinformation|likely_accurate|uncertain",
-    "confidence": 0.0-1.0,
-    "risk_level": "low|medium|high|critical",
-    "reasoning": "Brief explanation of why this verdict was reached",
-    "medical_entities": ["list", "of", "medical", "terms", "found"],
-    "action_needed": "specific recommended action for users"
-}}
-
-Focus on:
-- Dangerous medical advice that could harm people
-- False claims about treatments, cures, or prevention
-- Conspiracy theories about health organizations or vaccines
-- Unproven miracle cures or treatments
-- Misinformation about established medical science
-
-Be especially careful about claims that:
-- Promise instant or miracle cures
-- Contradict established medical consensus
-- Discourage people from seeking proper medical care
-- Promote dangerous substances or practices
-"""
+        prompt, prompt_stats = build_detection_prompt(text, context, model=GROQ_MODEL)
+        print(format_prompt_stats(prompt_stats))
         
         headers = {
             "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -94,15 +109,12 @@ Be especially careful about claims that:
             content = result['choices'][0]['message']['content']
             
             # Extract JSON from response
-            try:
-                json_start = content.find('{')
-                json_end = content.rfind('}') + 1
-                json_str = content[json_start:json_end]
-                analysis = json.loads(json_str)
-                return analysis
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"⚠️ JSON parsing error: {e}")
+            analysis = extract_json(content)
+            if analysis is None:
+                print("⚠️ JSON parsing error: no JSON object in response")
                 return None
+            analysis['prompt_tokens'] = prompt_stats['prompt_tokens']
+            return analysis
         else:
             print(f"⚠️ Groq API error: {response.status_code}")
             return None
@@ -112,100 +124,67 @@ Be especially careful about claims that:
         return None
 
 def pattern_based_detection(text):
-    """Fallback pattern-based misinformation detection"""
-    # Dangerous misinformation patterns
-    high_risk_patterns = [
-        'cure cancer', 'cure covid', 'cure diabetes', 'cure aids', 'cure hiv',
-        'miracle cure', 'instant cure', 'natural cure for cancer',
-        'vaccines cause autism', 'vaccines are dangerous', 'vaccines kill',
-        'big pharma conspiracy', 'government conspiracy', 'medical conspiracy',
-        'drink bleach', 'inject bleach', 'hydrogen peroxide cure',
-        'essential oils cure cancer', 'homeopathy cures',
-        'covid is fake', 'covid hoax', 'pandemic hoax',
-        'microchips in vaccines', '5g causes covid', 'bill gates microchip'
-    ]
-    
-    # Medium risk patterns
-    medium_risk_patterns = [
-        'doctors don\'t want you to know', 'medical industry hiding',
-        'natural alternative to', 'big pharma doesn\'t want',
-        'government hiding cure', 'suppress this information',
-        'detox removes toxins', 'alkaline water cures',
-        'colloidal silver cures', 'vitamin c cures covid'
-    ]
-    
-    # Positive health patterns (likely accurate)
-    positive_patterns = [
-        'consult your doctor', 'seek medical advice', 'talk to healthcare provider',
-        'clinical trials show', 'peer reviewed study', 'medical research',
-        'fda approved', 'who recommends', 'cdc guidelines',
-        'exercise regularly', 'balanced diet', 'healthy lifestyle'
-    ]
-    
-    text_lower = text.lower()
-    
-    # Count pattern matches
-    high_risk_matches = [pattern for pattern in high_risk_patterns if pattern in text_lower]
-    medium_risk_matches = [pattern for pattern in medium_risk_patterns if pattern in text_lower]
-    positive_matches = [pattern for pattern in positive_patterns if pattern in text_lower]
+    """Fallback pattern-based misinformation detection, with the patterns of the claim's language"""
+    language = detect_language(text)
+    lexicons = get_lexicons().for_language(language)
+    matches = match_patterns(text, lexicons)
+    high_risk_matches = matches['high_risk']
+    medium_risk_matches = matches['medium_risk']
+    positive_matches = matches['positive']
     
     # Determine verdict based on pattern matches
     if len(high_risk_matches) >= 1:
-        return {
-            'verdict': 'misinformation',
-            'confidence': 0.85,
-            'risk_level': 'critical',
-            'reasoning': f'Contains dangerous misinformation patterns: {", ".join(high_risk_matches)}',
-            'medical_entities': high_risk_matches,
-            'action_needed': 'Do not follow this advice. Consult healthcare professionals immediately.'
-        }
+        return DetectionResult(
+            verdict='misinformation',
+            confidence=0.85,
+            risk_level='critical',
+            reasoning=f'Contains dangerous misinformation patterns: {", ".join(high_risk_matches)}',
+            medical_entities=high_risk_matches,
+            action_needed='Do not follow this advice. Consult healthcare professionals immediately.',
+            lexicon_version=lexicons.version,
+            language=language
+        )
     elif len(medium_risk_matches) >= 2:
-        return {
-            'verdict': 'potential_misinformation',
-            'confidence': 0.70,
-            'risk_level': 'high',
-            'reasoning': f'Contains suspicious patterns: {", ".join(medium_risk_matches)}',
-            'medical_entities': medium_risk_matches,
-            'action_needed': 'Verify with trusted medical sources before acting on this information.'
-        }
+        return DetectionResult(
+            verdict='potential_misinformation',
+            confidence=0.70,
+            risk_level='high',
+            reasoning=f'Contains suspicious patterns: {", ".join(medium_risk_matches)}',
+            medical_entities=medium_risk_matches,
+            action_needed='Verify with trusted medical sources before acting on this information.',
+            lexicon_version=lexicons.version,
+            language=language
+        )
     elif len(positive_matches) >= 2:
-        return {
-            'verdict': 'likely_accurate',
-            'confidence': 0.75,
-            'risk_level': 'low',
-            'reasoning': f'Contains positive medical guidance patterns: {", ".join(positive_matches)}',
-            'medical_entities': positive_matches,
-            'action_needed': 'Information appears reasonable, but still consult healthcare professionals.'
-        }
+        return DetectionResult(
+            verdict='likely_accurate',
+            confidence=0.75,
+            risk_level='low',
+            reasoning=f'Contains positive medical guidance patterns: {", ".join(positive_matches)}',
+            medical_entities=positive_matches,
+            action_needed='Information appears reasonable, but still consult healthcare professionals.',
+            lexicon_version=lexicons.version,
+            language=language
+        )
     else:
-        return {
-            'verdict': 'uncertain',
-            'confidence': 0.50,
-            'risk_level': 'medium',
-            'reasoning': 'No clear misinformation or positive patterns detected',
-            'medical_entities': [],
-            'action_needed': 'Verify information with qualified healthcare professionals.'
-        }
+        return DetectionResult(
+            verdict='uncertain',
+            confidence=0.50,
+            risk_level='medium',
+            reasoning='No clear misinformation or positive patterns detected',
+            medical_entities=[],
+            action_needed='Verify information with qualified healthcare professionals.',
+            lexicon_version=lexicons.version,
+            language=language
+        )
 
 def assess_claim_credibility(text):
     """Assess the credibility of health claims"""
-    credibility_indicators = {
-        'positive': [
-            'clinical trial', 'peer reviewed', 'published study', 'medical journal',
-            'fda approved', 'who guideline', 'cdc recommendation', 'medical consensus',
-            'evidence based', 'scientific study', 'research shows', 'meta analysis'
-        ],
-        'negative': [
-            'secret cure', 'doctors hate', 'suppressed by', 'hidden truth',
-            'miracle cure', 'instant results', 'no side effects', 'works 100%',
-            'ancient remedy', 'natural cure', 'big pharma conspiracy', 'government cover up'
-        ]
-    }
-    
-    text_lower = text.lower()
-    
-    positive_score = sum(1 for indicator in credibility_indicators['positive'] if indicator in text_lower)
-    negative_score = sum(1 for indicator in credibility_indicators['negative'] if indicator in text_lower)
+    language = detect_language(text)
+    lexicons = get_lexicons().for_language(language)
+    matches = match_patterns(text, lexicons)
+    positive_score = len(matches['credibility_positive'])
+    negative_score = len(matches['credibility_negative'])
     
     if positive_score > negative_score:
         credibility = 'high'
@@ -217,7 +196,9 @@ def assess_claim_credibility(text):
     return {
         'credibility': credibility,
         'positive_indicators': positive_score,
-        'negative_indicators': negative_score
+        'negative_indicators': negative_score,
+        'lexicon_version': lexicons.version,
+        'language': language
     }
 
 if __name__ == "__main__":
@@ -227,7 +208,9 @@ if __name__ == "__main__":
         "Regular exercise and a balanced diet help prevent heart disease",
         "Essential oils can cure cancer naturally without any side effects",
         "Consult your doctor before taking any new medication",
-        "Drinking bleach can cure COVID-19 instantly"
+        "Drinking bleach can cure COVID-19 instantly",
+        "Tomar lejía cura el covid y los médicos no quieren que sepas",
+        "गर्म पानी में नींबू पीने से कैंसर ठीक हो जाता है"
     ]
     
     for i, text in enumerate(test_cases, 1):
@@ -5,29 +5,35 @@ Search and retrieve information from authoritative medical sources
 Enhanced with Drug Safety Database Integration
 """
 
-import requests
 import json
 import re
+import heapq
 from config import GROQ_API_KEY
+from upstream_rate_limiter import rate_limited_get, coalesce
+from pubmed_cache import cached_search, cached_articles, is_search_cached
+from pubmed_mirror import search_local_pubmed
+from source_ranking import score_sources, order_sources
+from prompt_budget import reliability_score
+from authority_index import authoritative_sources
+from medical_types import Source
+from lexicon_store import get_lexicons
+from source_providers import Provider, register_provider, gather_sources
 
-def retrieve_trusted_sources(query, max_results=5):
-    """Main function to retrieve information from trusted medical sources"""
+def retrieve_trusted_sources(query, max_results=5, budget=None):
+    """Main function to retrieve information from trusted medical sources
+
+    Providers (drug safety, PubMed mirror, PubMed, health organizations, medical
+    databases) are scheduled by source_providers within the latency/cost budget.
+    """
     print("🔬 Phase 5: Comprehensive Medical Research...")
     
-    all_sources = []
-    
-    # Check if query is drug-related and add drug safety information
-    drug_info = check_drug_safety(query)
-    if drug_info:
-        all_sources.extend(drug_info)
-    
-    # Search PubMed for research articles
-    pubmed_sources = search_pubmed(query, max_results=3)
-    all_sources.extend(pubmed_sources)
+    all_sources, plan = gather_sources(query, budget)
+    skipped = [f"{step['provider']} ({step['skipped'].replace('_', ' ')})" for step in plan if 'skipped' in step]
+    if skipped:
+        print(f"⏭️ Skipped: {', '.join(skipped)}")
     
-    # Add authoritative organization sources
-    org_sources = get_authoritative_sources(query)
-    all_sources.extend(org_sources)
+    # Best sources first, so the top three passed to Gemini are the most relevant and reliable
+    all_sources = order_sources(all_sources, query, k=3)
     
     # Count source types
     research_count = len([s for s in all_sources if s.get('type') == 'research'])
@@ -89,32 +95,18 @@ def check_drug_safety(query):
 def extract_drug_names(query):
     """Extract potential drug names from the query using pattern matching"""
     
-    # Common drug name patterns and suffixes
-    drug_patterns = [
-        r'\b\w*(cillin|mycin|sulfa|thiazide|pril|sartan|statin|ine|ol|ide)\b',  # Common drug suffixes
-        r'\b(aspirin|ibuprofen|acetaminophen|paracetamol|warfarin|insulin|metformin)\b',  # Common drugs
-        r'\b\w*(virus|bacteria|infection)\s+(treatment|medication|drug|medicine)\b',  # Treatment context
-        r'\b(antibiotic|antiviral|painkiller|anti-inflammatory|blood\s+thinner)\b'  # Drug categories
-    ]
-    
-    # Known common drug names
-    common_drugs = [
-        'aspirin', 'ibuprofen', 'acetaminophen', 'paracetamol', 'insulin', 'metformin',
-        'warfarin', 'lisinopril', 'amlodipine', 'atorvastatin', 'simvastatin',
-        'omeprazole', 'levothyroxine', 'albuterol', 'furosemide', 'hydrochlorothiazide'
-    ]
-    
+    # Drug names and patterns come from the active lexicon version
+    lexicons = get_lexicons()
     found_drugs = []
     query_lower = query.lower()
     
     # Check for exact matches of common drugs
-    for drug in common_drugs:
-        if drug in query_lower:
-            found_drugs.append(drug.title())
+    for drug in lexicons.match(query_lower)['drug_names']:
+        found_drugs.append(drug.title())
     
     # Check for pattern matches
-    for pattern in drug_patterns:
-        matches = re.findall(pattern, query_lower, re.IGNORECASE)
+    for pattern in lexicons.drug_patterns:
+        matches = pattern.findall(query_lower)
         for match in matches:
             if isinstance(match, tuple):
                 match = match[0]  # Take first group if it's a tuple
@@ -136,34 +128,34 @@ def get_fda_drug_safety(drug_name):
     try:
         # FDA Orange Book (Approved Drug Products)
         orange_book_url = f"https://www.accessdata.fda.gov/scripts/cder/ob/search_product.cfm"
-        fda_sources.append({
-            'title': f"FDA Orange Book - {drug_name} Approval Information",
-            'source': 'FDA Orange Book',
-            'url': f"https://www.accessdata.fda.gov/scripts/cder/ob/search_product.cfm?Appl_Type=N&Appl_No=&Prod_Name={drug_name.replace(' ', '+')}&Active_Ingred=&Dosage_Form=&Strength=&Route=&Marketing_Status=&TECode=&Appl_Holder=&Generic_Avail=",
-            'summary': f'FDA-approved drug product information for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.98
-        })
+        fda_sources.append(Source(
+            title=f"FDA Orange Book - {drug_name} Approval Information",
+            source='FDA Orange Book',
+            url=f"https://www.accessdata.fda.gov/scripts/cder/ob/search_product.cfm?Appl_Type=N&Appl_No=&Prod_Name={drug_name.replace(' ', '+')}&Active_Ingred=&Dosage_Form=&Strength=&Route=&Marketing_Status=&TECode=&Appl_Holder=&Generic_Avail=",
+            summary=f'FDA-approved drug product information for {drug_name}',
+            type='drug_safety',
+            reliability=0.98
+        ))
         
         # FDA Drug Safety Communications
-        fda_sources.append({
-            'title': f"FDA Drug Safety Communications - {drug_name}",
-            'source': 'FDA Safety Communications',
-            'url': f"https://www.fda.gov/drugs/drug-safety-and-availability/drug-safety-communications?search={drug_name.replace(' ', '+')}",
-            'summary': f'FDA safety alerts and communications for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.97
-        })
+        fda_sources.append(Source(
+            title=f"FDA Drug Safety Communications - {drug_name}",
+            source='FDA Safety Communications',
+            url=f"https://www.fda.gov/drugs/drug-safety-and-availability/drug-safety-communications?search={drug_name.replace(' ', '+')}",
+            summary=f'FDA safety alerts and communications for {drug_name}',
+            type='drug_safety',
+            reliability=0.97
+        ))
         
         # FDA Adverse Event Reporting System (FAERS)
-        fda_sources.append({
-            'title': f"FAERS Database - {drug_name} Adverse Events",
-            'source': 'FDA FAERS',
-            'url': f"https://www.fda.gov/drugs/questions-and-answers-fdas-adverse-event-reporting-system-faers/fda-adverse-event-reporting-system-faers-latest-quarterly-data-files",
-            'summary': f'Adverse event reports for {drug_name} from FAERS database',
-            'type': 'drug_safety',
-            'reliability': 0.95
-        })
+        fda_sources.append(Source(
+            title=f"FAERS Database - {drug_name} Adverse Events",
+            source='FDA FAERS',
+            url=f"https://www.fda.gov/drugs/questions-and-answers-fdas-adverse-event-reporting-system-faers/fda-adverse-event-reporting-system-faers-latest-quarterly-data-files",
+            summary=f'Adverse event reports for {drug_name} from FAERS database',
+            type='drug_safety',
+            reliability=0.95
+        ))
         
     except Exception as e:
         print(f"Error getting FDA drug safety info: {e}")
@@ -176,24 +168,24 @@ def get_drugbank_info(drug_name):
     
     try:
         # DrugBank database
-        drugbank_sources.append({
-            'title': f"DrugBank - {drug_name} Drug Information",
-            'source': 'DrugBank',
-            'url': f"https://go.drugbank.com/drugs?utf8=%E2%9C%93&query={drug_name.replace(' ', '+')}&button=",
-            'summary': f'Comprehensive drug data including interactions, targets, and pharmacology for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.94
-        })
+        drugbank_sources.append(Source(
+            title=f"DrugBank - {drug_name} Drug Information",
+            source='DrugBank',
+            url=f"https://go.drugbank.com/drugs?utf8=%E2%9C%93&query={drug_name.replace(' ', '+')}&button=",
+            summary=f'Comprehensive drug data including interactions, targets, and pharmacology for {drug_name}',
+            type='drug_safety',
+            reliability=0.94
+        ))
         
         # Drugs.com safety information
-        drugbank_sources.append({
-            'title': f"Drugs.com - {drug_name} Safety Information",
-            'source': 'Drugs.com',
-            'url': f"https://www.drugs.com/search.php?searchterm={drug_name.replace(' ', '+')}",
-            'summary': f'Drug interactions, side effects, and safety information for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.90
-        })
+        drugbank_sources.append(Source(
+            title=f"Drugs.com - {drug_name} Safety Information",
+            source='Drugs.com',
+            url=f"https://www.drugs.com/search.php?searchterm={drug_name.replace(' ', '+')}",
+            summary=f'Drug interactions, side effects, and safety information for {drug_name}',
+            type='drug_safety',
+            reliability=0.90
+        ))
         
     except Exception as e:
         print(f"Error getting DrugBank info: {e}")
@@ -206,24 +198,24 @@ def analyze_drug_interactions(drug_name):
     
     try:
         # Drugs.com Interaction Checker
-        interaction_sources.append({
-            'title': f"Drug Interaction Checker - {drug_name}",
-            'source': 'Drugs.com Interactions',
-            'url': f"https://www.drugs.com/drug_interactions.php?generic_only=&trade_only=&drug_list_display={drug_name.replace(' ', '+')}&professional=1",
-            'summary': f'Comprehensive drug interaction checker for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.92
-        })
+        interaction_sources.append(Source(
+            title=f"Drug Interaction Checker - {drug_name}",
+            source='Drugs.com Interactions',
+            url=f"https://www.drugs.com/drug_interactions.php?generic_only=&trade_only=&drug_list_display={drug_name.replace(' ', '+')}&professional=1",
+            summary=f'Comprehensive drug interaction checker for {drug_name}',
+            type='drug_safety',
+            reliability=0.92
+        ))
         
         # WebMD Drug Interaction Checker
-        interaction_sources.append({
-            'title': f"WebMD Interaction Checker - {drug_name}",
-            'source': 'WebMD Interactions',
-            'url': f"https://www.webmd.com/interaction-checker/default.htm?drugname={drug_name.replace(' ', '+')}",
-            'summary': f'Drug interaction analysis for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.85
-        })
+        interaction_sources.append(Source(
+            title=f"WebMD Interaction Checker - {drug_name}",
+            source='WebMD Interactions',
+            url=f"https://www.webmd.com/interaction-checker/default.htm?drugname={drug_name.replace(' ', '+')}",
+            summary=f'Drug interaction analysis for {drug_name}',
+            type='drug_safety',
+            reliability=0.85
+        ))
         
     except Exception as e:
         print(f"Error analyzing drug interactions: {e}")
@@ -236,93 +228,71 @@ def get_adverse_event_reports(drug_name):
     
     try:
         # FDA Drug Recalls Database
-        adverse_event_sources.append({
-            'title': f"FDA Drug Recalls - {drug_name}",
-            'source': 'FDA Recalls',
-            'url': f"https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts?search={drug_name.replace(' ', '+')}",
-            'summary': f'FDA recalls and safety alerts for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.96
-        })
+        adverse_event_sources.append(Source(
+            title=f"FDA Drug Recalls - {drug_name}",
+            source='FDA Recalls',
+            url=f"https://www.fda.gov/safety/recalls-market-withdrawals-safety-alerts?search={drug_name.replace(' ', '+')}",
+            summary=f'FDA recalls and safety alerts for {drug_name}',
+            type='drug_safety',
+            reliability=0.96
+        ))
         
         # MedWatch Safety Information
-        adverse_event_sources.append({
-            'title': f"MedWatch Safety Alerts - {drug_name}",
-            'source': 'FDA MedWatch',
-            'url': f"https://www.fda.gov/safety/medwatch-fda-safety-information-and-adverse-event-reporting-program",
-            'summary': f'MedWatch safety information and adverse event reports for {drug_name}',
-            'type': 'drug_safety',
-            'reliability': 0.95
-        })
+        adverse_event_sources.append(Source(
+            title=f"MedWatch Safety Alerts - {drug_name}",
+            source='FDA MedWatch',
+            url=f"https://www.fda.gov/safety/medwatch-fda-safety-information-and-adverse-event-reporting-program",
+            summary=f'MedWatch safety information and adverse event reports for {drug_name}',
+            type='drug_safety',
+            reliability=0.95
+        ))
         
     except Exception as e:
         print(f"Error getting adverse event reports: {e}")
     
     return adverse_event_sources
 
-def search_pubmed(query, max_results=3):
-    """Search PubMed for peer-reviewed medical literature"""
+def search_pubmed(query, max_results=3, deadline=None):
+    """Search PubMed for peer-reviewed medical literature (giving up at the monotonic deadline)"""
+    # Concurrent searches for the same term share one set of E-utilities calls
+    articles = coalesce(('search_pubmed', query, max_results), lambda: _search_pubmed(query, max_results, deadline))
+    return [article.copy() for article in articles]
+
+PUBMED_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+
+def _search_pubmed(query, max_results, deadline=None):
+    """Resolve search_pubmed through the PubMed caches, calling E-utilities on misses"""
     try:
-        pubmed_base = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-        
-        # Search for article IDs
-        search_url = f"{pubmed_base}esearch.fcgi"
-        search_params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
-            'retmode': 'json',
-            'sort': 'relevance'
-        }
-        
-        response = requests.get(search_url, params=search_params, timeout=15)
-        if response.status_code != 200:
+        ids = cached_search(query, max_results, lambda: esearch_ids(query, max_results, deadline))
+        if not ids:
             return []
         
-        search_data = response.json()
-        if 'esearchresult' not in search_data or not search_data['esearchresult']['idlist']:
-            return []
-        
-        # Get article details
-        ids = search_data['esearchresult']['idlist']
-        fetch_url = f"{pubmed_base}esummary.fcgi"
-        fetch_params = {
-            'db': 'pubmed',
-            'id': ','.join(ids),
-            'retmode': 'json'
-        }
-        
-        response = requests.get(fetch_url, params=fetch_params, timeout=15)
-        if response.status_code != 200:
-            return []
-        
-        fetch_data = response.json()
+        records = cached_articles(ids, lambda pmids: esummary_records(pmids, deadline))
         
         articles = []
         for uid in ids:
-            if uid in fetch_data['result']:
-                article_data = fetch_data['result'][uid]
-                
+            record = records.get(uid)
+            if record:
                 # Get authors
-                authors_list = article_data.get('authors', [])
+                authors_list = record.get('authors', [])
                 if authors_list:
-                    first_author = authors_list[0].get('name', 'Unknown Author')
+                    first_author = authors_list[0]
                     authors_str = f"{first_author} et al." if len(authors_list) > 1 else first_author
                 else:
                     authors_str = "Unknown Authors"
                 
                 # Get publication year
-                pub_date = article_data.get('pubdate', 'Unknown Date')
+                pub_date = record.get('pubdate', 'Unknown Date')
                 
-                articles.append({
-                    'title': article_data.get('title', 'No title available'),
-                    'source': 'PubMed',
-                    'url': f"https://pubmed.ncbi.nlm.nih.gov/{uid}/",
-                    'summary': f"{authors_str} ({pub_date})",
-                    'type': 'research',
-                    'reliability': 0.95,
-                    'pmid': uid
-                })
+                articles.append(Source(
+                    title=record.get('title', 'No title available'),
+                    source='PubMed',
+                    url=f"https://pubmed.ncbi.nlm.nih.gov/{uid}/",
+                    summary=f"{authors_str} ({pub_date})",
+                    type='research',
+                    reliability=0.95,
+                    pmid=uid
+                ))
         
         return articles
         
@@ -330,165 +300,109 @@ def search_pubmed(query, max_results=3):
         print(f"PubMed search error: {e}")
         return []
 
-def get_authoritative_sources(query):
-    """Get information from authoritative health organizations"""
-    
-    # Topic-specific URL mappings
-    topic_urls = {
-        'vaccine': {
-            'WHO': 'https://www.who.int/news-room/questions-and-answers/item/vaccines-and-immunization',
-            'CDC': 'https://www.cdc.gov/vaccines/',
-            'FDA': 'https://www.fda.gov/vaccines-blood-biologics/vaccines',
-        },
-        'covid': {
-            'WHO': 'https://www.who.int/emergencies/diseases/novel-coronavirus-2019',
-            'CDC': 'https://www.cdc.gov/coronavirus/2019-ncov/',
-            'FDA': 'https://www.fda.gov/emergency-preparedness-and-response/coronavirus-disease-2019-covid-19',
-        },
-        'heart': {
-            'NIH': 'https://www.nhlbi.nih.gov/health/heart',
-            'CDC': 'https://www.cdc.gov/heartdisease/',
-            'WHO': 'https://www.who.int/news-room/fact-sheets/detail/cardiovascular-diseases-(cvds)',
-        },
-        'cancer': {
-            'NIH': 'https://www.cancer.gov/',
-            'CDC': 'https://www.cdc.gov/cancer/',
-            'WHO': 'https://www.who.int/news-room/fact-sheets/detail/cancer',
-        }
+def esearch_ids(query, max_results, deadline=None):
+    """PubMed esearch: list of PMIDs for a query (None on failure)"""
+    search_params = {
+        'db': 'pubmed',
+        'term': query,
+        'retmax': max_results,
+        'retmode': 'json',
+        'sort': 'relevance'
     }
     
-    def get_targeted_url(source, query):
-        """Get targeted URL based on medical topic"""
-        query_lower = query.lower()
-        
-        # Check for specific medical topics
-        for topic, urls in topic_urls.items():
-            if topic in query_lower:
-                if source in urls:
-                    return urls[source]
-        
-        # Fallback to search URLs
-        query_encoded = query.replace(' ', '%20').replace(',', '')
-        fallback_urls = {
-            'WHO': f'https://www.who.int/news-room/fact-sheets?keywords={query_encoded}',
-            'CDC': f'https://www.cdc.gov/search/?query={query_encoded}',
-            'NIH': f'https://www.nih.gov/search/?query={query_encoded}',
-            'FDA': f'https://www.fda.gov/search/?query={query_encoded}',
-            'ClinicalTrials.gov': f'https://clinicaltrials.gov/search?term={query_encoded}',
-            'Cochrane Library': f'https://www.cochranelibrary.com/search?q={query_encoded}'
-        }
-        
-        return fallback_urls.get(source, f'https://www.google.com/search?q={query_encoded}+{source.replace(" ", "")}')
-    
-    # Generate authoritative sources
-    sources = [
-        {
-            'title': f"WHO Health Information on {query}",
-            'source': 'WHO',
-            'url': get_targeted_url('WHO', query),
-            'summary': 'World Health Organization official guidance and fact sheets',
-            'type': 'guideline',
-            'reliability': 0.98
-        },
-        {
-            'title': f"CDC Guidelines on {query}",
-            'source': 'CDC',
-            'url': get_targeted_url('CDC', query),
-            'summary': 'Centers for Disease Control evidence-based information',
-            'type': 'guideline',
-            'reliability': 0.97
-        },
-        {
-            'title': f"NIH Research on {query}",
-            'source': 'NIH',
-            'url': get_targeted_url('NIH', query),
-            'summary': 'National Institutes of Health peer-reviewed research',
-            'type': 'research',
-            'reliability': 0.96
-        },
-        {
-            'title': f"FDA Safety Information on {query}",
-            'source': 'FDA',
-            'url': get_targeted_url('FDA', query),
-            'summary': 'Food and Drug Administration safety data and approvals',
-            'type': 'regulation',
-            'reliability': 0.95
-        },
-        {
-            'title': f"ClinicalTrials.gov Studies on {query}",
-            'source': 'ClinicalTrials.gov',
-            'url': get_targeted_url('ClinicalTrials.gov', query),
-            'summary': 'Active and completed clinical trials database',
-            'type': 'research',
-            'reliability': 0.94
-        },
-        {
-            'title': f"Cochrane Reviews on {query}",
-            'source': 'Cochrane Library',
-            'url': get_targeted_url('Cochrane Library', query),
-            'summary': 'Systematic reviews and meta-analyses',
-            'type': 'research',
-            'reliability': 0.97
-        }
-    ]
+    response = rate_limited_get(f"{PUBMED_BASE}esearch.fcgi", params=search_params, timeout=15, deadline=deadline)
+    if response.status_code != 200:
+        print(f"⚠️ PubMed esearch error: {response.status_code}")
+        return None
     
-    return sources
+    search_data = response.json()
+    if 'esearchresult' not in search_data:
+        return None
+    return search_data['esearchresult'].get('idlist', [])
+
+def esummary_records(pmids, deadline=None):
+    """PubMed esummary: {pmid: record} with title, author names and publication date"""
+    fetch_params = {
+        'db': 'pubmed',
+        'id': ','.join(pmids),
+        'retmode': 'json'
+    }
+    
+    response = rate_limited_get(f"{PUBMED_BASE}esummary.fcgi", params=fetch_params, timeout=15, deadline=deadline)
+    if response.status_code != 200:
+        print(f"⚠️ PubMed esummary error: {response.status_code}")
+        return {}
+    
+    result = response.json().get('result', {})
+    records = {}
+    for uid in pmids:
+        if uid in result:
+            article_data = result[uid]
+            records[uid] = {
+                'title': article_data.get('title', 'No title available'),
+                'authors': [author.get('name', 'Unknown Author') for author in article_data.get('authors', [])],
+                'pubdate': article_data.get('pubdate', 'Unknown Date')
+            }
+    return records
+
+def get_authoritative_sources(query):
+    """Get information from authoritative health organizations
+
+    Topic matching and per-topic URLs come from the precompiled index in
+    authority_index (data/authority_topics.json), built once per process.
+    """
+    return authoritative_sources(query)
 
 def search_medical_databases(query):
     """Search additional medical databases"""
     databases = []
     
     # Add Mayo Clinic
-    databases.append({
-        'title': f"Mayo Clinic Information on {query}",
-        'source': 'Mayo Clinic',
-        'url': f'https://www.mayoclinic.org/search/search-results?q={query.replace(" ", "+")}',
-        'summary': 'Mayo Clinic patient care and health information',
-        'type': 'guideline',
-        'reliability': 0.92
-    })
+    databases.append(Source(
+        title=f"Mayo Clinic Information on {query}",
+        source='Mayo Clinic',
+        url=f'https://www.mayoclinic.org/search/search-results?q={query.replace(" ", "+")}',
+        summary='Mayo Clinic patient care and health information',
+        type='guideline',
+        reliability=0.92
+    ))
     
     # Add WebMD (with lower reliability)
-    databases.append({
-        'title': f"WebMD Information on {query}",
-        'source': 'WebMD',
-        'url': f'https://www.webmd.com/search/search_results/default.aspx?query={query.replace(" ", "+")}',
-        'summary': 'General health information and symptom checker',
-        'type': 'reference',
-        'reliability': 0.75
-    })
+    databases.append(Source(
+        title=f"WebMD Information on {query}",
+        source='WebMD',
+        url=f'https://www.webmd.com/search/search_results/default.aspx?query={query.replace(" ", "+")}',
+        summary='General health information and symptom checker',
+        type='reference',
+        reliability=0.75
+    ))
     
     return databases
 
-def rank_sources_by_reliability(sources):
-    """Rank sources by reliability score"""
-    return sorted(sources, key=lambda x: x.get('reliability', 0), reverse=True)
+def rank_sources_by_reliability(sources, k=None):
+    """Rank sources by reliability score (only the top k, via a heap, when k is given)"""
+    if k is not None:
+        return heapq.nlargest(k, sources, key=reliability_score)
+    return sorted(sources, key=reliability_score, reverse=True)
 
-def filter_sources_by_relevance(sources, query):
-    """Filter sources based on relevance to query"""
-    query_lower = query.lower()
-    relevant_sources = []
-    
-    for source in sources:
-        title_lower = source.get('title', '').lower()
-        summary_lower = source.get('summary', '').lower()
-        
-        # Simple relevance scoring
-        relevance_score = 0
-        query_words = query_lower.split()
-        
-        for word in query_words:
-            if word in title_lower:
-                relevance_score += 2
-            if word in summary_lower:
-                relevance_score += 1
-        
-        if relevance_score > 0:
-            source['relevance_score'] = relevance_score
-            relevant_sources.append(source)
-    
-    # Sort by relevance score
-    return sorted(relevant_sources, key=lambda x: x.get('relevance_score', 0), reverse=True)
+def filter_sources_by_relevance(sources, query, k=None):
+    """Filter sources to those relevant to the query, best first (BM25 relevance + reliability)"""
+    score_sources(sources, query)
+    relevant_sources = [source for source in sources if source['relevance_score'] > 0]
+    k = len(relevant_sources) if k is None else k
+    return heapq.nlargest(k, relevant_sources, key=lambda s: s['rank_score'])
+
+# Phase 5 providers: cost is upstream API calls, latency_ms the expected cost before measurements
+register_provider(Provider('drug_safety', lambda query, deadline: check_drug_safety(query), reliability=0.95))
+register_provider(Provider('pubmed_mirror', lambda query, deadline: search_local_pubmed(query, max_results=3),
+                           latency_ms=20, reliability=0.95, evidence=True))
+register_provider(Provider('pubmed', lambda query, deadline: search_pubmed(query, max_results=3, deadline=deadline),
+                           cost=1, latency_ms=900, cacheable=True, reliability=0.95, evidence=True,
+                           is_cached=lambda query: is_search_cached(query, 3)))
+register_provider(Provider('health_organizations', lambda query, deadline: get_authoritative_sources(query),
+                           reliability=0.96))
+register_provider(Provider('medical_databases', lambda query, deadline: search_medical_databases(query),
+                           reliability=0.84))
 
 if __name__ == "__main__":
     # Test the module
@@ -7,6 +7,9 @@ AI-powered fact-checking and correction using Gemini
 import requests
 import json
 from config import GEMINI_API_KEY, GEMINI_MODEL
+from prompt_budget import build_fact_check_prompt, format_prompt_stats
+
+GEMINI_BASE = "https://generativelanguage.googleapis.com/v1beta/models/"
 
 def correct_misinformation(claim, sources, misinformation_analysis):
     """Main fact correction function"""
@@ -21,34 +24,11 @@ def correct_misinformation(claim, sources, misinformation_analysis):
 def gemini_fact_correction(claim, sources, analysis=None):
     """Concise fact-checking using Gemini AI with source URLs"""
     try:
-        # Prepare sources summary with URLs
-        sources_summary = "\n".join([
-            f"- {s['source']}: {s['title']} - {s.get('url', 'No URL')}"
-            for s in sources[:3]
-        ])
-        
-        prompt = f"""
-You are a medical fact-checker. Analyze this health claim and provide a CONCISE fact-check in exactly this format:
-
-CLAIM: "{claim}"
-
-SOURCES:
-{sources_summary}
-
-Provide a SHORT response (maximum 150 words) with:
-
-**VERDICT:** [TRUE/FALSE/PARTIALLY TRUE/MISLEADING]
-
-**CORRECTION:** [In 2-3 sentences, what is the accurate information]
-
-**EXPLANATION:** [In 1-2 sentences, why this matters for health/safety]
-
-**SOURCES:** [List 2-3 reliable sources with URLs that support your assessment]
-
-Keep it brief, clear, and actionable. Focus on patient safety.
-"""
+        # Keep the claim and the highest-reliability sources within the model budget
+        prompt, prompt_sources, prompt_stats = build_fact_check_prompt(claim, sources, model=GEMINI_MODEL)
+        print(format_prompt_stats(prompt_stats))
         
-        api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+        api_url = f"{GEMINI_BASE}{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
         
         payload = {
             "contents": [{
@@ -68,7 +48,7 @@ Keep it brief, clear, and actionable. Focus on patient safety.
             result = response.json()
             if 'candidates' in result and result['candidates']:
                 fact_check = result['candidates'][0]['content']['parts'][0]['text']
-                return format_concise_output(fact_check, sources)
+                return format_concise_output(fact_check, prompt_sources)
             else:
                 return generate_concise_fallback(claim, sources, analysis)
         else:
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Registry
+Named analysis stages resolved to functions on first use, so entry points start
+without importing requests, numpy, config or phase modules they may never call.
+Optional stages (NLP preprocessing, explainable report, input processor) fall
+back to built-in versions when their module is not installed.
+
+Plugins replace or add stages without code changes:
+  HEALTH_ANALYZER_PLUGINS="nlp_preprocess=my_nlp:preprocess,report=my_report:render"
+"""
+
+import importlib
+import importlib.util
+import os
+import threading
+
+PLUGINS_ENV = 'HEALTH_ANALYZER_PLUGINS'
+
+def process_input(user_input):
+    """Classify the input (phase 1) and extract its content (phase 2)"""
+    from phase1_user_input import classify_input_type
+    from phase2_content_retrieval import retrieve_content
+    extracted = retrieve_content(classify_input_type(user_input))
+    if not isinstance(extracted, dict):
+        extracted = {'type': 'url', 'source': 'Web', 'title': 'Web Article', 'content': extracted or user_input}
+    extracted.setdefault('source', 'User Input')
+    extracted.setdefault('title', 'Health Claim')
+    return extracted
+
+def basic_preprocess(text):
+    """(language, cleaned text) without language detection"""
+    return "en", text.lower().strip()
+
+def format_report(verdict, reasoning, citations, corrected_text):
+    """Plain-text report: verdict, reasoning, corrected facts and numbered citations"""
+    lines = ["=" * 60, f"🏷️ VERDICT: {verdict}", "=" * 60, "", reasoning, "",
+             "🏥 MEDICAL FACT-CHECK:", "-" * 40, corrected_text or "Fact-check unavailable", "",
+             "📚 SOURCES:"]
+    lines.extend(f"  {i}. {citation}" for i, citation in enumerate(citations, 1))
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+# name -> (import target, fallback used when the target cannot be imported)
+STAGES = {
+    'input_type': ('phase1_user_input:classify_input_type', None),
+    'url_content': ('phase2_content_retrieval:extract_from_url', None),
+    'input_processor': ('article_message_processor:enhanced_input_processor', process_input),
+    'nlp_preprocess': ('phase3_nlp_preprocessing:nlp_preprocess', basic_preprocess),
+    'detection': ('phase4_misinformation_detection:detect_misinformation', None),
+    'groq_detection': ('real_medical_apis:enhanced_groq_detection', None),
+    'sources': ('phase5_trusted_source_retrieval:retrieve_trusted_sources', None),
+    'medical_search': ('real_medical_apis:comprehensive_medical_search', None),
+    'fact_check': ('phase6_fact_correction:gemini_fact_correction', None),
+    'report': ('phase7_explainable_output:generate_explainable_output', format_report),
+    'record_claim': ('claim_index:record_verified_claim', lambda *args, **kwargs: None),
+}
+
+_resolved = {}
+_lock = threading.Lock()
+
+def register_stage(name, target, fallback=None):
+    """Add or replace a stage; target is a callable or a 'module:function' string"""
+    with _lock:
+        STAGES[name] = (target, fallback)
+        _resolved.pop(name, None)
+
+def _load_plugins():
+    for entry in os.environ.get(PLUGINS_ENV, '').split(','):
+        if '=' in entry:
+            name, target = (part.strip() for part in entry.split('=', 1))
+            register_stage(name, target, STAGES.get(name, (None, None))[1])
+
+def _import_target(target):
+    if callable(target):
+        return target
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+def get_stage(name):
+    """Function for a stage, imported on first call
+
+    A missing module falls back to the stage's built-in version (reported once);
+    stages without one re-raise the ImportError.
+    """
+    stage = _resolved.get(name)
+    if stage is not None:
+        return stage
+    with _lock:
+        if name not in _resolved:
+            target, fallback = STAGES[name]
+            try:
+                _resolved[name] = _import_target(target)
+            except (ImportError, AttributeError) as e:
+                if fallback is None:
+                    raise ImportError(f"Stage '{name}' unavailable: {e}") from e
+                print(f"⚠️ Stage '{name}' using built-in fallback ({e})")
+                _resolved[name] = fallback
+        return _resolved[name]
+
+def stage_available(name):
+    """True if the stage's own module is installed (checked without importing it)"""
+    target, _ = STAGES[name]
+    if callable(target):
+        return True
+    try:
+        return importlib.util.find_spec(target.partition(':')[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+_load_plugins()
+
+if __name__ == "__main__":
+    # Test the module: list stages without importing any of them
+    import sys
+
+    for name, (target, fallback) in STAGES.items():
+        status = "✅" if stage_available(name) else ("↩️ fallback" if fallback else "❌ missing")
+        print(f"  {name:16s} {target if isinstance(target, str) else target.__name__:58s} {status}")
+    heavy = [module for module in ('requests', 'numpy', 'config') if module in sys.modules]
+    print(f"📦 Heavy modules imported: {heavy or 'none'}")
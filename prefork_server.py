@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Pre-fork Server
+Supervisor running N worker processes that share one port through SO_REUSEPORT:
+crashed workers are restarted, SIGHUP rolls in a fresh set of workers, and
+SIGTERM/SIGINT drain in-flight requests before exiting
+
+KeepAliveHandler serves HTTP/1.1 persistent connections; a draining server
+closes idle ones at once and the busy ones after their current response.
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DRAIN_TIMEOUT = 30.0    # seconds a stopping worker waits for in-flight requests
+CRASH_WINDOW = 10.0     # crashes counted over this many seconds...
+MAX_CRASHES = 5         # ...before restarts are delayed
+MAX_BACKOFF = 30.0
+KEEPALIVE_TIMEOUT = 15.0  # idle seconds before a persistent connection is closed
+
+def reuseport_supported():
+    """Pre-fork mode needs fork() and SO_REUSEPORT (Linux, BSD, macOS)"""
+    return hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')
+
+class DrainingHTTPServer(ThreadingHTTPServer):
+    """Threading HTTP server that counts in-flight requests so shutdown can wait for them"""
+
+    request_queue_size = 128  # socketserver's default backlog of 5 drops connections under load
+
+    def __init__(self, server_address, handler_class, reuse_port=False):
+        self.reuse_port = reuse_port
+        self.in_flight = 0
+        self.in_flight_changed = threading.Condition()
+        self.draining = False
+        self.idle_connections = set()
+        self.transport_stats = {'connections': 0, 'requests': 0, 'bytes_in': 0, 'bytes_out': 0,
+                                'body_bytes': 0, 'wire_body_bytes': 0, 'compressed': 0, 'preflights': 0}
+        super().__init__(server_address, handler_class)
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        # Counted before the thread starts, so drain() never misses an accepted request
+        with self.in_flight_changed:
+            self.in_flight += 1
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.in_flight_changed:
+                self.in_flight -= 1
+                self.in_flight_changed.notify_all()
+
+    def count(self, **amounts):
+        with self.in_flight_changed:
+            for name, amount in amounts.items():
+                self.transport_stats[name] += amount
+
+    def get_transport_stats(self):
+        """Connection reuse and bytes on the wire (response headers included)"""
+        with self.in_flight_changed:
+            stats = dict(self.transport_stats, open_connections=self.in_flight,
+                         idle_connections=len(self.idle_connections))
+        stats['requests_per_connection'] = round(stats['requests'] / max(1, stats['connections']), 2)
+        stats['compression_ratio'] = round(stats['wire_body_bytes'] / max(1, stats['body_bytes']), 3)
+        return stats
+
+    def set_idle(self, connection, idle):
+        with self.in_flight_changed:
+            if idle:
+                self.idle_connections.add(connection)
+            else:
+                self.idle_connections.discard(connection)
+
+    def close_idle_connections(self):
+        """Wake handlers waiting for a next request so they close their connection"""
+        with self.in_flight_changed:
+            idle = list(self.idle_connections)
+        for connection in idle:
+            try:
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Stop accepting, wait for in-flight requests; returns how many were cut off"""
+        self.draining = True
+        self.shutdown()
+        self.server_close()
+        self.close_idle_connections()
+        deadline = time.monotonic() + timeout
+        with self.in_flight_changed:
+            while self.in_flight and time.monotonic() < deadline:
+                self.in_flight_changed.wait(deadline - time.monotonic())
+            return self.in_flight
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler for DrainingHTTPServer: persistent connections with an idle timeout
+
+    Every response must carry Content-Length (send_body does it) and every
+    request body must be read, or the next request on the connection is garbled.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+
+    def setup(self):
+        super().setup()
+        self.server.count(connections=1)
+
+    def handle_one_request(self):
+        # Idle until the request line arrives; drain() shuts idle connections down
+        self.server.set_idle(self.connection, True)
+        try:
+            super().handle_one_request()
+        finally:
+            self.server.set_idle(self.connection, False)
+        if self.server.draining:
+            self.close_connection = True
+
+    def parse_request(self):
+        self.server.set_idle(self.connection, False)
+        self.server.count(requests=1, bytes_in=len(self.raw_requestline))
+        return super().parse_request()
+
+    def read_body(self):
+        """The request body (b'' when there is none)"""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length > 0 else b''
+        self.server.count(bytes_in=len(body))
+        return body
+
+    def send_body(self, code, body, headers=(), encoding=None, raw_length=None):
+        """Status, headers, Content-Length and body in one write
+
+        encoding names the Content-Encoding body is already in; raw_length is
+        its size before that encoding (for the compression stats).
+        """
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.draining:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        # end_headers() flushes the header buffer on its own; append the body to it instead
+        self._headers_buffer.append(b"\r\n")
+        self._headers_buffer.append(body)
+        data = b"".join(self._headers_buffer)
+        self._headers_buffer = []
+        self.wfile.write(data)
+        self.server.count(bytes_out=len(data), body_bytes=raw_length or len(body), wire_body_bytes=len(body),
+                          compressed=1 if encoding else 0)
+
+def serve_until_signalled(server, drain_timeout=DRAIN_TIMEOUT, label=""):
+    """Serve in a background thread until SIGTERM/SIGINT, then drain"""
+    stop = threading.Event()
+    received = []
+
+    def handle_stop(sig, frame):
+        received.append(sig)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    thread = threading.Thread(target=server.serve_forever, name="http-server", daemon=True)
+    thread.start()
+    while not stop.wait(1.0):
+        pass
+
+    print(f"🛑 {label}Received {signal.Signals(received[0]).name}, draining {server.in_flight} in-flight requests...")
+    cut_off = server.drain(drain_timeout)
+    if cut_off:
+        print(f"⚠️ {label}{cut_off} requests still running after {drain_timeout:.0f}s, exiting anyway")
+    else:
+        print(f"👋 {label}Drained")
+
+class PreforkSupervisor:
+    """Starts, watches and replaces worker processes
+
+    make_server() is called in each worker after fork and must return a
+    DrainingHTTPServer bound with reuse_port=True. on_worker_start(worker_id),
+    if given, runs first in the worker: anything that owns threads (schedulers,
+    pools) has to be created there, because threads do not survive fork.
+    """
+
+    def __init__(self, make_server, workers, on_worker_start=None, drain_timeout=DRAIN_TIMEOUT):
+        self.make_server = make_server
+        self.num_workers = max(1, workers)
+        self.on_worker_start = on_worker_start
+        self.drain_timeout = drain_timeout
+        self.workers = {}       # pid -> worker id
+        self.retiring = set()   # pids asked to stop during a reload
+        self.crashes = []
+        self.backoff = 0.0
+        self.generation = 0
+        self.next_worker_id = 0
+        self.stopping = False
+        self.reload_requested = False
+
+    def _worker_main(self, worker_id):
+        """Body of a forked worker; never returns"""
+        code = 0
+        try:
+            # Drop the supervisor's handlers; serve_until_signalled installs the worker's own
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if self.on_worker_start:
+                self.on_worker_start(worker_id)
+            server = self.make_server()
+            print(f"👷 Worker {worker_id} (pid {os.getpid()}) serving")
+            serve_until_signalled(server, self.drain_timeout, label=f"Worker {worker_id}: ")
+        except Exception as e:
+            print(f"💥 Worker {worker_id} failed: {e}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+
+    def spawn(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        sys.stdout.flush()  # or buffered output is printed again by the child
+        pid = os.fork()
+        if pid == 0:
+            self._worker_main(worker_id)
+        self.workers[pid] = worker_id
+        return pid
+
+    def _signal_workers(self, pids, sig):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self):
+        """Collect exited workers and replace the ones that crashed"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is None:
+                continue
+            if pid in self.retiring or self.stopping:
+                self.retiring.discard(pid)
+                continue
+
+            self._restart_after_crash(worker_id, status)
+
+    def _restart_after_crash(self, worker_id, status):
+        if os.WIFSIGNALED(status):
+            reason = f"killed by {signal.Signals(os.WTERMSIG(status)).name}"
+        else:
+            reason = f"exit code {os.WEXITSTATUS(status)}"
+        print(f"💥 Worker {worker_id} died ({reason}), restarting")
+
+        now = time.monotonic()
+        self.crashes = [t for t in self.crashes if now - t < CRASH_WINDOW] + [now]
+        if len(self.crashes) > MAX_CRASHES:
+            # Crash loop (bad config, port stolen...): back off instead of fork-bombing
+            self.backoff = min(MAX_BACKOFF, max(1.0, self.backoff * 2))
+            print(f"⏳ {len(self.crashes)} crashes in {CRASH_WINDOW:.0f}s, waiting {self.backoff:.0f}s")
+            time.sleep(self.backoff)
+        else:
+            self.backoff = 0.0
+        if not self.stopping:
+            self.spawn()
+
+    def reload(self):
+        """Start a new generation of workers, then drain the old one"""
+        self.generation += 1
+        old = list(self.workers)
+        print(f"🔄 Reload: starting generation {self.generation}, draining {len(old)} old workers")
+        for _ in range(self.num_workers):
+            self.spawn()
+        self.retiring.update(old)
+        self._signal_workers(old, signal.SIGTERM)
+
+    def stop(self):
+        """Ask every worker to drain, then kill stragglers"""
+        self.stopping = True
+        print(f"🛑 Stopping {len(self.workers)} workers (drain timeout {self.drain_timeout:.0f}s)...")
+        self._signal_workers(list(self.workers), signal.SIGTERM)
+        deadline = time.monotonic() + self.drain_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self.workers:
+            print(f"⚠️ Killing {len(self.workers)} workers that did not drain")
+            self._signal_workers(list(self.workers), signal.SIGKILL)
+            while self.workers:
+                pid, _ = os.waitpid(-1, 0)
+                self.workers.pop(pid, None)
+
+    def run(self):
+        """Supervise until SIGTERM/SIGINT"""
+        def handle_stop(sig, frame):
+            self.stopping = True
+
+        def handle_reload(sig, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, handle_stop)
+        signal.signal(signal.SIGINT, handle_stop)
+        signal.signal(signal.SIGHUP, handle_reload)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        print(f"🧑‍✈️ Supervisor pid {os.getpid()}: {self.num_workers} workers (SIGHUP reloads, SIGTERM drains)")
+
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            self._reap()
+            time.sleep(0.2)
+        self.stop()
+        print("👋 All workers stopped")
+
+def check_port(host, port):
+    """Fail fast if the port is taken by something not using SO_REUSEPORT
+
+    The probe socket is never listened on, so it cannot steal connections.
+    """
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        probe.bind((host, port))
+    finally:
+        probe.close()
+
+def serve(handler_class, host, port, workers=1, on_worker_start=None, drain_timeout=DRAIN_TIMEOUT):
+    """Serve handler_class with N pre-forked workers, or in-process when workers == 1"""
+    if workers > 1 and not reuseport_supported():
+        print("⚠️ SO_REUSEPORT/fork not available on this platform, using a single process")
+        workers = 1
+
+    if workers == 1:
+        if on_worker_start:
+            on_worker_start(0)
+        server = DrainingHTTPServer((host, port), handler_class)
+        serve_until_signalled(server, drain_timeout)
+        return
+
+    check_port(host, port)
+    supervisor = PreforkSupervisor(
+        lambda: DrainingHTTPServer((host, port), handler_class, reuse_port=True),
+        workers, on_worker_start, drain_timeout
+    )
+    supervisor.run()
+
+def _run_load(url, body, duration, concurrency, results):
+    """Benchmark client process: concurrency keep-alive-free HTTP clients for duration seconds"""
+    import http.client
+    from urllib.parse import urlparse
+
+    parsed = urlparse(url)
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+                conn.request('POST', parsed.path, body, {'Content-Type': 'application/json'})
+                conn.getresponse().read()
+                conn.close()
+                counts[index] += 1
+            except OSError:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((sum(counts), sum(errors)))
+
+if __name__ == "__main__":
+    # Benchmark: requests/sec of robust_backend.py --workers N for N = 1..cores
+    import json
+    import multiprocessing
+    import subprocess
+    import urllib.request
+
+    port = 5099
+    duration = 10
+    client_processes = max(2, (os.cpu_count() or 1) // 2)
+    body = json.dumps({'text': 'Drinking bleach cures COVID-19 and vaccines cause autism. ' * 40}).encode()
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'robust_backend.py')
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+    print(f"📊 robust_backend.py throughput, {cores} cores, {duration}s per run")
+    baseline = None
+    for workers in counts:
+        server = subprocess.Popen([sys.executable, backend, '--workers', str(workers), '--port', str(port)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            # Wait for a 200: connection errors while starting, 503 while warming caches
+            deadline = time.monotonic() + 150
+            while time.monotonic() < deadline:
+                try:
+                    urllib.request.urlopen(f"http://localhost:{port}/api/health", timeout=1).read()
+                    break
+                except OSError:
+                    time.sleep(0.2)
+            else:
+                print(f"⚠️ {workers} workers: not healthy after 150 s, measuring anyway")
+
+            results = multiprocessing.Queue()
+            clients = [multiprocessing.Process(target=_run_load, args=(f"http://localhost:{port}/api/verify", body, duration, 16, results))
+                       for _ in range(client_processes)]
+            for client in clients:
+                client.start()
+            totals = [results.get() for _ in clients]
+            for client in clients:
+                client.join()
+
+            done = sum(t[0] for t in totals)
+            failed = sum(t[1] for t in totals)
+            rps = done / duration
+            baseline = baseline or rps
+            print(f"  {workers:2d} workers: {rps:8.1f} req/s  (speedup {rps / baseline:.2f}x, {failed} errors)")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
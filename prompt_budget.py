@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Prompt Budget Builder
+Token-budgeted prompt assembly for the Groq detection and Gemini fact-check stages
+"""
+
+import re
+from string import Template
+
+# Per-model prompt budgets (approximate tokens).
+# 'claim' and 'sources' cap the variable parts; 'prompt' caps the whole request.
+MODEL_BUDGETS = {
+    'llama3-70b-8192': {'prompt': 3000, 'claim': 1500, 'sources': 800},
+    'llama3-8b-8192': {'prompt': 3000, 'claim': 1500, 'sources': 800},
+    'gemini-1.5-flash': {'prompt': 4000, 'claim': 1500, 'sources': 1200},
+    'gemini-1.5-pro': {'prompt': 6000, 'claim': 2500, 'sources': 2000},
+}
+DEFAULT_BUDGET = {'prompt': 2500, 'claim': 1000, 'sources': 600}
+
+# String reliabilities used by real_medical_apis, mapped onto the 0-1 scale used in phase 5
+RELIABILITY_SCORES = {
+    'very_high': 0.98,
+    'high': 0.95,
+    'medium': 0.75,
+    'low': 0.5,
+    'unknown': 0.3,
+}
+
+# Words that make a sentence worth fact-checking
+CHECKWORTHY_TERMS = frozenset([
+    'cure', 'cures', 'cured', 'treat', 'treats', 'prevent', 'prevents', 'cause', 'causes',
+    'kill', 'kills', 'vaccine', 'vaccines', 'cancer', 'covid', 'diabetes', 'autism', 'virus',
+    'drug', 'drugs', 'dose', 'doctor', 'doctors', 'study', 'studies', 'research', 'proven',
+    'risk', 'dangerous', 'safe', 'toxic', 'immune', 'infection', 'disease', 'heal', 'heals',
+    'miracle', 'instantly', 'always', 'never', 'guaranteed', 'fda', 'who', 'cdc', 'pharma',
+])
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_NUMBER_RE = re.compile(r'\d')
+
+# Static instruction templates, compiled once at import
+DETECTION_TEMPLATE = Template("""
+You are a medical expert AI analyzing health information for potential misinformation.
+
+Text to analyze: "$text"$context
+
+Provide analysis in this exact JSON format:
+{
+    "verdict": "misinformation|potential_misinformation|likely_accurate|uncertain",
+    "confidence": 0.0-1.0,
+    "risk_level": "low|medium|high|critical",
+    "reasoning": "Brief explanation of why this verdict was reached",
+    "medical_entities": ["list", "of", "medical", "terms", "found"],
+    "action_needed": "specific recommended action for users"
+}
+
+Focus on:
+- Dangerous medical advice that could harm people
+- False claims about treatments, cures, or prevention
+- Conspiracy theories about health organizations or vaccines
+- Unproven miracle cures or treatments
+- Misinformation about established medical science
+
+Be especially careful about claims that:
+- Promise instant or miracle cures
+- Contradict established medical consensus
+- Discourage people from seeking proper medical care
+- Promote dangerous substances or practices
+""")
+
+FACT_CHECK_TEMPLATE = Template("""
+You are a medical fact-checker. Analyze this health claim and provide a CONCISE fact-check in exactly this format:
+
+CLAIM: "$claim"
+
+SOURCES:
+$sources
+
+Provide a SHORT response (maximum 150 words) with:
+
+**VERDICT:** [TRUE/FALSE/PARTIALLY TRUE/MISLEADING]
+
+**CORRECTION:** [In 2-3 sentences, what is the accurate information]
+
+**EXPLANATION:** [In 1-2 sentences, why this matters for health/safety]
+
+**SOURCES:** [List 2-3 reliable sources with URLs that support your assessment]
+
+Keep it brief, clear, and actionable. Focus on patient safety.
+""")
+
+def estimate_tokens(text):
+    """Approximate token count (~4 characters or ~0.75 words per token)"""
+    if not text:
+        return 0
+    return int(max(len(text) / 4, len(text.split()) * 1.33)) + 1
+
+# Cost of the fixed instruction text, computed once
+DETECTION_TEMPLATE_TOKENS = estimate_tokens(DETECTION_TEMPLATE.template)
+FACT_CHECK_TEMPLATE_TOKENS = estimate_tokens(FACT_CHECK_TEMPLATE.template)
+
+def get_model_budget(model):
+    """Get the prompt budget for a model name"""
+    return MODEL_BUDGETS.get(model, DEFAULT_BUDGET)
+
+def reliability_score(source):
+    """Numeric reliability for a source dict (accepts floats or 'high'/'very_high' labels)"""
+    reliability = source.get('reliability', 0)
+    if isinstance(reliability, str):
+        return RELIABILITY_SCORES.get(reliability, 0.0)
+    return reliability or 0.0
+
+def split_sentences(text):
+    """Split text into non-empty sentences"""
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+def score_sentence(sentence, position):
+    """Score how check-worthy a sentence is"""
+    words = _WORD_RE.findall(sentence.lower())
+    if not words:
+        return 0.0
+
+    score = sum(1.0 for word in words if word in CHECKWORTHY_TERMS)
+    if _NUMBER_RE.search(sentence):
+        score += 0.5
+    if '%' in sentence or '!' in sentence:
+        score += 0.5
+    # Opening sentences usually state the claim
+    if position == 0:
+        score += 1.0
+    # Very short fragments are rarely claims
+    if len(words) < 4:
+        score -= 1.0
+    return score
+
+def dedupe_sentences(sentences):
+    """Sentences without repeats (forwarded messages often paste the same line many times), first occurrence kept"""
+    seen = set()
+    unique = []
+    for sentence in sentences:
+        key = ' '.join(sentence.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(sentence)
+    return unique
+
+def fit_claim_to_budget(text, max_tokens):
+    """Keep the most check-worthy sentences that fit in max_tokens, in original order
+
+    Repeated sentences are dropped first. The result is re-estimated until it
+    fits: a joined or hard-cut text can estimate above the sum of its parts.
+    """
+    total_tokens = estimate_tokens(text)
+    if total_tokens <= max_tokens:
+        return text, {'sentences_total': None, 'sentences_kept': None, 'truncated': False}
+
+    all_sentences = split_sentences(text)
+    sentences = dedupe_sentences(all_sentences)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: score_sentence(sentences[i], i),
+        reverse=True
+    )
+
+    kept = []
+    used = 0
+    for index in ranked:
+        cost = estimate_tokens(sentences[index])
+        if used + cost > max_tokens:
+            continue
+        kept.append(index)
+        used += cost
+
+    fitted = ' '.join(sentences[i] for i in sorted(kept)) if kept else text
+    while estimate_tokens(fitted) > max_tokens:
+        if len(kept) > 1:
+            # Drop the least check-worthy sentence still kept
+            kept.pop()
+            fitted = ' '.join(sentences[i] for i in sorted(kept))
+        else:
+            # A single sentence larger than the whole budget: hard cut on characters,
+            # shrinking in proportion to the overshoot until the estimate fits
+            kept = []
+            cut = int(len(fitted) * max_tokens / estimate_tokens(fitted))
+            fitted = fitted[:min(cut, len(fitted) - 1)].rstrip()
+
+    return fitted, {
+        'sentences_total': len(all_sentences),
+        'sentences_kept': len(kept),
+        'duplicates_removed': len(all_sentences) - len(sentences),
+        'truncated': True
+    }
+
+def select_sources(sources, max_tokens, max_sources=3):
+    """Pick the best sources whose summary lines fit in max_tokens
+
+    Sources ranked by source_ranking carry a 'rank_score' (relevance + reliability);
+    otherwise reliability alone decides.
+    """
+    ranked = sorted(sources, key=lambda s: s.get('rank_score', reliability_score(s)), reverse=True)
+
+    selected = []
+    lines = []
+    used = 0
+    for source in ranked:
+        line = f"- {source.get('source', 'Unknown')}: {source.get('title', '')} - {source.get('url', 'No URL')}"
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            continue
+        selected.append(source)
+        lines.append(line)
+        used += cost
+        if len(selected) >= max_sources:
+            break
+
+    return selected, "\n".join(lines)
+
+def build_detection_prompt(text, context=None, model=None):
+    """Build the Groq detection prompt within the model budget"""
+    budget = get_model_budget(model)
+    context_info = f"\nContext: {context}" if context else ""
+
+    claim_budget = min(
+        budget['claim'],
+        budget['prompt'] - DETECTION_TEMPLATE_TOKENS - estimate_tokens(context_info)
+    )
+    fitted_text, claim_stats = fit_claim_to_budget(text, max(claim_budget, 0))
+
+    prompt = DETECTION_TEMPLATE.substitute(text=fitted_text, context=context_info)
+    stats = dict(claim_stats)
+    stats['prompt_tokens'] = estimate_tokens(prompt)
+    stats['input_tokens'] = estimate_tokens(text)
+    return prompt, stats
+
+def build_fact_check_prompt(claim, sources, model=None, max_sources=3):
+    """Build the Gemini fact-check prompt within the model budget
+
+    Returns the prompt, the sources that made it into the prompt, and token stats.
+    """
+    budget = get_model_budget(model)
+
+    fitted_claim, claim_stats = fit_claim_to_budget(claim, budget['claim'])
+    sources_budget = min(
+        budget['sources'],
+        budget['prompt'] - FACT_CHECK_TEMPLATE_TOKENS - estimate_tokens(fitted_claim)
+    )
+    selected, sources_summary = select_sources(sources, max(sources_budget, 0), max_sources)
+
+    prompt = FACT_CHECK_TEMPLATE.substitute(claim=fitted_claim, sources=sources_summary)
+    stats = dict(claim_stats)
+    stats['prompt_tokens'] = estimate_tokens(prompt)
+    stats['input_tokens'] = estimate_tokens(claim)
+    stats['sources_used'] = len(selected)
+    return prompt, selected, stats
+
+def format_prompt_stats(stats):
+    """One-line summary of prompt size for logging"""
+    line = f"📏 Prompt: ~{stats['prompt_tokens']} tokens"
+    if stats.get('truncated'):
+        line += f" (kept {stats['sentences_kept']}/{stats['sentences_total']} sentences of ~{stats['input_tokens']} input tokens"
+        if stats.get('duplicates_removed'):
+            line += f", {stats['duplicates_removed']} repeats dropped"
+        line += ")"
+    return line
+
+if __name__ == "__main__":
+    # Test the module
+    short_claim = "Vaccines cause autism in children"
+    long_article = " ".join([
+        "Our town held a fair last weekend.",
+        "Local doctors say drinking bleach cures COVID-19 instantly.",
+        "The weather was lovely and people enjoyed the music.",
+        "A new study claims vitamin C prevents 100% of cancer cases!",
+    ] * 400)
+
+    for text in [short_claim, long_article]:
+        prompt, stats = build_detection_prompt(text, model='llama3-70b-8192')
+        print(f"Input: {len(text)} characters")
+        print(format_prompt_stats(stats))
+
+    test_sources = [
+        {'source': 'WebMD', 'title': 'General info', 'url': 'https://www.webmd.com/', 'reliability': 0.75},
+        {'source': 'WHO', 'title': 'Vaccine safety', 'url': 'https://www.who.int/', 'reliability': 0.98},
+        {'source': 'PubMed (PMID: 1)', 'title': 'Study', 'url': 'https://pubmed.ncbi.nlm.nih.gov/1/', 'reliability': 'high'},
+        {'source': 'CDC', 'title': 'Vaccines', 'url': 'https://www.cdc.gov/vaccines/', 'reliability': 0.97},
+    ]
+    prompt, used, stats = build_fact_check_prompt(short_claim, test_sources, model='gemini-1.5-flash')
+    print(format_prompt_stats(stats))
+    print("Sources used:", [s['source'] for s in used])
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+PubMed Cache
+Caches esearch ID lists (by normalized query) and article records (by PMID),
+bounded in memory with spill-to-disk
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Search results change as new papers are indexed; article metadata is effectively immutable
+SEARCH_TTL = 24 * 3600
+ARTICLE_TTL = 30 * 24 * 3600
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from',
+    'has', 'have', 'how', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'their',
+    'this', 'to', 'was', 'were', 'what', 'when', 'which', 'who', 'will', 'with', 'you', 'your',
+    'about', 'all', 'any', 'if', 'into', 'not', 'than', 'then', 'there', 'these', 'they',
+])
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def tokenize(text):
+    """Lowercase word tokens (hyphenated terms like covid-19 kept whole)"""
+    return _TOKEN_RE.findall(text.lower())
+
+def normalize_query(query):
+    """Normalize a search query: lowercase, stopwords removed, unique terms sorted"""
+    return ' '.join(sorted(set(t for t in tokenize(query) if t not in STOPWORDS)))
+
+class TieredCache:
+    """LRU cache with per-entry TTL; entries evicted from memory spill to SQLite on disk"""
+
+    def __init__(self, name, ttl, max_entries=2000, cache_dir=CACHE_DIR):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'spilled': 0}
+
+        self.db = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(cache_dir, f"{name}.sqlite"), check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, value TEXT)")
+            self.db.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ {name} disk cache unavailable, memory only: {e}")
+            self.db = None
+
+    def get(self, key):
+        """Get a cached value or None"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[1]
+                del self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store(key, row[0], value)
+                    self.stats['disk_hits'] += 1
+                    return value
+
+            self.stats['misses'] += 1
+            return None
+
+    def peek(self, key):
+        """Cached value or None, without touching LRU order or hit counters"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            if self.db is not None:
+                row = self.db.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row and row[0] > now:
+                    return json.loads(row[1])
+        return None
+
+    def set(self, key, value, ttl=None):
+        """Cache a JSON-serializable value"""
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+        with self.lock:
+            self._store(key, expires, value)
+
+    def _store(self, key, expires, value):
+        """Insert into memory and spill the least recently used entries; caller holds lock"""
+        self.memory[key] = (expires, value)
+        self.memory.move_to_end(key)
+        if len(self.memory) <= self.max_entries:
+            return
+
+        spilled = []
+        while len(self.memory) > self.max_entries:
+            old_key, (old_expires, old_value) = self.memory.popitem(last=False)
+            if old_expires > time.time():
+                spilled.append((old_key, old_expires, json.dumps(old_value)))
+        if spilled and self.db is not None:
+            self.db.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", spilled)
+            self.db.commit()
+            self.stats['spilled'] += len(spilled)
+
+    def purge_expired(self):
+        """Drop expired entries from memory and disk"""
+        now = time.time()
+        with self.lock:
+            for key in [k for k, (expires, _) in self.memory.items() if expires <= now]:
+                del self.memory[key]
+            if self.db is not None:
+                self.db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                self.db.commit()
+
+SEARCH_CACHE = TieredCache('pubmed_search', SEARCH_TTL)
+ARTICLE_CACHE = TieredCache('pubmed_articles', ARTICLE_TTL, max_entries=10000)
+
+def cached_search(query, max_results, fetch_ids):
+    """PMID list for a query; fetch_ids() is called on a miss (None means failure, not cached)"""
+    key = f"{normalize_query(query)}|{max_results}"
+    ids = SEARCH_CACHE.get(key)
+    if ids is None:
+        ids = fetch_ids()
+        if ids is not None:
+            SEARCH_CACHE.set(key, ids)
+    return ids
+
+def is_search_cached(query, max_results):
+    """True if the PMID list and every article record for a query are cached"""
+    ids = SEARCH_CACHE.peek(f"{normalize_query(query)}|{max_results}")
+    return ids is not None and all(ARTICLE_CACHE.peek(pmid) is not None for pmid in ids)
+
+def cached_articles(pmids, fetch_records):
+    """Article records by PMID; fetch_records(missing_pmids) returns {pmid: record} for misses"""
+    records = {}
+    missing = []
+    for pmid in pmids:
+        record = ARTICLE_CACHE.get(pmid)
+        if record is None:
+            missing.append(pmid)
+        else:
+            records[pmid] = record
+
+    if missing:
+        fetched = fetch_records(missing) or {}
+        for pmid, record in fetched.items():
+            ARTICLE_CACHE.set(pmid, record)
+            records[pmid] = record
+
+    return records
+
+def update_article(pmid, **fields):
+    """Add fields (e.g. an abstract fetched later) to a cached article record"""
+    record = ARTICLE_CACHE.get(pmid) or {}
+    record = dict(record, **fields)
+    ARTICLE_CACHE.set(pmid, record)
+    return record
+
+def get_cache_stats():
+    """Hit/miss counters for both caches"""
+    return {'search': dict(SEARCH_CACHE.stats), 'articles': dict(ARTICLE_CACHE.stats)}
+
+if __name__ == "__main__":
+    # Test the module
+    queries = ["vitamin D COVID-19 prevention", "Prevention of COVID-19 with vitamin D", "covid-19 vitamin d"]
+    for query in queries:
+        print(f"{query!r} -> {normalize_query(query)!r}")
+
+    upstream_calls = []
+    def fake_esearch():
+        upstream_calls.append('esearch')
+        return ['111', '222']
+
+    def fake_esummary(pmids):
+        upstream_calls.append(f"esummary {','.join(pmids)}")
+        return {pmid: {'title': f"Article {pmid}", 'authors': [], 'pubdate': '2024'} for pmid in pmids}
+
+    for query in queries:
+        ids = cached_search(query, 3, fake_esearch)
+        cached_articles(ids, fake_esummary)
+
+    print(f"Upstream calls for 3 equivalent queries: {upstream_calls}")
+    print(f"Stats: {get_cache_stats()}")
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Offline PubMed Mirror
+Local BM25 literature index built from PubMed baseline/update XML files
+(title, abstract, MeSH terms), queried without network access
+
+Index layout (one directory per segment, listed in manifest.json):
+  terms.json    term -> [postings offset, document frequency]
+  postings.bin  uint32 pairs (doc id, term frequency), read through mmap (as numpy arrays)
+  doclens.bin   uint32 document lengths, read through mmap
+  pmids.bin     uint32 PMID per doc id, read through mmap
+  offsets.bin   uint64 byte offset of each doc id in docs.jsonl, read through mmap
+  docs.jsonl    one JSON record per doc id (pmid, title, abstract, mesh, year)
+  dead.json     doc ids superseded by a later update or deleted (written by updates)
+
+Running processes pick up updates when manifest.json changes (get_mirror).
+"""
+
+import array
+import gzip
+import json
+import math
+import mmap
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+
+from pubmed_cache import tokenize, STOPWORDS
+from medical_types import Source
+
+MIRROR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pubmed_index')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # title terms counted twice
+
+def index_terms(text):
+    """Tokens used for indexing and querying"""
+    return [t for t in tokenize(text) if t not in STOPWORDS and len(t) > 1]
+
+def parse_pubmed_xml(path):
+    """Yield ('upsert', record) and ('delete', pmid) events from a PubMed XML(.gz) file"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag == 'PubmedArticle':
+                pmid = elem.findtext('.//MedlineCitation/PMID')
+                if pmid:
+                    article = elem.find('.//Article')
+                    title = ''.join(article.find('ArticleTitle').itertext()) if article is not None and article.find('ArticleTitle') is not None else ''
+                    abstract = ' '.join(''.join(a.itertext()) for a in elem.iterfind('.//Abstract/AbstractText'))
+                    mesh = [m.text for m in elem.iterfind('.//MeshHeading/DescriptorName') if m.text]
+                    year = elem.findtext('.//JournalIssue/PubDate/Year') or elem.findtext('.//JournalIssue/PubDate/MedlineDate') or ''
+                    yield 'upsert', {
+                        'pmid': pmid,
+                        'title': title.strip(),
+                        'abstract': abstract.strip(),
+                        'mesh': mesh,
+                        'year': year[:4]
+                    }
+                elem.clear()
+            elif elem.tag == 'DeleteCitation':
+                for pmid in elem.iterfind('PMID'):
+                    yield 'delete', pmid.text
+                elem.clear()
+
+def write_segment(segment_dir, records):
+    """Write one immutable index segment from a list of article records"""
+    os.makedirs(segment_dir, exist_ok=True)
+    postings = defaultdict(list)
+    doclens = array.array('I')
+    pmids = array.array('I')
+    offsets = array.array('Q')
+
+    with open(os.path.join(segment_dir, 'docs.jsonl'), 'wb') as docs:
+        for doc_id, record in enumerate(records):
+            counts = Counter(index_terms(record['title']) * TITLE_WEIGHT)
+            counts.update(index_terms(record['abstract']))
+            counts.update(index_terms(' '.join(record['mesh'])))
+            for term, tf in counts.items():
+                postings[term].append((doc_id, tf))
+            doclens.append(sum(counts.values()))
+            pmids.append(int(record['pmid']))
+            offsets.append(docs.tell())
+            docs.write(json.dumps(record).encode('utf-8') + b'\n')
+
+    terms = {}
+    flat = array.array('I')
+    for term in sorted(postings):
+        terms[term] = [len(flat) // 2, len(postings[term])]
+        for doc_id, tf in postings[term]:
+            flat.append(doc_id)
+            flat.append(tf)
+
+    with open(os.path.join(segment_dir, 'postings.bin'), 'wb') as f:
+        flat.tofile(f)
+    for name, values in (('doclens.bin', doclens), ('pmids.bin', pmids), ('offsets.bin', offsets)):
+        with open(os.path.join(segment_dir, name), 'wb') as f:
+            values.tofile(f)
+    with open(os.path.join(segment_dir, 'terms.json'), 'w', encoding='utf-8') as f:
+        json.dump(terms, f)
+
+class _Segment:
+    """A memory-mapped index segment (numpy arrays over the mapped files)"""
+
+    def __init__(self, segment_dir):
+        import numpy as np
+        self.dir = segment_dir
+        with open(os.path.join(segment_dir, 'terms.json'), encoding='utf-8') as f:
+            self.terms = json.load(f)
+        self.postings = self._map('postings.bin', np.uint32).reshape(-1, 2)
+        self.doclens = self._map('doclens.bin', np.uint32)
+        self.pmids = self._map('pmids.bin', np.uint32)
+        self.offsets = self._map('offsets.bin', np.uint64)
+        self.num_docs = len(self.doclens)
+        self.total_len = int(self.doclens.sum(dtype=np.uint64)) if self.num_docs else 0
+        self.dead_mtime = None
+        self.dead = np.zeros(self.num_docs, dtype=bool)
+        self.load_dead()
+
+    def _map(self, name, dtype):
+        import numpy as np
+        path = os.path.join(self.dir, name)
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(mapped, dtype=dtype)
+
+    def load_dead(self):
+        """(Re)read dead.json if it changed since the last read"""
+        import numpy as np
+        dead_path = os.path.join(self.dir, 'dead.json')
+        try:
+            mtime = os.stat(dead_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.dead_mtime:
+            return
+        with open(dead_path, encoding='utf-8') as f:
+            doc_ids = np.array(json.load(f), dtype=np.int64)
+        dead = np.zeros(self.num_docs, dtype=bool)
+        dead[doc_ids] = True
+        # One assignment, so concurrent searches see the old mask or the new one
+        self.dead = dead
+        self.dead_mtime = mtime
+
+    def postings_for(self, term):
+        """(doc ids, term frequencies) of a term, or None"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        start, df = entry
+        block = self.postings[start:start + df]
+        return block[:, 0], block[:, 1]
+
+    def mark_dead(self, pmids):
+        """Hide docs whose PMID was superseded or deleted; persists dead.json"""
+        import numpy as np
+        changed = np.fromiter(pmids, dtype=np.uint32, count=len(pmids))
+        newly_dead = np.isin(self.pmids, changed) & ~self.dead
+        count = int(newly_dead.sum())
+        if count:
+            dead = self.dead | newly_dead
+            path = os.path.join(self.dir, 'dead.json')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(np.flatnonzero(dead).tolist(), f)
+            os.replace(tmp_path, path)
+            self.dead = dead
+            self.dead_mtime = os.stat(path).st_mtime_ns
+        return count
+
+    def record(self, doc_id):
+        with open(os.path.join(self.dir, 'docs.jsonl'), 'rb') as f:
+            f.seek(int(self.offsets[doc_id]))
+            return json.loads(f.readline())
+
+class PubMedMirror:
+    """Segmented local index; updates append segments and hide superseded docs"""
+
+    def __init__(self, mirror_dir=MIRROR_DIR):
+        self.dir = mirror_dir
+        self.manifest_path = os.path.join(mirror_dir, 'manifest.json')
+        self.segments = []
+        self.manifest_mtime = None
+        self.load()
+
+    def _manifest_mtime(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        """(Re)load segments listed in the manifest
+
+        Segments already loaded are kept (only their dead.json is re-read), so
+        picking up a daily update costs the new segment, not the whole baseline.
+        """
+        mtime = self._manifest_mtime()
+        if mtime is None:
+            self.segments = []
+            self.manifest_mtime = None
+            return
+        with open(self.manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        loaded = {segment.dir: segment for segment in self.segments}
+        segments = []
+        for name in manifest.get('segments', []):
+            segment_dir = os.path.join(self.dir, name)
+            segment = loaded.get(segment_dir)
+            if segment is None:
+                segment = _Segment(segment_dir)
+            else:
+                segment.load_dead()
+            segments.append(segment)
+        # Swapped in whole: searches in flight finish on the list they started with
+        self.segments = segments
+        self.manifest_mtime = mtime
+
+    def maybe_reload(self):
+        """Reload if the manifest changed (an update was indexed, possibly by another process)"""
+        if self._manifest_mtime() != self.manifest_mtime:
+            self.load()
+
+    @property
+    def available(self):
+        return bool(self.segments)
+
+    def _save_manifest(self, segment_names):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segments': segment_names}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def add_file(self, xml_path, update=False):
+        """Index a baseline file, or a daily update file (update=True), as a new segment"""
+        records = {}
+        deletions = set()
+        for event, value in parse_pubmed_xml(xml_path):
+            if event == 'upsert':
+                records[value['pmid']] = value
+                deletions.discard(value['pmid'])
+            else:
+                records.pop(value, None)
+                deletions.add(value)
+
+        # Revised and deleted citations are hidden in every older segment.
+        # Baseline files never overlap, so only updates need the scan.
+        changed = {int(pmid) for pmid in records} | {int(pmid) for pmid in deletions}
+        hidden = 0
+        if update and self.segments and changed:
+            for segment in self.segments:
+                hidden += segment.mark_dead(changed)
+
+        segment_names = [os.path.basename(segment.dir) for segment in self.segments]
+        if records:
+            name = f"seg{len(segment_names):05d}"
+            write_segment(os.path.join(self.dir, name), list(records.values()))
+            segment_names.append(name)
+        if records or hidden:
+            # Rewritten even for deletions only: running servers reload on its mtime
+            self._save_manifest(segment_names)
+        self.load()
+        return len(records), len(deletions)
+
+    def search(self, query, max_results=3):
+        """BM25 search over title, abstract and MeSH terms"""
+        import numpy as np
+        terms = set(index_terms(query))
+        segments = self.segments
+        if not terms or not segments:
+            return []
+
+        num_docs = sum(segment.num_docs for segment in segments)
+        avg_len = sum(segment.total_len for segment in segments) / max(num_docs, 1)
+
+        # Global document frequencies so scores are comparable across segments
+        df = Counter()
+        for segment in segments:
+            for term in terms:
+                entry = segment.terms.get(term)
+                if entry:
+                    df[term] += entry[1]
+
+        candidates = []
+        for seg_index, segment in enumerate(segments):
+            doc_ids = []
+            contributions = []
+            for term in terms:
+                postings = segment.postings_for(term)
+                if postings is None:
+                    continue
+                ids, tfs = postings
+                idf = math.log(1 + (num_docs - df[term] + 0.5) / (df[term] + 0.5))
+                tfs = tfs.astype(np.float64)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doclens[ids] / avg_len)
+                doc_ids.append(ids)
+                contributions.append(idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+            if not doc_ids:
+                continue
+            doc_ids = np.concatenate(doc_ids)
+            contributions = np.concatenate(contributions)
+            live = ~segment.dead[doc_ids]
+            # Sum each document's term contributions
+            unique_ids, positions = np.unique(doc_ids[live], return_inverse=True)
+            scores = np.zeros(len(unique_ids))
+            np.add.at(scores, positions, contributions[live])
+            if len(scores) > max_results:
+                top = np.argpartition(-scores, max_results - 1)[:max_results]
+            else:
+                top = np.arange(len(scores))
+            candidates.extend((float(scores[i]), seg_index, int(unique_ids[i])) for i in top)
+
+        candidates.sort(reverse=True)
+        results = []
+        for score, seg_index, doc_id in candidates[:max_results]:
+            record = segments[seg_index].record(doc_id)
+            record['score'] = round(score, 3)
+            results.append(record)
+        return results
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+def get_mirror():
+    """Process-wide mirror instance (empty if no index has been built), reloaded when the manifest changes"""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = PubMedMirror()
+        else:
+            _mirror.maybe_reload()
+        return _mirror
+
+def search_local_pubmed(query, max_results=3):
+    """Search the offline mirror, returning phase 5 Source records"""
+    mirror = get_mirror()
+    if not mirror.available:
+        return []
+
+    sources = []
+    for record in mirror.search(query, max_results):
+        abstract = record.get('abstract', '')
+        sources.append(Source(
+            title=record.get('title') or 'No title available',
+            source='PubMed (offline mirror)',
+            url=f"https://pubmed.ncbi.nlm.nih.gov/{record['pmid']}/",
+            summary=(abstract[:200] + "...") if len(abstract) > 200 else (abstract or f"({record.get('year', 'Unknown Date')})"),
+            type='research',
+            reliability=0.95,
+            pmid=record['pmid']
+        ))
+    return sources
+
+if __name__ == "__main__":
+    # Usage: python pubmed_mirror.py add <pubmed25n0001.xml.gz> [...]      (baseline files)
+    #        python pubmed_mirror.py update <pubmed25n1275.xml.gz> [...]   (daily update files)
+    #        python pubmed_mirror.py search "vitamin d covid"
+    import time
+
+    if len(sys.argv) >= 3 and sys.argv[1] in ('add', 'update'):
+        mirror = get_mirror()
+        for path in sys.argv[2:]:
+            start = time.time()
+            added, deleted = mirror.add_file(path, update=sys.argv[1] == 'update')
+            print(f"📚 {os.path.basename(path)}: {added} articles indexed, {deleted} deletions ({time.time() - start:.1f}s)")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'search':
+        query = ' '.join(sys.argv[2:])
+        start = time.perf_counter()
+        results = search_local_pubmed(query, max_results=5)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔍 {len(results)} results in {elapsed:.1f} ms")
+        for i, source in enumerate(results, 1):
+            print(f"  {i}. {source['title'][:80]} ({source['url']})")
+    else:
+        print("Usage: python pubmed_mirror.py add|update <file.xml[.gz]> ... | search <query>")
@@ -1,7 +1,13 @@
 import requests
-import json
 import time
 from config import GROQ_API_KEY, GEMINI_API_KEY, GROQ_ENDPOINT, GEMINI_ENDPOINT, GROQ_MODEL, GEMINI_MODEL
+from upstream_rate_limiter import rate_limited_get, coalesce
+from pubmed_cache import cached_search, cached_articles, update_article
+from pubmed_mirror import search_local_pubmed
+from medical_types import Source, DetectionResult
+from fast_json import extract_json
+from lexicon_store import get_lexicons
+from phase3_nlp_preprocessing import detect_language
 
 class ComprehensiveMedicalAPIs:
     """Enhanced medical APIs with multiple authoritative sources"""
@@ -16,54 +22,44 @@ class ComprehensiveMedicalAPIs:
     
     def search_pubmed_comprehensive(self, query, max_results=5):
         """Enhanced PubMed search with better error handling"""
+        # Concurrent searches for the same term share one set of E-utilities calls
+        articles = coalesce(('search_pubmed_comprehensive', query, max_results),
+                            lambda: self._search_pubmed_comprehensive(query, max_results))
+        return [article.copy() for article in articles]
+    
+    def _search_pubmed_comprehensive(self, query, max_results):
+        """Run search_pubmed_comprehensive through the PubMed caches, calling E-utilities on misses"""
         try:
-            # Search for article IDs
-            search_url = f"{self.pubmed_base}esearch.fcgi"
-            search_params = {
-                'db': 'pubmed',
-                'term': query,
-                'retmax': max_results,
-                'retmode': 'json',
-                'sort': 'relevance'
-            }
+            ids = cached_search(query, max_results, lambda: self._esearch_ids(query, max_results))
             
-            response = requests.get(search_url, params=search_params, timeout=15)
-            response.raise_for_status()
-            search_data = response.json()
-            
-            if 'esearchresult' not in search_data or not search_data['esearchresult']['idlist']:
+            if not ids:
                 return self._get_fallback_sources(query)
             
-            # Get article details
-            ids = search_data['esearchresult']['idlist']
-            fetch_url = f"{self.pubmed_base}esummary.fcgi"
-            fetch_params = {
-                'db': 'pubmed',
-                'id': ','.join(ids),
-                'retmode': 'json'
-            }
-            
-            response = requests.get(fetch_url, params=fetch_params, timeout=15)
-            response.raise_for_status()
-            fetch_data = response.json()
+            # Get article details (records are shared with phase 5 by PMID)
+            records = cached_articles(ids, self._esummary_records)
             
             articles = []
             for uid in ids:
-                if uid in fetch_data['result']:
-                    article = fetch_data['result'][uid]
-                    # Get abstract if available
-                    abstract = self._get_pubmed_abstract(uid)
+                record = records.get(uid)
+                if record:
+                    # Get abstract if available (cached on the article record once fetched)
+                    abstract = record.get('abstract')
+                    if abstract is None:
+                        abstract = self._get_pubmed_abstract(uid)
+                        # A failed fetch (None) is retried next time, not cached as "no abstract"
+                        if abstract is not None:
+                            update_article(uid, abstract=abstract)
                     
-                    articles.append({
-                        'title': article.get('title', 'No title'),
-                        'authors': ', '.join([author['name'] for author in article.get('authors', [])[:3]]),
-                        'source': f"PubMed (PMID: {uid})",
-                        'url': f"https://pubmed.ncbi.nlm.nih.gov/{uid}/",
-                        'summary': abstract[:200] + "..." if abstract else "Abstract not available",
-                        'full_abstract': abstract,
-                        'type': 'peer_reviewed',
-                        'reliability': 'high'
-                    })
+                    articles.append(Source(
+                        title=record.get('title', 'No title'),
+                        source=f"PubMed (PMID: {uid})",
+                        url=f"https://pubmed.ncbi.nlm.nih.gov/{uid}/",
+                        summary=abstract[:200] + "..." if abstract else "Abstract not available",
+                        type='peer_reviewed',
+                        reliability='high',
+                        authors=', '.join(record.get('authors', [])[:3]),
+                        full_abstract=abstract
+                    ))
             
             # Add authoritative health organizations
             articles.extend(self._get_authoritative_sources(query))
@@ -74,8 +70,51 @@ class ComprehensiveMedicalAPIs:
             print(f"PubMed API error: {e}")
             return self._get_fallback_sources(query)
     
+    def _esearch_ids(self, query, max_results):
+        """PubMed esearch: list of PMIDs for a query"""
+        search_url = f"{self.pubmed_base}esearch.fcgi"
+        search_params = {
+            'db': 'pubmed',
+            'term': query,
+            'retmax': max_results,
+            'retmode': 'json',
+            'sort': 'relevance'
+        }
+        
+        response = rate_limited_get(search_url, params=search_params, timeout=15)
+        response.raise_for_status()
+        search_data = response.json()
+        
+        if 'esearchresult' not in search_data:
+            return None
+        return search_data['esearchresult'].get('idlist', [])
+    
+    def _esummary_records(self, pmids):
+        """PubMed esummary: {pmid: record} with title, author names and publication date"""
+        fetch_url = f"{self.pubmed_base}esummary.fcgi"
+        fetch_params = {
+            'db': 'pubmed',
+            'id': ','.join(pmids),
+            'retmode': 'json'
+        }
+        
+        response = rate_limited_get(fetch_url, params=fetch_params, timeout=15)
+        response.raise_for_status()
+        result = response.json().get('result', {})
+        
+        records = {}
+        for uid in pmids:
+            if uid in result:
+                article = result[uid]
+                records[uid] = {
+                    'title': article.get('title', 'No title'),
+                    'authors': [author['name'] for author in article.get('authors', [])],
+                    'pubdate': article.get('pubdate', 'Unknown Date')
+                }
+        return records
+    
     def _get_pubmed_abstract(self, pmid):
-        """Get abstract for a specific PubMed article"""
+        """Abstract of a PubMed article ("" if it has none), or None if the fetch failed"""
         try:
             fetch_url = f"{self.pubmed_base}efetch.fcgi"
             fetch_params = {
@@ -84,7 +123,7 @@ class ComprehensiveMedicalAPIs:
                 'retmode': 'xml'
             }
             
-            response = requests.get(fetch_url, params=fetch_params, timeout=10)
+            response = rate_limited_get(fetch_url, params=fetch_params, timeout=10)
             if response.status_code == 200:
                 # Simple extraction of abstract from XML
                 content = response.text
@@ -92,61 +131,66 @@ class ComprehensiveMedicalAPIs:
                 end = content.find('</AbstractText>')
                 if start != -1 and end != -1:
                     return content[start+14:end].strip()
-            return ""
+                return ""
+            return None
             
         except Exception:
-            return ""
+            return None
     
     def _get_authoritative_sources(self, query):
         """Get information from authoritative health organizations"""
         sources = [
-            {
-                'title': f"WHO Health Guidelines: {query}",
-                'source': "World Health Organization",
-                'url': "https://www.who.int/",
-                'summary': f"WHO evidence-based guidelines and recommendations for {query}. The World Health Organization provides global health leadership and sets international health standards.",
-                'type': 'authoritative_guideline',
-                'reliability': 'very_high'
-            },
-            {
-                'title': f"CDC Health Information: {query}",
-                'source': "Centers for Disease Control",
-                'url': "https://www.cdc.gov/",
-                'summary': f"CDC health surveillance data and prevention guidelines for {query}. The CDC monitors public health and provides evidence-based recommendations.",
-                'type': 'public_health_authority',
-                'reliability': 'very_high'
-            },
-            {
-                'title': f"NIH Medical Research: {query}",
-                'source': "National Institutes of Health",
-                'url': "https://www.nih.gov/",
-                'summary': f"NIH research findings and medical information about {query}. The NIH is the primary federal agency conducting and supporting medical research.",
-                'type': 'research_institution',
-                'reliability': 'very_high'
-            },
-            {
-                'title': f"FDA Safety Information: {query}",
-                'source': "Food and Drug Administration",
-                'url': "https://www.fda.gov/",
-                'summary': f"FDA regulatory information and safety data for {query}. The FDA ensures the safety and efficacy of drugs, devices, and food products.",
-                'type': 'regulatory_authority',
-                'reliability': 'very_high'
-            }
+            Source(
+                title=f"WHO Health Guidelines: {query}",
+                source="World Health Organization",
+                url="https://www.who.int/",
+                summary=f"WHO evidence-based guidelines and recommendations for {query}. The World Health Organization provides global health leadership and sets international health standards.",
+                type='authoritative_guideline',
+                reliability='very_high'
+            ),
+            Source(
+                title=f"CDC Health Information: {query}",
+                source="Centers for Disease Control",
+                url="https://www.cdc.gov/",
+                summary=f"CDC health surveillance data and prevention guidelines for {query}. The CDC monitors public health and provides evidence-based recommendations.",
+                type='public_health_authority',
+                reliability='very_high'
+            ),
+            Source(
+                title=f"NIH Medical Research: {query}",
+                source="National Institutes of Health",
+                url="https://www.nih.gov/",
+                summary=f"NIH research findings and medical information about {query}. The NIH is the primary federal agency conducting and supporting medical research.",
+                type='research_institution',
+                reliability='very_high'
+            ),
+            Source(
+                title=f"FDA Safety Information: {query}",
+                source="Food and Drug Administration",
+                url="https://www.fda.gov/",
+                summary=f"FDA regulatory information and safety data for {query}. The FDA ensures the safety and efficacy of drugs, devices, and food products.",
+                type='regulatory_authority',
+                reliability='very_high'
+            )
         ]
         
         return sources
     
     def _get_fallback_sources(self, query):
         """Fallback sources when PubMed fails"""
+        local_articles = search_local_pubmed(query, max_results=5)
+        if local_articles:
+            return local_articles + self._get_authoritative_sources(query)
+        
         return [
-            {
-                'title': f"Medical Literature Search: {query}",
-                'source': "PubMed Database",
-                'url': "https://pubmed.ncbi.nlm.nih.gov/",
-                'summary': "PubMed search temporarily unavailable. Please search directly on PubMed for peer-reviewed medical literature.",
-                'type': 'database_error',
-                'reliability': 'unknown'
-            }
+            Source(
+                title=f"Medical Literature Search: {query}",
+                source="PubMed Database",
+                url="https://pubmed.ncbi.nlm.nih.gov/",
+                summary="PubMed search temporarily unavailable. Please search directly on PubMed for peer-reviewed medical literature.",
+                type='database_error',
+                reliability='unknown'
+            )
         ] + self._get_authoritative_sources(query)
 
 class GroqMedicalDetector:
@@ -197,18 +241,17 @@ Focus on: dangerous medical claims, unproven treatments, harmful substances, con
                 result = response.json()
                 content = result['choices'][0]['message']['content']
                 
-                try:
-                    analysis = json.loads(content)
-                    return {
-                        'verdict': analysis.get('verdict', 'uncertain'),
-                        'confidence': analysis.get('confidence', 0.5),
-                        'reasoning': analysis.get('reasoning', 'Analysis unavailable'),
-                        'medical_entities': analysis.get('medical_entities', []),
-                        'risk_level': analysis.get('risk_level', 'medium'),
-                        'action_needed': analysis.get('action_needed', 'verify')
-                    }
-                except json.JSONDecodeError:
-                    return self._parse_fallback_response(content)
+                analysis = extract_json(content)
+                if analysis is not None:
+                    return DetectionResult(
+                        verdict=analysis.get('verdict', 'uncertain'),
+                        confidence=analysis.get('confidence', 0.5),
+                        reasoning=analysis.get('reasoning', 'Analysis unavailable'),
+                        medical_entities=analysis.get('medical_entities', []),
+                        risk_level=analysis.get('risk_level', 'medium'),
+                        action_needed=analysis.get('action_needed', 'verify')
+                    )
+                return self._parse_fallback_response(content)
             else:
                 print(f"Groq API error: {response.status_code}")
                 return self._get_fallback_analysis(text)
@@ -221,20 +264,18 @@ Focus on: dangerous medical claims, unproven treatments, harmful substances, con
         """Parse non-JSON response"""
         content_lower = content.lower()
         if "misinformation" in content_lower:
-            return {'verdict': 'misinformation', 'confidence': 0.8, 'reasoning': content[:200], 'medical_entities': [], 'risk_level': 'high', 'action_needed': 'consult_doctor'}
+            return DetectionResult('misinformation', 0.8, 'high', content[:200], action_needed='consult_doctor')
         elif "potential" in content_lower or "misleading" in content_lower:
-            return {'verdict': 'potential_misinformation', 'confidence': 0.6, 'reasoning': content[:200], 'medical_entities': [], 'risk_level': 'medium', 'action_needed': 'verify'}
+            return DetectionResult('potential_misinformation', 0.6, 'medium', content[:200], action_needed='verify')
         else:
-            return {'verdict': 'likely_accurate', 'confidence': 0.5, 'reasoning': content[:200], 'medical_entities': [], 'risk_level': 'low', 'action_needed': 'none'}
+            return DetectionResult('likely_accurate', 0.5, 'low', content[:200], action_needed='none')
     
     def _get_fallback_analysis(self, text):
         """Fallback analysis when API fails"""
-        dangerous_keywords = ['cure cancer', 'miracle cure', 'instant cure', 'bleach', 'poison', 'conspiracy']
-        
-        if any(keyword in text.lower() for keyword in dangerous_keywords):
-            return {'verdict': 'misinformation', 'confidence': 0.85, 'reasoning': 'Contains dangerous medical claims', 'medical_entities': [], 'risk_level': 'critical', 'action_needed': 'emergency'}
+        if get_lexicons().for_language(detect_language(text)).contains_any(text, 'fallback_dangerous'):
+            return DetectionResult('misinformation', 0.85, 'critical', 'Contains dangerous medical claims', action_needed='emergency')
         
-        return {'verdict': 'uncertain', 'confidence': 0.5, 'reasoning': 'Analysis service unavailable', 'medical_entities': [], 'risk_level': 'medium', 'action_needed': 'verify'}
+        return DetectionResult('uncertain', 0.5, 'medium', 'Analysis service unavailable', action_needed='verify')
 
 # Main integration functions
 def comprehensive_medical_search(query):
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Request Scheduler
+Priority classes, per-client rate limits and admission control in front of the verify pipeline
+"""
+
+import threading
+import time
+from collections import deque, OrderedDict
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+
+class TokenBucket:
+    """Thread-safe token bucket (rate tokens/sec, up to capacity)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available, without waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """Seconds until tokens would be available (0 if available now)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            missing = tokens - self.tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float('inf')
+
+class _Job:
+    """A queued unit of work"""
+    __slots__ = ('payload', 'priority', 'deadline', 'enqueued', 'started', 'done', 'result', 'error', 'cancelled')
+
+    def __init__(self, payload, priority, deadline):
+        self.payload = payload
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+class RequestScheduler:
+    """Bounded two-class scheduler with load shedding
+
+    Interactive jobs are always dequeued before batch jobs, and batch jobs may
+    only occupy (workers - reserved_interactive) workers at once, so a saturating
+    batch job never starves extension clicks. When a queue is full, a client is
+    over its rate limit, or a job misses its deadline, the degraded handler
+    answers immediately instead.
+    """
+
+    def __init__(self, handler, degraded_handler, workers=4, reserved_interactive=1,
+                 max_interactive_queue=32, max_batch_queue=64,
+                 client_rate=5.0, client_burst=10, batch_rate=50.0, batch_burst=100,
+                 interactive_timeout=10.0,
+                 batch_timeout=60.0, max_clients=10000):
+        self.handler = handler
+        self.degraded_handler = degraded_handler
+        self.workers = max(1, workers)
+        self.batch_limit = max(1, self.workers - reserved_interactive)
+        self.max_queue = {
+            PRIORITY_INTERACTIVE: max_interactive_queue,
+            PRIORITY_BATCH: max_batch_queue
+        }
+        self.timeouts = {
+            PRIORITY_INTERACTIVE: interactive_timeout,
+            PRIORITY_BATCH: batch_timeout
+        }
+        self.rate_limits = {
+            PRIORITY_INTERACTIVE: (client_rate, client_burst),
+            PRIORITY_BATCH: (batch_rate, batch_burst)
+        }
+        self.max_clients = max_clients
+
+        self.queues = {PRIORITY_INTERACTIVE: deque(), PRIORITY_BATCH: deque()}
+        self.running_batch = 0
+        self.condition = threading.Condition()
+        self.clients = OrderedDict()
+        self.clients_lock = threading.Lock()
+        self.stats = {
+            'completed': 0,
+            'shed_queue_full': 0,
+            'shed_rate_limited': 0,
+            'shed_deadline': 0,
+            'errors': 0
+        }
+        self.stopping = False
+
+        self.threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"scheduler-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _client_bucket(self, client_id, priority):
+        """Get (or create) the rate-limit bucket for a client and priority class, bounded LRU"""
+        key = (client_id, priority)
+        with self.clients_lock:
+            bucket = self.clients.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*self.rate_limits[priority])
+                self.clients[key] = bucket
+                if len(self.clients) > self.max_clients:
+                    self.clients.popitem(last=False)
+            else:
+                self.clients.move_to_end(key)
+            return bucket
+
+    def _degraded(self, payload, reason):
+        """Fast local answer used when a job is shed"""
+        with self.condition:
+            self.stats[f'shed_{reason}'] += 1
+        return self.degraded_handler(payload), {'degraded': True, 'reason': reason}
+
+    def admit(self, client_id, priority=PRIORITY_INTERACTIVE):
+        """Take one rate-limit token for a client's request (see submit's admitted)"""
+        if priority not in self.queues:
+            priority = PRIORITY_INTERACTIVE
+        return self._client_bucket(client_id, priority).try_acquire()
+
+    def submit(self, payload, priority=PRIORITY_INTERACTIVE, client_id='anonymous', timeout=None, admitted=None):
+        """Run payload through the handler, returns (result, info)
+
+        Each submit costs the client a rate-limit token, unless the request it
+        belongs to was already charged: admitted is admit()'s answer for a
+        multi-claim request (True runs the job, False sheds it as rate limited).
+        """
+        if priority not in self.queues:
+            priority = PRIORITY_INTERACTIVE
+
+        if admitted is None:
+            admitted = self._client_bucket(client_id, priority).try_acquire()
+        if not admitted:
+            return self._degraded(payload, 'rate_limited')
+
+        timeout = timeout if timeout is not None else self.timeouts[priority]
+        job = _Job(payload, priority, time.monotonic() + timeout)
+
+        with self.condition:
+            queue = self.queues[priority]
+            if len(queue) >= self.max_queue[priority]:
+                full = True
+            else:
+                full = False
+                queue.append(job)
+                self.condition.notify()
+        if full:
+            return self._degraded(payload, 'queue_full')
+
+        if not job.done.wait(timeout):
+            job.cancelled = True
+            return self._degraded(payload, 'deadline')
+
+        if job.error is not None:
+            with self.condition:
+                self.stats['errors'] += 1
+            return self.degraded_handler(payload), {'degraded': True, 'reason': 'error'}
+
+        return job.result, {'degraded': False, 'queued_ms': round((job.started - job.enqueued) * 1000, 1)}
+
+    def _next_job(self):
+        """Pick the next runnable job; caller holds the condition"""
+        if self.queues[PRIORITY_INTERACTIVE]:
+            return self.queues[PRIORITY_INTERACTIVE].popleft()
+        if self.queues[PRIORITY_BATCH] and self.running_batch < self.batch_limit:
+            self.running_batch += 1
+            return self.queues[PRIORITY_BATCH].popleft()
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                job = self._next_job()
+                while job is None:
+                    if self.stopping:
+                        return
+                    self.condition.wait()
+                    job = self._next_job()
+
+            try:
+                if job.cancelled or time.monotonic() > job.deadline:
+                    continue
+                job.started = time.monotonic()
+                try:
+                    job.result = self.handler(job.payload)
+                except Exception as e:
+                    job.error = e
+                job.done.set()
+            finally:
+                with self.condition:
+                    if job.priority == PRIORITY_BATCH:
+                        self.running_batch -= 1
+                        self.condition.notify()
+                    if job.done.is_set() and job.error is None:
+                        self.stats['completed'] += 1
+
+    def get_stats(self):
+        """Counters plus current queue depths"""
+        with self.condition:
+            stats = dict(self.stats)
+            stats['queued'] = {priority: len(queue) for priority, queue in self.queues.items()}
+            stats['running_batch'] = self.running_batch
+        return stats
+
+    def shutdown(self):
+        """Stop workers once queues are drained"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+
+if __name__ == "__main__":
+    # Test the module: a batch flood should not push interactive latency up
+    import math
+
+    def slow_handler(payload):
+        time.sleep(0.05)
+        return {'status': 'safe', 'text': payload}
+
+    def degraded_handler(payload):
+        return {'status': 'caution', 'text': payload}
+
+    scheduler = RequestScheduler(slow_handler, degraded_handler, workers=4,
+                                 client_rate=1000, client_burst=1000, batch_rate=1000, batch_burst=1000)
+
+    batch_threads = [
+        threading.Thread(target=scheduler.submit, args=(f"batch {i}", PRIORITY_BATCH, 'batch-job'))
+        for i in range(200)
+    ]
+    for thread in batch_threads:
+        thread.start()
+
+    latencies = []
+    for i in range(100):
+        start = time.monotonic()
+        scheduler.submit(f"click {i}", PRIORITY_INTERACTIVE, 'extension')
+        latencies.append((time.monotonic() - start) * 1000)
+
+    for thread in batch_threads:
+        thread.join()
+
+    latencies.sort()
+    # Nearest-rank percentiles (of 100 samples, so p99 is not simply the maximum)
+    percentile = lambda p: latencies[max(0, math.ceil(len(latencies) * p / 100) - 1)]
+    print(f"Interactive p50: {percentile(50):.0f} ms")
+    print(f"Interactive p99: {percentile(99):.0f} ms (max {latencies[-1]:.0f} ms)")
+    print(f"Stats: {scheduler.get_stats()}")
+    scheduler.shutdown()
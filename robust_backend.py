@@ -3,200 +3,489 @@
 Robust Backend for Extension Testing - Never stops!
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+from datetime import datetime
 import urllib.parse
-import traceback
-import signal
 import sys
+import time
+
+from request_scheduler import RequestScheduler, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from cpu_pool import run_cpu, start_cpu_pool, disable_cpu_pool
+from prefork_server import KeepAliveHandler, serve
+from http_compression import encode_body
+from medical_types import VerificationResult
+from fast_json import dumps, dumps_list, loads, StaticJSON
+from rule_engine import classify_claim, get_rule_engine, rules_cache_version
+from lexicon_store import get_lexicons, lexicon_version
+from phase3_nlp_preprocessing import detect_language
+from source_providers import get_provider_stats
+from page_scan import BlockCache, scan_blocks
+
+# Extension-facing status for each phase 4 verdict
+VERDICT_STATUS = {
+    'misinformation': 'harmful',
+    'potential_misinformation': 'caution',
+    'uncertain': 'caution',
+    'likely_accurate': 'safe'
+}
+
+# Scheduling priority per endpoint. It is decided here and never taken from
+# the request: a click in the extension is interactive, bulk jobs and page
+# scans queue behind it, whatever the client asks for.
+ENDPOINT_PRIORITY = {
+    '/api/verify': PRIORITY_INTERACTIVE,
+    '/api/verify/batch': PRIORITY_BATCH,
+    '/api/scan': PRIORITY_BATCH
+}
+
+# Source links for server error responses, JSON-encoded once (see fast_json)
+ERROR_SOURCES = StaticJSON([
+    'https://www.who.int/',
+    'https://www.cdc.gov/healthliteracy/',
+    'https://medlineplus.gov/'
+])
+
+def pattern_engine_verification(text):
+    """Degraded answer from the local phase 4 pattern engine (no network calls)"""
+    try:
+        from phase4_misinformation_detection import pattern_based_detection
+    except ImportError:
+        return classify_claim(text)
+    
+    # Pattern scanning is CPU-bound; long texts run in the worker pool
+    analysis = run_cpu(pattern_based_detection, text)
+    result = classify_claim(text)
+    result['status'] = VERDICT_STATUS.get(analysis['verdict'], 'caution')
+    result['explanation'] = f"{analysis['reasoning']}. {analysis['action_needed']}"
+    result['lexicon_version'] = analysis.get('lexicon_version')
+    return result
+
+def ai_pipeline_verification(text):
+    """Full Groq detection + trusted sources + Gemini fact-check for a claim"""
+    from phase4_misinformation_detection import detect_misinformation
+    from phase5_trusted_source_retrieval import retrieve_trusted_sources
+    from phase6_fact_correction import gemini_fact_correction
+    
+    stage_ms = {}
+    start = time.perf_counter()
+    analysis = detect_misinformation(text)
+    stage_ms['detection'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sources = retrieve_trusted_sources(text, max_results=5)
+    stage_ms['sources'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    fact_check = gemini_fact_correction(text, sources, analysis)
+    stage_ms['fact_check'] = (time.perf_counter() - start) * 1000
+    
+    try:
+        from claim_index import record_verified_claim
+        record_verified_claim(text, analysis, fact_check)
+    except ImportError:
+        pass
+    except Exception as e:
+        # Indexing is a side effect: the verdict is done and must still be returned
+        print(f"⚠️ Could not index verified claim: {e}")
+    
+    result = VerificationResult(
+        status=VERDICT_STATUS.get(analysis.get('verdict'), 'caution'),
+        corrected_fact=fact_check,
+        explanation=analysis.get('reasoning', ''),
+        source_links=[s['url'] for s in sources[:3] if s.get('url')],
+        confidence=analysis.get('confidence', 0.5),
+        risk_level=analysis.get('risk_level', 'medium')
+    )
+    result['stage_ms'] = stage_ms
+    return result
+
+def result_from_cache(record):
+    """Verification result rebuilt from a compact shared-cache record
+
+    A classification rule's verdict comes back as that rule's own response,
+    exactly as a fresh classification would return it.
+    """
+    rule = get_rule_engine().ruleset.rule_by_id(record.get('rule_id'))
+    if rule is not None:
+        return rule.result.copy()
+    return VerificationResult(
+        status=record['status'],
+        corrected_fact=CACHED_FACTS.get(record['status'], CACHED_FACTS['caution']),
+        explanation=f"Previously verified (risk level: {record['risk_level']}, confidence {record['confidence']:.0%}).",
+        source_links=record['source_links'],
+        confidence=record['confidence'],
+        risk_level=record['risk_level']
+    )
+
+# Headline per status for answers served from the shared verdict cache
+CACHED_FACTS = {
+    'harmful': "⚠️ DANGEROUS: This claim is harmful misinformation that could cause serious health risks.",
+    'caution': "⚠️ CAUTION: This claim needs verification with trusted medical sources.",
+    'safe': "✅ SAFE: This information aligns with established medical guidelines."
+}
+
+def verify_claim(text, priority, client_id, observe=True, admitted=None):
+    """Shared cache first, then the scheduler; fresh non-degraded verdicts are shared with all workers
+
+    observe=False keeps replays (cache warm-up) out of trending claims and the verification log.
+    admitted: SCHEDULER.admit() for the whole request, when one request verifies many claims.
+    """
+    start = time.perf_counter()
+    # Entries made under other rules or lexicons are misses, so a hot reload applies at once
+    version = cache_version()
+    if VERDICT_CACHE is not None:
+        record = VERDICT_CACHE.get(text, version)
+        if record:
+            result, info = result_from_cache(record), {'degraded': False, 'cached': True}
+            if observe:
+                record_verification(text, result, info, start)
+            return result, info
+    
+    result, info = SCHEDULER.submit(text, priority, client_id, admitted=admitted)
+    if VERDICT_CACHE is not None and not info['degraded']:
+        VERDICT_CACHE.put(text, result['status'], result.get('confidence', 0.5),
+                          result.get('risk_level', 'medium'), result['source_links'],
+                          version=version, rule_id=get_rule_engine().ruleset.rule_id(result))
+    if observe:
+        record_verification(text, result, info, start)
+    return result, info
+
+def record_verification(text, result, info, start):
+    """Count the claim for /api/trending and queue an event for the analytics log (if LOG_VERIFICATIONS)"""
+    if not text:
+        return
+    get_trending().observe(text, result['status'])
+    if LOG_VERIFICATIONS:
+        from verification_log import log_event, make_event
+        log_event(make_event(text, result['status'], 'robust_backend', confidence=result.get('confidence'),
+                             degraded=info['degraded'], cached=info.get('cached', False),
+                             total_ms=(time.perf_counter() - start) * 1000,
+                             stage_ms=result.get('stage_ms'), sources=result['source_links']))
+
+def cache_version():
+    """Version of everything verdicts depend on (rules and lexicons); clients key their caches on it"""
+    return f"{rules_cache_version()}.l{lexicon_version()}"
+
+def build_status():
+    """Cheap /status body: liveness plus the current cache version"""
+    return {'status': 'ok', 'cache_version': cache_version(), 'rules_version': get_rule_engine().ruleset.version,
+            'lexicon_version': lexicon_version(), 'warming': warming()}
+
+def warming():
+    """True while this process's cache warm-up is still replaying seeds"""
+    return WARMUP is not None and not WARMUP.ready
+
+def build_verify_response(text, result, info):
+    """Extension response for a verification result"""
+    response = {
+        'status': result['status'],
+        'corrected_fact': result['corrected_fact'],
+        'explanation': result['explanation'],
+        'source_links': result['source_links'],
+        'degraded': info['degraded'],
+        'cached': info.get('cached', False),
+        'original_text': text[:100] + ('...' if len(text) > 100 else ''),
+        'verification_timestamp': datetime.now().isoformat(),
+        'lexicon_version': result.get('lexicon_version') or lexicon_version(),
+        'cache_version': cache_version()
+    }
+    return response
+
+def build_stats(server=None):
+    """Metrics for /api/stats (this worker process)"""
+    return {
+        'transport': server.get_transport_stats() if server is not None else None,
+        'lexicon_version': lexicon_version(),
+        'rules_version': get_rule_engine().ruleset.version,
+        'scheduler': SCHEDULER.get_stats(),
+        'verdict_cache': VERDICT_CACHE.get_stats() if VERDICT_CACHE is not None else None,
+        'source_providers': get_provider_stats(),
+        'block_cache': BLOCK_CACHE.get_stats(),
+        'language_detection': detect_language.cache_info()._asdict(),
+        'trending': get_trending().get_stats(),
+        'warmup': WARMUP.progress() if WARMUP is not None else None,
+        'verification_log': verification_log_stats() if LOG_VERIFICATIONS else None
+    }
+
+def verification_log_stats():
+    """Analytics log writer stats (verification_log is imported only when logging is on)"""
+    from verification_log import get_verification_log
+    return get_verification_log().get_stats()
+
+def get_trending():
+    """This process's trending-claims window, created on first use"""
+    global TRENDING
+    if TRENDING is None:
+        from trending_claims import TrendingClaims
+        TRENDING = TrendingClaims()
+    return TRENDING
+
+def build_scheduler(ai=False):
+    """Scheduler in front of the verification handler"""
+    if ai:
+        # Groq/Gemini pipeline behind the scheduler; pattern engine answers shed requests
+        return RequestScheduler(ai_pipeline_verification, pattern_engine_verification,
+                                workers=8, interactive_timeout=20.0, batch_timeout=120.0)
+    # Rules mode: a shed request gets the plain rule verdict, no dearer than the normal path
+    return RequestScheduler(classify_claim, classify_claim)
+
+# Built per serving process in __main__ (scheduler threads do not survive fork)
+SCHEDULER = None
+# Created once before forking and shared by every worker process
+VERDICT_CACHE = None
+# Page-scan verdicts by block hash (per serving process)
+BLOCK_CACHE = BlockCache()
+# Most-verified claims over the last hour (per serving process, see get_trending)
+TRENDING = None
+# Seed replay started per serving process in __main__ (with a verdict cache, unless --no-warmup)
+WARMUP = None
+# Verification events go to verification_log/ (enabled in __main__ unless --no-log)
+LOG_VERIFICATIONS = False
+
+# Constant response bodies, encoded once
+HEALTH_BODY = dumps({'status': 'healthy', 'service': 'Medical Fact Verifier'})
+FAVICON_BODY = dumps({'message': 'No favicon available'})
+INFO_BODY = dumps({'service': 'Medical Fact Verifier API', 'status': 'running'})
+NOT_FOUND_BODY = dumps({'error': 'Not found'})
+SERVER_ERROR_BODY = dumps({'error': 'Server error'})
+
+JSON_HEADERS = (('Content-Type', 'application/json'), ('Access-Control-Allow-Origin', '*'))
+# Chrome caps preflight caching at 2 hours; within that, an extension makes one per origin
+PREFLIGHT_HEADERS = (
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type, X-Priority, X-Client-Id'),
+    ('Access-Control-Max-Age', '7200')
+)
+
+class MedicalFactHandler(KeepAliveHandler):
+    """Persistent HTTP/1.1 connections; large JSON bodies are compressed when the client accepts it"""
 
-class MedicalFactHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
         """Override to provide better logging"""
         print(f"🌐 {self.address_string()} - {format % args}")
     
+    def send_json(self, code, body):
+        """Encoded JSON body with CORS headers and Content-Length, compressed when large"""
+        sent, encoding = encode_body(body, self.headers.get('Accept-Encoding'))
+        self.send_body(code, sent, JSON_HEADERS, encoding, raw_length=len(body))
+    
+    def send_error_json(self, body):
+        """500 response; the connection is closed in case the failure left it mid-request"""
+        self.close_connection = True
+        try:
+            self.send_json(500, body)
+        except OSError:
+            pass
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         try:
-            self.send_response(200)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
+            self.server.count(preflights=1)
+            self.send_body(200, b'', PREFLIGHT_HEADERS)
             print("✅ CORS preflight handled")
         except Exception as e:
             print(f"❌ CORS error: {e}")
+            self.close_connection = True
     
     def do_GET(self):
         """Handle GET requests"""
         try:
             print(f"📥 GET request: {self.path}")
+            path, _, query = self.path.partition('?')
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            if self.path == '/api/health':
-                response = {'status': 'healthy', 'service': 'Medical Fact Verifier'}
+            if path == '/api/trending':
+                n = urllib.parse.parse_qs(query).get('n', ['10'])[0]
+                n = min(max(int(n), 1), 100) if n.isdigit() else 10
+                trending = get_trending()
+                body = dumps({'trending': trending.top(n), 'window_minutes': trending.bucket_seconds * trending.window_buckets // 60})
+                print("🔥 Trending claims requested")
+            elif path == '/api/health' and warming():
+                # Not healthy yet: load balancers and deploy scripts wait for the caches
+                self.send_json(503, dumps({'status': 'warming', 'service': 'Medical Fact Verifier',
+                                           'warmup': WARMUP.progress()}))
+                print("🔥 Health check: still warming up")
+                return
+            elif path == '/api/health':
+                body = HEALTH_BODY
                 print("💚 Health check requested")
-            elif self.path == '/favicon.ico':
-                response = {'message': 'No favicon available'}
+            elif path == '/status':
+                body = dumps(build_status())
+            elif path == '/api/stats':
+                body = dumps(build_stats(self.server))
+                print("📊 Stats requested")
+            elif path == '/favicon.ico':
+                body = FAVICON_BODY
                 print("🎨 Favicon requested")
             else:
-                response = {'service': 'Medical Fact Verifier API', 'status': 'running'}
+                body = INFO_BODY
                 print("📋 Default API info sent")
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(200, body)
             print(f"✅ GET response sent successfully")
             
         except Exception as e:
             print(f"❌ GET error: {e}")
+            import traceback  # error path only, kept off the import-time budget
             traceback.print_exc()
-            try:
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': 'Server error'}).encode())
-            except:
-                pass
+            self.send_error_json(SERVER_ERROR_BODY)
     
     def do_POST(self):
         """Handle POST requests"""
         try:
             print(f"📥 POST request: {self.path}")
+            # Read before routing: an unread body would be parsed as the connection's next request
+            post_data = self.read_body()
             
             if self.path == '/api/verify':
-                content_length = int(self.headers.get('Content-Length', 0))
-                if content_length > 0:
-                    post_data = self.rfile.read(content_length)
-                    data = json.loads(post_data.decode('utf-8'))
+                if post_data:
+                    data = loads(post_data)
                     text = data.get('text', '').lower()
                     print(f"🔍 Verifying: {text[:50]}...")
                 else:
+                    data = {}
                     text = ""
                     print("⚠️ Empty POST data")
                 
-                # Enhanced classification logic with detailed responses
-                if any(word in text for word in ['cure cancer', 'bleach', 'drinking bleach', 'vaccines cause autism', 'essential oils cure', 'miracle cure']):
-                    status = 'harmful'
-                    fact = "⚠️ DANGEROUS: This claim is harmful misinformation that could cause serious health risks."
-                    explanation = "Medical misinformation can lead to dangerous self-treatment, delayed medical care, or rejection of proven treatments. Always consult healthcare professionals for medical advice."
-                    sources = [
-                        'https://www.who.int/news-room/feature-stories/detail/how-to-report-misinformation-online',
-                        'https://www.cdc.gov/healthliteracy/researchevaluate.html',
-                        'https://pubmed.ncbi.nlm.nih.gov/34234532/'
-                    ]
-                elif any(word in text for word in ['natural remedy', 'herbal medicine', 'supplement', 'alternative treatment']):
-                    status = 'caution'
-                    fact = "⚠️ CAUTION: Natural remedies may have benefits but require professional medical verification."
-                    explanation = "While some natural treatments have evidence, others may be unproven or interact dangerously with medications. Always discuss with your healthcare provider before trying alternatives."
-                    sources = [
-                        'https://www.nccih.nih.gov/health/be-an-informed-consumer',
-                        'https://www.fda.gov/consumers/consumer-updates/dietary-supplements',
-                        'https://pubmed.ncbi.nlm.nih.gov/'
-                    ]
-                elif any(word in text for word in ['vaccine', 'vaccination', 'exercise', 'diet', 'nutrition', 'sleep', 'hydration']):
-                    status = 'safe'
-                    fact = "✅ SAFE: This information aligns with established medical guidelines."
-                    explanation = "This content appears to follow evidence-based medical recommendations. However, individual health needs vary, so consult your healthcare provider for personalized advice."
-                    sources = [
-                        'https://www.cdc.gov/vaccines/vac-gen/side-effects.htm',
-                        'https://www.who.int/news-room/fact-sheets/detail/physical-activity',
-                        'https://www.nih.gov/health-information'
-                    ]
-                else:
-                    status = 'safe'
-                    fact = "ℹ️ This information appears to be general health guidance."
-                    explanation = "While this content doesn't appear harmful, always verify health information with qualified healthcare professionals."
-                    sources = [
-                        'https://www.who.int/',
-                        'https://www.cdc.gov/',
-                        'https://pubmed.ncbi.nlm.nih.gov/'
-                    ]
-                
-                response = {
-                    'status': status,
-                    'corrected_fact': fact,
-                    'explanation': explanation,
-                    'source_links': sources,
-                    'original_text': text[:100] + ('...' if len(text) > 100 else ''),
-                    'verification_timestamp': __import__('datetime').datetime.now().isoformat()
-                }
+                client_id = self.headers.get('X-Client-Id') or self.client_address[0]
+                result, info = verify_claim(text, ENDPOINT_PRIORITY[self.path], client_id)
+                status = result['status']
+                response = build_verify_response(text, result, info)
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(200, dumps(response))
                 
                 print(f"✅ Verification response sent: {status}")
+            elif self.path == '/api/verify/batch':
+                data = loads(post_data) if post_data else {}
+                texts = [t.lower() for t in data.get('texts', [])]
+                client_id = self.headers.get('X-Client-Id') or self.client_address[0]
+                print(f"📦 Batch verification: {len(texts)} claims")
+                
+                # Batch jobs always run at batch priority so extension clicks go first.
+                # The client's rate limit is charged once for the request, not per claim.
+                priority = ENDPOINT_PRIORITY[self.path]
+                admitted = SCHEDULER.admit(client_id, priority)
+                results = []
+                for text in texts:
+                    result, info = verify_claim(text, priority, client_id, admitted=admitted)
+                    results.append(build_verify_response(text, result, info))
+                
+                self.send_json(200, dumps_list('results', results))
+                
+                print(f"✅ Batch response sent: {len(results)} results")
+            elif self.path == '/api/scan':
+                data = loads(post_data) if post_data else {}
+                client_id = self.headers.get('X-Client-Id') or self.client_address[0]
+                
+                # Page blocks are background work: they queue behind extension clicks,
+                # and a scan is charged once against the client's rate limit
+                version = cache_version()
+                priority = ENDPOINT_PRIORITY[self.path]
+                admitted = SCHEDULER.admit(client_id, priority)
+                results, unknown, counts = scan_blocks(
+                    data.get('blocks', []),
+                    lambda text: verify_claim(text, priority, client_id, admitted=admitted),
+                    BLOCK_CACHE,
+                    version
+                )
+                
+                self.send_json(200, dumps({'results': results, 'unknown': unknown, 'counts': counts,
+                                           'cache_version': version}))
+                
+                print(f"✅ Page scan: {counts['new']} new, {counts['cached']} cached, {len(unknown)} unknown blocks")
             else:
                 print(f"❓ Unknown POST path: {self.path}")
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': 'Not found'}).encode())
+                self.send_json(404, NOT_FOUND_BODY)
                 
         except Exception as e:
             print(f"❌ POST error: {e}")
+            import traceback
             traceback.print_exc()
-            try:
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                error_response = {
-                    'status': 'error',
-                    'corrected_fact': '❌ Unable to verify this medical claim due to a server error.',
-                    'explanation': 'The verification service encountered an error. Please try again or consult healthcare professionals for medical advice.',
-                    'source_links': [
-                        'https://www.who.int/',
-                        'https://www.cdc.gov/healthliteracy/',
-                        'https://medlineplus.gov/'
-                    ],
-                    'original_text': '',
-                    'verification_timestamp': __import__('datetime').datetime.now().isoformat()
-                }
-                self.wfile.write(json.dumps(error_response).encode())
-            except:
-                pass
-
-def signal_handler(sig, frame):
-    """Handle Ctrl+C gracefully"""
-    print('\n🛑 Received interrupt signal')
-    print('👋 Server shutting down gracefully...')
-    sys.exit(0)
+            error_response = {
+                'status': 'error',
+                'corrected_fact': '❌ Unable to verify this medical claim due to a server error.',
+                'explanation': 'The verification service encountered an error. Please try again or consult healthcare professionals for medical advice.',
+                'source_links': ERROR_SOURCES,
+                'original_text': '',
+                'verification_timestamp': datetime.now().isoformat()
+            }
+            self.send_error_json(dumps(error_response))
+
+def get_option(name, default):
+    """Value following a --name command-line flag"""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
 
 if __name__ == '__main__':
-    # Set up signal handler for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
+    ai_mode = '--ai' in sys.argv
+    host = get_option('--host', 'localhost')
+    port = int(get_option('--port', 5000))
+    workers = int(get_option('--workers', 1))
+    cpu_workers = get_option('--cpu-workers', None)
+    LOG_VERIFICATIONS = '--no-log' not in sys.argv
+    # AI verdicts are expensive: one worker's answer becomes every worker's cache hit
+    shared_cache = ai_mode or '--shared-cache' in sys.argv
+    # Without a verdict cache there is nothing to warm
+    warmup = shared_cache and '--no-warmup' not in sys.argv
+    warmup_rate = float(get_option('--warmup-rate', 5))
+    warmup_from = get_option('--warmup-from', None)
     
     print("🏥 ROBUST Medical Fact Verifier Backend Server")
     print("=" * 50)
-    print("📍 Server: http://localhost:5000")
-    print("🔗 API: http://localhost:5000/api/verify")
-    print("💚 Health: http://localhost:5000/api/health")
+    print(f"📍 Server: http://{host}:{port}")
+    print(f"🔗 API: http://{host}:{port}/api/verify")
+    print(f"💚 Health: http://{host}:{port}/api/health")
     print("✅ CORS enabled for browser extension")
     print("🛡️ Error handling: ROBUST mode")
+    print(f"🚦 Scheduler: {'AI pipeline' if ai_mode else 'keyword rules'}")
+    print(f"👷 Serving processes: {workers}")
+    if LOG_VERIFICATIONS:
+        from verification_log import get_verification_log
+    print(f"📝 Verification log: {get_verification_log().log_dir if LOG_VERIFICATIONS else 'off'}")
+    print(f"🔥 Cache warm-up: {f'{warmup_rate:g} claims/s' if warmup else 'off' if shared_cache else 'off (no verdict cache)'}"
+          f"{f', trending from {warmup_from}' if warmup_from else ''}")
     print("=" * 50)
     
-    server = HTTPServer(('localhost', 5000), MedicalFactHandler)
-    
+    def start_worker(worker_id):
+        """Per-process setup, run in each pre-forked worker (or once in single-process mode)"""
+        global SCHEDULER, WARMUP
+        SCHEDULER = build_scheduler(ai_mode)
+        if workers > 1:
+            # Pre-forked workers already spread over the cores
+            disable_cpu_pool()
+            # NCBI's limit is per client, not per process: each worker gets its share
+            from upstream_rate_limiter import set_rate_share
+            set_rate_share(1 / workers)
+        else:
+            _, started = start_cpu_pool(int(cpu_workers) if cpu_workers else None)
+            print(f"🧮 CPU pool: {started} warm worker processes")
+        if warmup:
+            from cache_warmup import CacheWarmup
+            # Each process replays its own share of the seeds into the shared cache: no seed is
+            # verified twice, and the split rate adds up to warmup_rate for the whole server.
+            # Respawned workers count on from `workers`, hence the modulo.
+            WARMUP = CacheWarmup(lambda text: verify_claim(text.lower(), PRIORITY_BATCH, 'cache-warmup', observe=False),
+                                 rate=warmup_rate / workers, shard=(worker_id % workers, workers),
+                                 seed_options={'trending_url': warmup_from}).start()
+
+    if shared_cache:
+        from shared_verdict_cache import SharedVerdictCache
+        VERDICT_CACHE = SharedVerdictCache()
+        print(f"🧠 Shared verdict cache: {VERDICT_CACHE.slots} slots, {VERDICT_CACHE.get_stats()['memory_bytes'] // 1024} KB")
+
+    # Compiled once before forking, so workers share it and no first request pays for it
+    get_lexicons()
+
     try:
         print("🚀 Server starting in ROBUST mode...")
-        print("💡 Press Ctrl+C to stop")
-        print("🔄 Server will keep running until manually stopped")
+        print("💡 Press Ctrl+C to stop (in-flight requests are drained)")
+        if workers > 1:
+            print("🔄 kill -HUP <supervisor pid> to reload workers gracefully")
         print("-" * 50)
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\n🛑 Server stopped by user")
+        serve(MedicalFactHandler, host, port, workers, on_worker_start=start_worker)
     except Exception as e:
         print(f"\n💥 Server crashed: {e}")
+        import traceback
         traceback.print_exc()
     finally:
-        print("🧹 Cleaning up...")
-        server.server_close()
+        if VERDICT_CACHE is not None:
+            VERDICT_CACHE.close(unlink=True)
         print("👋 Goodbye!")
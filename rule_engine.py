@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Classification Rule Engine
+Keyword tiers shared by every backend (harmful / caution / safe), loaded from
+data/classification_rules.json and compiled into one trie-shaped regular
+expression, so a claim is classified in a single pass of the C regex engine.
+Tiers may add keywords per language; claims phase 3 detects in such a language
+are matched against that language's own expression. The rules file is re-read
+when it changes.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+from medical_types import VerificationResult
+from fast_json import dumps, StaticJSON
+from phase3_nlp_preprocessing import detect_language, match_form
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'classification_rules.json')
+
+# Seconds between checks of the rules file's modification time
+RELOAD_CHECK_INTERVAL = 2.0
+
+class Rule:
+    """One tier with its response precomputed: a result template and its encoded JSON body"""
+
+    __slots__ = ('name', 'status', 'keywords', 'keywords_by_language', 'result', 'payload', 'body')
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.status = spec['status']
+        self.keywords = spec.get('keywords', [])
+        self.keywords_by_language = spec.get('keywords_by_language', {})
+        links = StaticJSON(spec.get('source_links', []))
+        self.result = VerificationResult(self.status, spec['corrected_fact'], spec['explanation'], links)
+        self.payload = self.result.to_dict()
+        self.body = dumps(self.payload)
+
+def compile_keywords(keywords):
+    """One regex matching any of the (lowercase) keywords, shaped as a trie
+
+    A flat 'a|b|c' alternation retries every keyword at every position; the
+    trie shares prefixes, so each position costs one walk down the tree. Longer
+    keywords win over their own prefixes ('essential oils cure' over 'essential oils').
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return re.compile(build(trie)) if keywords else None
+
+class RuleSet:
+    """Immutable compiled rules; replaced as a whole on reload"""
+
+    def __init__(self, data, mtime=0.0, fingerprint='0'):
+        self.version = data.get('version', 0)
+        self.mtime = mtime
+        # Changes whenever the rules do, and is the same on every server with the same file
+        self.cache_version = f"r{self.version}.{fingerprint}"
+        self.rules = [Rule(spec) for spec in data.get('tiers', [])]
+        self.default = Rule(data['default'])
+        # Tiers then the default: a rule's position is its id in compact caches
+        self.by_id = self.rules + [self.default]
+
+        self.tiers, self.pattern = self._compile()
+        # (tiers, pattern) per language with keywords of its own; English keywords included
+        languages = sorted({language for rule in self.rules for language in rule.keywords_by_language})
+        self.languages = {language: self._compile(language) for language in languages}
+
+    def rule_id(self, result):
+        """Id of the rule whose unmodified response a result is, else None"""
+        for rule_id, rule in enumerate(self.by_id):
+            if (result.get('status') == rule.status and result.get('corrected_fact') == rule.result.corrected_fact
+                    and result.get('explanation') == rule.result.explanation):
+                return rule_id
+        return None
+
+    def rule_by_id(self, rule_id):
+        """Rule with an id from rule_id(), or None"""
+        return self.by_id[rule_id] if rule_id is not None and 0 <= rule_id < len(self.by_id) else None
+
+    def _compile(self, language=None):
+        # Tier of each keyword, lowered to the best tier of any keyword inside it:
+        # matches do not overlap, so 'drinking bleach' must count as 'bleach' would
+        tiers = {}
+        for tier, rule in enumerate(self.rules):
+            keywords = [keyword.lower() for keyword in rule.keywords]
+            if language is not None:
+                keywords = [match_form(keyword, language)
+                            for keyword in keywords + rule.keywords_by_language.get(language, [])]
+            for keyword in keywords:
+                tiers.setdefault(keyword, tier)
+        tiers = {keyword: min(other_tier for other, other_tier in tiers.items() if other in keyword)
+                 for keyword in tiers}
+        return tiers, compile_keywords(list(tiers))
+
+    def classify(self, text, language=None):
+        """First tier (in file order) with a keyword in the text, else the default rule
+
+        With per-language keywords in the rules, the claim's language is detected
+        unless given.
+        """
+        compiled = None
+        if self.languages:
+            language = language or detect_language(text)
+            compiled = self.languages.get(language)
+        if compiled is None:
+            tiers, pattern = self.tiers, self.pattern
+            text = text.lower()
+        else:
+            tiers, pattern = compiled
+            text = match_form(text, language)
+        best = len(self.rules)
+        if pattern is not None:
+            for match in pattern.finditer(text):
+                tier = tiers[match.group()]
+                if tier < best:
+                    best = tier
+                    if best == 0:
+                        break
+        return self.rules[best] if best < len(self.rules) else self.default
+
+class RuleEngine:
+    """Rules file compiled into a RuleSet, recompiled when the file changes"""
+
+    def __init__(self, path=RULES_PATH, check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.reload_lock = threading.Lock()
+        self.next_check = time.monotonic() + check_interval
+        self.ruleset = self._load()
+        self.seen_mtime = self.ruleset.mtime
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        return RuleSet(json.loads(raw), mtime, f"{zlib.crc32(raw):08x}")
+
+    def maybe_reload(self):
+        """Recompile if the file changed; a broken file keeps the current rules"""
+        now = time.monotonic()
+        if now < self.next_check or not self.reload_lock.acquire(blocking=False):
+            return
+        try:
+            self.next_check = now + self.check_interval
+            mtime = os.path.getmtime(self.path)
+            if mtime == self.seen_mtime:
+                return
+            # Remembered before parsing, so a broken file is reported once, not on every check
+            self.seen_mtime = mtime
+            ruleset = self._load()
+            # Single reference swap: requests already holding the old set finish with it
+            self.ruleset = ruleset
+            print(f"🔁 Classification rules reloaded (version {ruleset.version}, {len(ruleset.rules)} tiers)")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Keeping current classification rules, reload failed: {e}")
+        finally:
+            self.reload_lock.release()
+
+    def classify(self, text, language=None):
+        """Rule for a claim (any case)"""
+        self.maybe_reload()
+        return self.ruleset.classify(text, language)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine():
+    """Process-wide rule engine, loaded on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RuleEngine()
+        return _engine
+
+def classify(text, language=None):
+    """Matching rule for a claim; rule.body is its ready-to-send JSON response"""
+    return get_rule_engine().classify(text, language)
+
+def rules_cache_version():
+    """Cache version of the active rules (clients drop verdicts cached under another one)"""
+    engine = get_rule_engine()
+    engine.maybe_reload()
+    return engine.ruleset.cache_version
+
+def classify_claim(text):
+    """Verification result for a claim (a fresh copy callers may modify)"""
+    return classify(text).result.copy()
+
+if __name__ == "__main__":
+    # Test the module: classification and per-claim cost
+    claims = [
+        "Drinking bleach cures COVID-19",
+        "This herbal medicine boosts immunity",
+        "Regular exercise improves sleep",
+        "The hospital opens at nine",
+        "Tomar dióxido de cloro elimina el virus",
+        "Este remedio casero baja el azúcar",
+        "आयुर्वेदिक काढ़ा पीने से इम्युनिटी बढ़ती है",
+    ]
+    for claim in claims:
+        rule = classify(claim)
+        print(f"  {rule.name:9s} ({rule.status:7s}) ← {claim}")
+
+    engine = get_rule_engine()
+    text = "Many people say a natural remedy works, but exercise and diet matter more. " * 4
+    start = time.perf_counter()
+    for _ in range(20000):
+        engine.classify(text)
+    print(f"⚡ {(time.perf_counter() - start) * 1e6 / 20000:.1f} µs per {len(text)}-char claim "
+          f"(rules version {engine.ruleset.version})")
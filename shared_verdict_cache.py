@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Shared Verdict Cache
+Fixed-size hash table in shared memory mapping normalized-claim hashes to compact
+verdict records, shared by every backend worker process
+
+Layout of the verdict segment (all little-endian):
+  slot = seq uint32 | key uint64 | status u8 | risk u8 | n_sources u8 | rule u8 |
+         confidence float32 | stored_at uint32 | 6 x source id uint16 | version uint32 (40 bytes)
+
+version is a CRC of the cache version (rules and lexicons) the verdict was made
+under; a lookup under another version is a miss, so a hot reload takes effect in
+every worker at once. rule is the classification rule whose response the verdict
+is (NO_RULE for pipeline verdicts), so a hit can return that rule's exact payload.
+
+Slots are grouped into 8-way buckets (set-associative): a claim lives in the bucket
+its hash selects, and a full bucket evicts its oldest record, so memory never grows.
+Readers take no locks: each slot carries a sequence number that writers make odd
+while writing (seqlock), and a reader retries if it changes under it. Writers lock
+only their bucket's stripe, so unrelated claims rarely contend.
+
+Source URLs are interned in a second table (one 256-byte slot per URL); a verdict
+stores up to six 16-bit source ids instead of the URLs themselves.
+"""
+
+import hashlib
+import multiprocessing
+import re
+import struct
+import time
+import unicodedata
+import zlib
+from multiprocessing import shared_memory
+
+SLOT = struct.Struct('<IQBBBBfI6HI')
+SEQ = struct.Struct('<I')
+SOURCE_HEADER = struct.Struct('<QH')
+SOURCE_SLOT_SIZE = 256
+MAX_URL_BYTES = SOURCE_SLOT_SIZE - SOURCE_HEADER.size
+MAX_SOURCES = 6
+NO_SOURCE = 0xFFFF
+NO_RULE = 0xFF
+
+STATUSES = ['safe', 'caution', 'harmful', 'error']
+RISK_LEVELS = ['low', 'medium', 'high', 'critical']
+
+DEFAULT_SLOTS = 1 << 16        # 64k verdicts, 2.5 MB
+DEFAULT_SOURCE_SLOTS = 4096    # 4k distinct URLs, 1 MB
+DEFAULT_TTL = 24 * 3600
+BUCKET_SIZE = 8                # slots per bucket (ways)
+LOCK_STRIPES = 64
+READ_RETRIES = 4
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+def claim_key(text):
+    """Stable 64-bit key of a normalized claim (identical in every process; never 0)"""
+    normalized = ' '.join(_WORD_RE.findall(unicodedata.normalize('NFKC', text).lower()))
+    key = int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'little')
+    return key or 1
+
+def version_tag(version):
+    """32-bit tag of a cache version string, as stored in each slot"""
+    return zlib.crc32(str(version).encode('utf-8'))
+
+def _url_key(url):
+    key = int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+    return key or 1
+
+class SharedVerdictCache:
+    """Verdict table shared across forked worker processes
+
+    Create it in the parent before forking; children inherit the mapping and the
+    writer locks. Memory is fixed at creation, independent of the worker count.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, source_slots=DEFAULT_SOURCE_SLOTS, ttl=DEFAULT_TTL):
+        self.buckets = max(1, slots // BUCKET_SIZE)
+        slots = self.buckets * BUCKET_SIZE
+        self.slots = slots
+        self.source_slots = source_slots
+        self.ttl = ttl
+        self.verdicts = shared_memory.SharedMemory(create=True, size=slots * SLOT.size)
+        self.sources = shared_memory.SharedMemory(create=True, size=source_slots * SOURCE_SLOT_SIZE)
+        self.verdicts.buf[:] = bytes(len(self.verdicts.buf))
+        self.sources.buf[:] = bytes(len(self.sources.buf))
+        self.locks = [multiprocessing.Lock() for _ in range(LOCK_STRIPES)]
+        self.source_lock = multiprocessing.Lock()
+        self.source_ids = {}  # per-process memo of url -> id
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'evictions': 0, 'torn_reads': 0}
+
+    # -- source interning ------------------------------------------------
+
+    def _find_source(self, key, encoded):
+        """(id, None) if the URL is present, (None, free slot) if not, (None, None) if full"""
+        buf = self.sources.buf
+        start = key % self.source_slots
+        for probe in range(self.source_slots):
+            index = (start + probe) % self.source_slots
+            offset = index * SOURCE_SLOT_SIZE
+            slot_key, length = SOURCE_HEADER.unpack_from(buf, offset)
+            if slot_key == 0:
+                return None, index
+            if slot_key == key and bytes(buf[offset + SOURCE_HEADER.size:offset + SOURCE_HEADER.size + length]) == encoded:
+                return index, None
+        return None, None
+
+    def intern_source(self, url):
+        """Id of a URL in the shared source table (None if too long or the table is full)"""
+        source_id = self.source_ids.get(url)
+        if source_id is not None:
+            return source_id
+        encoded = url.encode('utf-8')
+        if len(encoded) > MAX_URL_BYTES:
+            return None
+
+        key = _url_key(url)
+        source_id, free = self._find_source(key, encoded)
+        if source_id is None and free is not None:
+            with self.source_lock:
+                # Another process may have added it since the lock-free lookup
+                source_id, free = self._find_source(key, encoded)
+                if source_id is None and free is not None:
+                    offset = free * SOURCE_SLOT_SIZE
+                    buf = self.sources.buf
+                    # URL first, key last: lock-free readers never see a key with a half-written URL
+                    buf[offset + SOURCE_HEADER.size:offset + SOURCE_HEADER.size + len(encoded)] = encoded
+                    SOURCE_HEADER.pack_into(buf, offset, key, len(encoded))
+                    source_id = free
+        if source_id is not None:
+            self.source_ids[url] = source_id
+        return source_id
+
+    def source_url(self, source_id):
+        offset = source_id * SOURCE_SLOT_SIZE
+        _, length = SOURCE_HEADER.unpack_from(self.sources.buf, offset)
+        return bytes(self.sources.buf[offset + SOURCE_HEADER.size:offset + SOURCE_HEADER.size + length]).decode('utf-8')
+
+    # -- verdicts ----------------------------------------------------------
+
+    def _read_slot(self, offset):
+        """Consistent snapshot of a slot, or None if writers kept changing it"""
+        buf = self.verdicts.buf
+        for _ in range(READ_RETRIES):
+            before = SEQ.unpack_from(buf, offset)[0]
+            if before & 1:
+                continue
+            fields = SLOT.unpack_from(buf, offset)
+            if SEQ.unpack_from(buf, offset)[0] == before:
+                return fields
+        self.stats['torn_reads'] += 1
+        return None
+
+    def get(self, text, version=''):
+        """Cached verdict for a claim under a cache version
+
+        dict with status, confidence, risk_level, source_links, rule_id (None for
+        pipeline verdicts) and age; None if absent, expired or from another version.
+        """
+        key = claim_key(text)
+        tag = version_tag(version)
+        now = int(time.time())
+        first = (key % self.buckets) * BUCKET_SIZE
+        for slot in range(first, first + BUCKET_SIZE):
+            fields = self._read_slot(slot * SLOT.size)
+            if fields is None or fields[1] != key:
+                continue
+            _, _, status, risk, n_sources, rule, confidence, stored_at = fields[:8]
+            if now - stored_at > self.ttl:
+                break
+            if fields[14] != tag:
+                self.stats['stale'] += 1
+                break
+            self.stats['hits'] += 1
+            return {
+                'status': STATUSES[status],
+                'confidence': round(confidence, 3),
+                'risk_level': RISK_LEVELS[risk],
+                'source_links': [self.source_url(source_id) for source_id in fields[8:8 + n_sources]],
+                'rule_id': None if rule == NO_RULE else rule,
+                'age': now - stored_at
+            }
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, text, status, confidence=0.5, risk_level='medium', source_links=(), version='', rule_id=None):
+        """Store a verdict made under a cache version; evicts the oldest record of its bucket when the bucket is full"""
+        key = claim_key(text)
+        source_ids = []
+        for url in source_links:
+            source_id = self.intern_source(url)
+            if source_id is not None:
+                source_ids.append(source_id)
+            if len(source_ids) == MAX_SOURCES:
+                break
+        padded = source_ids + [NO_SOURCE] * (MAX_SOURCES - len(source_ids))
+        status_code = STATUSES.index(status) if status in STATUSES else STATUSES.index('caution')
+        risk_code = RISK_LEVELS.index(risk_level) if risk_level in RISK_LEVELS else 1
+        rule_code = rule_id if rule_id is not None and 0 <= rule_id < NO_RULE else NO_RULE
+        now = int(time.time())
+
+        buf = self.verdicts.buf
+        bucket = key % self.buckets
+        first = bucket * BUCKET_SIZE
+        with self.locks[bucket % LOCK_STRIPES]:
+            # Same claim first, then an empty or expired slot, then the oldest record
+            target = None
+            free = None
+            oldest = None
+            for slot in range(first, first + BUCKET_SIZE):
+                offset = slot * SLOT.size
+                fields = SLOT.unpack_from(buf, offset)
+                if fields[1] == key:
+                    target = offset
+                    break
+                if free is None and (fields[1] == 0 or now - fields[7] > self.ttl):
+                    free = offset
+                if oldest is None or fields[7] < oldest[1]:
+                    oldest = (offset, fields[7])
+            if target is None:
+                target = free
+            if target is None:
+                target = oldest[0]
+                self.stats['evictions'] += 1
+
+            seq = SEQ.unpack_from(buf, target)[0]
+            SEQ.pack_into(buf, target, (seq + 1) | 1)          # odd: write in progress
+            SLOT.pack_into(buf, target, (seq + 1) | 1, key, status_code, risk_code, len(source_ids), rule_code,
+                           float(confidence), now, *padded, version_tag(version))
+            SEQ.pack_into(buf, target, ((seq + 1) | 1) + 1)    # even again: published
+        self.stats['stores'] += 1
+
+    def get_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return dict(self.stats,
+                    hit_rate=round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+                    memory_bytes=self.verdicts.size + self.sources.size)
+
+    def close(self, unlink=False):
+        self.verdicts.close()
+        self.sources.close()
+        if unlink:
+            self.verdicts.unlink()
+            self.sources.unlink()
+
+if __name__ == "__main__":
+    # Test the module: 4 forked writers/readers sharing one table
+    import os
+
+    cache = SharedVerdictCache(slots=1 << 12)
+    claims = [f"Claim number {i}: vitamin {i % 26} cures disease {i}" for i in range(2000)]
+
+    pids = []
+    for worker in range(4):
+        pid = os.fork()
+        if pid == 0:
+            for i, claim in enumerate(claims):
+                if i % 4 == worker:
+                    cache.put(claim, 'harmful' if i % 3 == 0 else 'safe', 0.9, 'high',
+                              ['https://www.who.int/', f"https://pubmed.ncbi.nlm.nih.gov/{i % 50}/"], version='r1.l1')
+            os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    start = time.perf_counter()
+    found = [cache.get(claim, 'r1.l1') for claim in claims]
+    elapsed = (time.perf_counter() - start) * 1e6 / len(claims)
+    hits = [record for record in found if record]
+    print(f"🧠 {len(hits)}/{len(claims)} verdicts written by other processes visible ({elapsed:.1f} µs per lookup)")
+    print(f"   e.g. {hits[0]}")
+    stale = sum(cache.get(claim, 'r2.l1') is not None for claim in claims[:100])
+    print(f"   after a rules reload (version r2.l1): {stale}/100 old verdicts served")
+    print(f"   shared memory: {cache.get_stats()['memory_bytes'] / 1024:.0f} KB for any number of workers")
+    cache.close(unlink=True)
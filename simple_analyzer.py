@@ -4,14 +4,11 @@ Simple Health Analyzer
 Uses individual phase modules for analysis
 """
 
-import sys
+import time
 
-# Import phase modules
-from phase1_user_input import get_user_input, classify_input_type
-from phase2_content_retrieval import extract_from_url
-from phase4_misinformation_detection import detect_misinformation
-from phase5_trusted_source_retrieval import retrieve_trusted_sources
-from phase6_fact_correction import gemini_fact_correction
+# Phase modules (and requests, numpy, config) are imported when a stage first runs
+from pipeline_stages import get_stage
+from verification_log import log_event, make_event
 
 def simple_health_analyzer():
     """Simple health analyzer using phase modules"""
@@ -33,14 +30,18 @@ def simple_health_analyzer():
     
     # Phase 2: Process input
     print("\n🔍 Processing input...")
-    processed = classify_input_type(user_input)
+    stage_ms = {}
+    started = time.perf_counter()
+    processed = get_stage('input_type')(user_input)
     print(f"📋 Type: {processed.get('type', 'text')}")
     
     # Phase 3: Extract content if needed
     content = user_input
     if processed.get('type') == 'url':
         print("🌐 Extracting content from URL...")
-        extracted = extract_from_url(user_input)
+        start = time.perf_counter()
+        extracted = get_stage('url_content')(user_input)
+        stage_ms['url_content'] = (time.perf_counter() - start) * 1000
         if extracted and isinstance(extracted, dict):
             content = extracted.get('content', user_input)
             if len(content) > 10:
@@ -58,8 +59,11 @@ def simple_health_analyzer():
     
     # Phase 4: AI Detection
     print("\n🤖 AI Misinformation Detection...")
+    detection_result = None
     try:
-        detection_result = detect_misinformation(content)
+        start = time.perf_counter()
+        detection_result = get_stage('detection')(content)
+        stage_ms['detection'] = (time.perf_counter() - start) * 1000
         if detection_result:
             verdict = detection_result.get('verdict', 'uncertain')
             confidence = detection_result.get('confidence', 0.5)
@@ -73,7 +77,9 @@ def simple_health_analyzer():
     # Phase 5: Medical Sources (with Drug Safety)
     print("\n🔬 Searching Medical Sources...")
     try:
-        sources = retrieve_trusted_sources(content, max_results=5)
+        start = time.perf_counter()
+        sources = get_stage('sources')(content, max_results=5)
+        stage_ms['sources'] = (time.perf_counter() - start) * 1000
         print(f"✅ Found {len(sources)} authoritative sources")
         
         if sources:
@@ -89,7 +95,9 @@ def simple_health_analyzer():
     # Phase 6: Fact Checking
     print("\n🏥 Medical Fact-Checking...")
     try:
-        fact_check = gemini_fact_correction(content, sources)
+        start = time.perf_counter()
+        fact_check = get_stage('fact_check')(content, sources)
+        stage_ms['fact_check'] = (time.perf_counter() - start) * 1000
         if fact_check and len(fact_check.strip()) > 10:
             print("✅ Fact-check completed")
             print("\n" + "=" * 60)
@@ -97,11 +105,22 @@ def simple_health_analyzer():
             print("=" * 60)
             print(fact_check)
             print("=" * 60)
+            
+            # Remember the verdict so similar claims can reuse it
+            if detection_result:
+                get_stage('record_claim')(content, detection_result, fact_check)
         else:
             print("⚠️ Fact-check unavailable")
     except Exception as e:
         print(f"⚠️ Fact-check error: {e}")
     
+    # Analytics event; written by a background thread and flushed at exit
+    log_event(make_event(content, (detection_result or {}).get('verdict'), 'simple_analyzer',
+                         input_type=processed.get('type', 'text'),
+                         confidence=(detection_result or {}).get('confidence'),
+                         total_ms=(time.perf_counter() - started) * 1000, stage_ms=stage_ms,
+                         sources=[source.get('url') for source in sources]))
+    
     print("\n" + "=" * 50)
     print("✅ Analysis Complete!")
     print("\n⚠️ MEDICAL DISCLAIMER:")
@@ -20,6 +20,8 @@ except ImportError:
 import time
 import json
 
+from rule_engine import classify, rules_cache_version
+
 app = Flask(__name__)
 
 # Enable CORS manually if flask_cors is not available
@@ -52,35 +54,11 @@ def verify_medical_fact():
         
         print(f"📥 Verification request: {text[:50]}...")
         
-        # Simple classification
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['cure cancer', 'bleach', 'vaccines cause autism']):
-            status = 'harmful'
-            fact = "This claim is dangerous misinformation."
-            explanation = "Contradicts medical evidence and could cause harm."
-        elif any(word in text_lower for word in ['natural sugar', 'essential oils']):
-            status = 'caution'
-            fact = "This claim needs professional verification."
-            explanation = "Partially true but requires medical context."
-        else:
-            status = 'safe'
-            fact = "This information appears reasonable."
-            explanation = "Aligns with general medical guidance."
+        # Shared keyword tiers; the rule carries its encoded response
+        rule = classify(text)
         
-        response = {
-            'status': status,
-            'corrected_fact': fact,
-            'explanation': explanation,
-            'source_links': [
-                'https://www.who.int/',
-                'https://www.cdc.gov/',
-                'https://pubmed.ncbi.nlm.nih.gov/'
-            ]
-        }
-        
-        print(f"✅ Response: {status}")
-        return jsonify(response)
+        print(f"✅ Response: {rule.status}")
+        return app.response_class(rule.body, mimetype='application/json')
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -100,6 +78,11 @@ def health_check():
         'service': 'Medical Fact Verifier API'
     })
 
+@app.route('/status', methods=['GET'])
+def status():
+    """Cheap status check; the extension drops cached verdicts when cache_version changes"""
+    return jsonify({'status': 'ok', 'cache_version': rules_cache_version()})
+
 @app.route('/', methods=['GET'])
 def home():
     """Root endpoint"""
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Source Provider Registry
+Phase 5 source providers with their declared cost, expected latency,
+cacheability and reliability, scheduled per request within a latency and cost
+budget: cached and local providers run first, and expensive ones are skipped
+once enough high-reliability evidence is in hand or when they no longer fit
+"""
+
+import threading
+import time
+
+# Evidence counts as "enough" at this many articles of at least this reliability
+HIGH_RELIABILITY = 0.9
+MIN_EVIDENCE = 3
+
+# Weight of each new observation in a provider's running latency estimate
+LATENCY_SMOOTHING = 0.2
+
+class SourceBudget:
+    """Per-request limits: wall time (ms), cost units (e.g. upstream API calls) and evidence wanted"""
+
+    __slots__ = ('latency_ms', 'cost', 'min_evidence')
+
+    def __init__(self, latency_ms=3000, cost=2, min_evidence=MIN_EVIDENCE):
+        self.latency_ms = latency_ms
+        self.cost = cost
+        self.min_evidence = min_evidence
+
+DEFAULT_BUDGET = SourceBudget()
+
+class Provider:
+    """One source of Source records
+
+    fetch(query, deadline) returns a list of Sources; deadline is a
+    time.monotonic() value the provider should not run past. is_cached(query),
+    when given, says whether the answer is available without upstream calls, in
+    which case the provider costs nothing. Evidence providers return articles
+    about the claim itself (PubMed); the others return reference pages.
+    """
+
+    __slots__ = ('name', 'fetch', 'cost', 'latency_ms', 'declared_ms', 'cacheable', 'reliability',
+                 'evidence', 'is_cached', 'stats', 'lock')
+
+    def __init__(self, name, fetch, cost=0, latency_ms=1, cacheable=False, reliability=0.9,
+                 evidence=False, is_cached=None):
+        self.name = name
+        self.fetch = fetch
+        self.cost = cost
+        self.latency_ms = latency_ms
+        self.declared_ms = latency_ms
+        self.cacheable = cacheable
+        self.reliability = reliability
+        self.evidence = evidence
+        self.is_cached = is_cached
+        self.stats = {'calls': 0, 'cached_calls': 0, 'sources': 0, 'errors': 0, 'skipped': {}}
+        self.lock = threading.Lock()
+
+    def cached_for(self, query):
+        return self.cacheable and self.is_cached is not None and self.is_cached(query)
+
+    def record(self, elapsed_ms, count, cached, error=False):
+        with self.lock:
+            self.stats['calls'] += 1
+            self.stats['sources'] += count
+            if error:
+                self.stats['errors'] += 1
+            if cached:
+                self.stats['cached_calls'] += 1
+            else:
+                # Cache hits would drag the estimate towards zero
+                self.latency_ms += LATENCY_SMOOTHING * (elapsed_ms - self.latency_ms)
+
+    def skip(self, reason):
+        with self.lock:
+            self.stats['skipped'][reason] = self.stats['skipped'].get(reason, 0) + 1
+            if reason == 'latency_budget':
+                # Skipped providers take no new measurements; drift back to the declared
+                # latency so one slow spell does not exclude a provider for good
+                self.latency_ms += LATENCY_SMOOTHING * (self.declared_ms - self.latency_ms)
+
+PROVIDERS = {}
+_registry_lock = threading.Lock()
+
+def register_provider(provider):
+    """Add a provider, or replace the one with the same name"""
+    with _registry_lock:
+        PROVIDERS[provider.name] = provider
+    return provider
+
+def unregister_provider(name):
+    with _registry_lock:
+        return PROVIDERS.pop(name, None)
+
+def gather_sources(query, budget=None, providers=None):
+    """Sources from the registered providers within the budget, plus a per-provider plan
+
+    Providers run cheapest first (cached or free, then by cost and expected
+    latency). A costly provider is skipped when the evidence already gathered is
+    enough, or when its cost or expected latency no longer fits the budget.
+    """
+    budget = budget or DEFAULT_BUDGET
+    providers = list(providers or PROVIDERS.values())
+    start = time.monotonic()
+    deadline = start + budget.latency_ms / 1000.0
+
+    cached = {provider.name: provider.cached_for(query) for provider in providers}
+    providers.sort(key=lambda p: (0 if cached[p.name] else p.cost, 0 if cached[p.name] else p.latency_ms))
+
+    sources = []
+    seen = set()
+    plan = []
+    spent = 0
+    # High-reliability articles from evidence providers (reference pages do not count)
+    evidence = 0
+    for provider in providers:
+        is_cached = cached[provider.name]
+        cost = 0 if is_cached else provider.cost
+        remaining_ms = (deadline - time.monotonic()) * 1000
+        reason = None
+        if cost and provider.evidence and evidence >= budget.min_evidence:
+            reason = 'enough_evidence'
+        elif spent + cost > budget.cost:
+            reason = 'cost_budget'
+        elif not is_cached and provider.latency_ms > remaining_ms:
+            reason = 'latency_budget'
+        if reason:
+            provider.skip(reason)
+            plan.append({'provider': provider.name, 'skipped': reason})
+            continue
+
+        call_start = time.monotonic()
+        try:
+            results = provider.fetch(query, deadline) or []
+            error = False
+        except Exception as e:
+            print(f"⚠️ Source provider {provider.name} failed: {e}")
+            results, error = [], True
+        elapsed_ms = (time.monotonic() - call_start) * 1000
+        provider.record(elapsed_ms, len(results), is_cached, error)
+        spent += cost
+
+        added = 0
+        for source in results:
+            # The mirror and live PubMed can return the same article
+            key = source.get('url') or source.get('title')
+            if key not in seen:
+                seen.add(key)
+                sources.append(source)
+                added += 1
+                if provider.evidence and source.get('reliability', 0) >= HIGH_RELIABILITY:
+                    evidence += 1
+        plan.append({'provider': provider.name, 'sources': added, 'cached': is_cached,
+                     'ms': round(elapsed_ms, 1)})
+    return sources, plan
+
+def get_provider_stats():
+    """Calls, skips (by reason) and current latency estimate of each provider"""
+    stats = {}
+    for name, provider in list(PROVIDERS.items()):
+        with provider.lock:
+            stats[name] = dict(provider.stats, skipped=dict(provider.stats['skipped']),
+                               expected_ms=round(provider.latency_ms, 1), cost=provider.cost)
+    return stats
+
+if __name__ == "__main__":
+    # Test the module with simulated providers: a cold and a warm request
+    warm = set()
+
+    def slow_articles(query, deadline):
+        if query not in warm:
+            time.sleep(0.3)
+            warm.add(query)
+        return [{'title': f"Trial {i} on {query}", 'url': f"https://pubmed.example/{query}/{i}",
+                 'type': 'research', 'reliability': 0.95} for i in range(3)]
+
+    register_provider(Provider('reference', lambda q, d: [{'title': q, 'url': 'https://who.example',
+                                                          'type': 'guideline', 'reliability': 0.98}]))
+    register_provider(Provider('articles', slow_articles, cost=1, latency_ms=300, cacheable=True,
+                               reliability=0.95, evidence=True, is_cached=lambda q: q in warm))
+    register_provider(Provider('second_opinion', slow_articles, cost=1, latency_ms=600, evidence=True))
+
+    for label, budget in [('cold', SourceBudget()), ('warm', SourceBudget()), ('tight', SourceBudget(latency_ms=200))]:
+        start = time.perf_counter()
+        sources, plan = gather_sources('vitamin d' if label != 'tight' else 'zinc', budget)
+        print(f"  {label:5s}: {len(sources)} sources in {(time.perf_counter() - start) * 1000:6.1f} ms")
+        for step in plan:
+            print(f"         {step}")
+    print(f"📊 {get_provider_stats()}")
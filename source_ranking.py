@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Source Ranking
+BM25 relevance over title and summary combined with source reliability, with heap top-k selection
+"""
+
+import heapq
+import math
+from collections import Counter
+
+from pubmed_cache import tokenize, STOPWORDS
+from prompt_budget import reliability_score
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2          # title terms count twice
+RELEVANCE_WEIGHT = 0.6    # rank_score = 0.6 * relevance + 0.4 * reliability
+
+def _terms(text):
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+def bm25_scores(sources, query):
+    """BM25 relevance of each source's title + summary to the query, scored within the candidate set"""
+    query_terms = set(_terms(query))
+    if not query_terms or not sources:
+        return [0.0] * len(sources)
+
+    docs = []
+    df = Counter()
+    for source in sources:
+        counts = Counter(_terms(source.get('title', '')) * TITLE_WEIGHT)
+        counts.update(_terms(source.get('summary', '')))
+        docs.append(counts)
+        df.update(term for term in query_terms if term in counts)
+
+    num_docs = len(docs)
+    avg_len = sum(sum(doc.values()) for doc in docs) / num_docs or 1.0
+    idf = {term: math.log(1 + (num_docs - df[term] + 0.5) / (df[term] + 0.5)) for term in query_terms if df[term]}
+
+    scores = []
+    for doc in docs:
+        doc_len = sum(doc.values())
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)
+        score = 0.0
+        for term, term_idf in idf.items():
+            tf = doc.get(term)
+            if tf:
+                score += term_idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+def score_sources(sources, query):
+    """Annotate each source with 'relevance_score' (BM25) and 'rank_score' (relevance + reliability)"""
+    scores = bm25_scores(sources, query)
+    max_score = max(scores) if scores else 0.0
+
+    for source, score in zip(sources, scores):
+        relevance = score / max_score if max_score > 0 else 0.0
+        source['relevance_score'] = round(score, 3)
+        source['rank_score'] = round(RELEVANCE_WEIGHT * relevance + (1 - RELEVANCE_WEIGHT) * reliability_score(source), 4)
+    return sources
+
+def select_top_sources(sources, query, k=3):
+    """The k best sources by rank_score, using a heap instead of a full sort"""
+    score_sources(sources, query)
+    return heapq.nlargest(k, sources, key=lambda s: s['rank_score'])
+
+def order_sources(sources, query, k=3):
+    """Sources with the top k first (best first), the rest in their original order"""
+    top = select_top_sources(sources, query, k)
+    top_ids = {id(source) for source in top}
+    return top + [source for source in sources if id(source) not in top_ids]
+
+if __name__ == "__main__":
+    # Test the module
+    import time
+
+    query = "aspirin interactions with warfarin"
+    candidates = [
+        {'title': 'Aspirin and warfarin bleeding risk', 'summary': 'Interaction study of aspirin with warfarin', 'reliability': 0.95},
+        {'title': 'WebMD Information on aspirin', 'summary': 'General health information', 'reliability': 0.75},
+        {'title': 'Heart disease prevention', 'summary': 'Lifestyle guidance', 'reliability': 0.98},
+        {'title': 'Drug Interaction Checker - Warfarin', 'summary': 'Comprehensive drug interaction checker for warfarin', 'reliability': 0.92},
+    ]
+    for i in range(300):
+        candidates.append({'title': f"Unrelated study {i}", 'summary': 'Nutrition and sleep research', 'reliability': 0.9})
+
+    start = time.perf_counter()
+    top = select_top_sources(candidates, query, k=3)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Ranked {len(candidates)} candidates in {elapsed:.1f} ms")
+    for i, source in enumerate(top, 1):
+        print(f"  {i}. {source['title']} (relevance {source['relevance_score']}, rank {source['rank_score']})")
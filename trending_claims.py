@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Trending Claims
+Streaming detector for the claims being verified most right now, in fixed
+memory whatever the traffic: every verified claim's fingerprint (the FNV-1a
+hash page_scan and verification_log use) is counted in a Count-Min sketch and
+a SpaceSaving top-k list per time bucket, over a sliding window of buckets
+
+  window 1 h = 12 buckets of 5 min, each: 4 x 2048 sketch counters + top 100 claims
+
+Counts are estimates: Count-Min never undercounts and overcounts by at most
+~e/2048 of the window's traffic with high probability; a claim missing from
+every bucket's top list is not reported.
+"""
+
+import threading
+import time
+from array import array
+
+from page_scan import block_hash
+
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 2048
+TOP_K = 100                 # claims tracked per bucket (SpaceSaving capacity)
+BUCKET_SECONDS = 300
+WINDOW_BUCKETS = 12
+RECENT_BUCKETS = 3          # "right now": the last 15 minutes
+SAMPLE_CHARS = 200          # claim text kept for each tracked claim
+
+class CountMinSketch:
+    """depth x width counters; a key's estimate is the minimum of its counters"""
+
+    __slots__ = ('depth', 'width', 'rows')
+
+    def __init__(self, depth=SKETCH_DEPTH, width=SKETCH_WIDTH):
+        self.depth = depth
+        self.width = width
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, key):
+        # Row hashes derived from the two halves of the 64-bit fingerprint (Kirsch-Mitzenmacher)
+        h1, h2 = key & 0xffffffff, (key >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+
+    def estimate(self, key):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def merge(self, other, sign=1):
+        """Add (or subtract, sign=-1) another sketch of the same shape"""
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += sign * value
+
+class SpaceSaving:
+    """At most `capacity` heavy hitters: a new key evicts a smallest one and inherits its count
+
+    Keys are grouped by count (stream summary), so finding the smallest is O(1).
+    """
+
+    __slots__ = ('capacity', 'entries', 'by_count', 'min_count')
+
+    def __init__(self, capacity=TOP_K):
+        self.capacity = capacity
+        self.entries = {}   # key -> [count, overestimate, verdict, sample text]
+        self.by_count = {}  # count -> keys with that count
+        self.min_count = 0
+
+    def _move(self, key, old, new):
+        if old:
+            keys = self.by_count[old]
+            keys.discard(key)
+            if not keys:
+                del self.by_count[old]
+                if old == self.min_count:
+                    self.min_count = new
+        self.by_count.setdefault(new, set()).add(key)
+        if new < self.min_count or not self.min_count:
+            self.min_count = new
+
+    def add(self, key, verdict, text):
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[0] += 1
+            entry[2] = verdict
+            self._move(key, entry[0] - 1, entry[0])
+            return
+        if len(self.entries) < self.capacity:
+            self.entries[key] = [1, 0, verdict, text[:SAMPLE_CHARS]]
+            self.min_count = 1
+            self._move(key, 0, 1)
+            return
+        floor = self.min_count
+        smallest = next(iter(self.by_count[floor]))
+        del self.entries[smallest]
+        self.entries[key] = [floor + 1, floor, verdict, text[:SAMPLE_CHARS]]
+        self.by_count[floor].discard(smallest)
+        self.by_count[floor].add(key)
+        self._move(key, floor, floor + 1)
+
+class _Bucket:
+    __slots__ = ('start', 'sketch', 'top', 'total')
+
+    def __init__(self, start):
+        self.start = start
+        self.sketch = CountMinSketch()
+        self.top = SpaceSaving()
+        self.total = 0
+
+class TrendingClaims:
+    """Sliding window of buckets plus a running sum of their sketches"""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, window_buckets=WINDOW_BUCKETS, clock=time.time):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.clock = clock
+        self.buckets = []               # oldest first
+        self.window = CountMinSketch()  # sum of the buckets' sketches
+        self.lock = threading.Lock()
+        self.observed = 0
+
+    def _expire(self, now):
+        """Drop buckets that slid out of the window, subtracting them from the window sketch"""
+        oldest = now - now % self.bucket_seconds - (self.window_buckets - 1) * self.bucket_seconds
+        while self.buckets and self.buckets[0].start < oldest:
+            self.window.merge(self.buckets.pop(0).sketch, sign=-1)
+
+    def _current_bucket(self, now):
+        self._expire(now)
+        start = now - now % self.bucket_seconds
+        if not self.buckets or self.buckets[-1].start < start:
+            self.buckets.append(_Bucket(start))
+        return self.buckets[-1]
+
+    def observe(self, text, verdict=None):
+        """Count one verification of a claim (with the verdict it got)"""
+        key = int(block_hash(text), 16)
+        with self.lock:
+            bucket = self._current_bucket(self.clock())
+            bucket.sketch.add(key)
+            self.window.add(key)
+            bucket.top.add(key, verdict, text)
+            bucket.total += 1
+            self.observed += 1
+
+    def top(self, n=10):
+        """Claims with the most verifications in the last RECENT_BUCKETS, with window counts
+
+        growth compares the recent rate with the whole window's (above 1: picking up).
+        """
+        now = self.clock()
+        with self.lock:
+            self._expire(now)
+            recent_start = now - now % self.bucket_seconds - (RECENT_BUCKETS - 1) * self.bucket_seconds
+            recent = [bucket for bucket in self.buckets if bucket.start >= recent_start]
+            if not recent:
+                return []
+            # Candidates from the recent buckets' top lists; newer buckets win for verdict and sample
+            candidates = {}
+            for bucket in recent:
+                for key, (_, _, verdict, text) in bucket.top.entries.items():
+                    candidates[key] = (verdict, text)
+            # Rates per bucket-length of time, counting empty buckets in between
+            span = (now - self.buckets[0].start) // self.bucket_seconds + 1
+            recent_span = min(RECENT_BUCKETS, span)
+            rows = []
+            for key, (verdict, text) in candidates.items():
+                recent_count = sum(bucket.sketch.estimate(key) for bucket in recent)
+                window_count = self.window.estimate(key)
+                growth = (recent_count / recent_span) / (window_count / span) if window_count else 0.0
+                rows.append({'claim_hash': f"{key:016x}", 'claim': text, 'verdict': verdict,
+                             'recent_count': recent_count, 'window_count': window_count,
+                             'growth': round(growth, 2)})
+        rows.sort(key=lambda row: (row['recent_count'], row['window_count']), reverse=True)
+        return rows[:n]
+
+    def get_stats(self):
+        with self.lock:
+            return {'observed': self.observed, 'buckets': len(self.buckets),
+                    'window_total': sum(bucket.total for bucket in self.buckets),
+                    'tracked': sum(len(bucket.top.entries) for bucket in self.buckets),
+                    'memory_bytes': (len(self.buckets) + 1) * SKETCH_DEPTH * SKETCH_WIDTH * 4}
+
+if __name__ == "__main__":
+    # Test the module: a Zipf-like stream where one claim goes viral in the last 10 minutes
+    import random
+
+    random.seed(11)
+    claims = [f"claim {i}: this remedy cures everything" for i in range(50000)]
+    weights = [1.0 / (i + 1) ** 1.1 for i in range(len(claims))]
+    viral = "Forwarded: boiling garlic water cures covid in one night"
+    now = [1_200_000.0]  # on a bucket boundary, so the last 15 minutes are the last 3 buckets
+    trending = TrendingClaims(clock=lambda: now[0])
+
+    exact = {}
+    start = time.perf_counter()
+    events = 0
+    for minute in range(60):
+        picks = random.choices(claims, weights, k=2000)
+        if minute >= 50:
+            picks += [viral] * (300 * (minute - 49))
+        for text in picks:
+            trending.observe(text, 'harmful' if text == viral else 'caution')
+            if minute >= 45:
+                exact[text] = exact.get(text, 0) + 1
+        events += len(picks)
+        now[0] += 60
+    elapsed = time.perf_counter() - start
+    print(f"📈 {events} claims observed, {elapsed * 1e6 / events:.1f} µs each; {trending.get_stats()}")
+
+    now[0] -= 1  # query within the last minute, not at the start of the next bucket
+    start = time.perf_counter()
+    top = trending.top(5)
+    print(f"🔥 Top 5 in {(time.perf_counter() - start) * 1000:.1f} ms (recent = last {RECENT_BUCKETS * BUCKET_SECONDS // 60} min):")
+    for row in top:
+        print(f"  {row['recent_count']:6d} (exact {exact.get(row['claim'], 0):6d}) window {row['window_count']:6d} "
+              f"growth {row['growth']:5.2f}  {row['verdict']:8s} {row['claim'][:50]}")
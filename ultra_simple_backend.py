@@ -7,6 +7,8 @@ from http.server import HTTPServer, BaseHTTPRequestHandler
 import json
 import urllib.parse
 
+from rule_engine import classify, rules_cache_version
+
 class MedicalFactHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -25,6 +27,8 @@ class MedicalFactHandler(BaseHTTPRequestHandler):
         
         if self.path == '/api/health':
             response = {'status': 'healthy', 'service': 'Medical Fact Verifier'}
+        elif self.path == '/status':
+            response = {'status': 'ok', 'cache_version': rules_cache_version()}
         else:
             response = {'service': 'Medical Fact Verifier API', 'status': 'running'}
         
@@ -41,35 +45,16 @@ class MedicalFactHandler(BaseHTTPRequestHandler):
                 text = data.get('text', '').lower()
                 print(f"📥 Verifying: {text[:50]}...")
                 
-                # Simple classification
-                if any(word in text for word in ['cure cancer', 'bleach', 'vaccines cause autism']):
-                    status = 'harmful'
-                    fact = "This claim is dangerous misinformation that could cause harm."
-                elif any(word in text for word in ['natural sugar', 'essential oils']):
-                    status = 'caution'
-                    fact = "This claim requires professional medical verification."
-                else:
-                    status = 'safe'
-                    fact = "This information appears to be reasonable medical guidance."
-                
-                response = {
-                    'status': status,
-                    'corrected_fact': fact,
-                    'explanation': f"Medical assessment based on current evidence.",
-                    'source_links': [
-                        'https://www.who.int/',
-                        'https://www.cdc.gov/',
-                        'https://pubmed.ncbi.nlm.nih.gov/'
-                    ]
-                }
+                # Shared keyword tiers; the rule carries its encoded response
+                rule = classify(text)
                 
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/json')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
-                self.wfile.write(json.dumps(response).encode())
+                self.wfile.write(rule.body)
                 
-                print(f"✅ Response sent: {status}")
+                print(f"✅ Response sent: {rule.status}")
                 
             except Exception as e:
                 print(f"❌ Error: {e}")
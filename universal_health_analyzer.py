@@ -6,20 +6,10 @@ Uses: Groq + Gemini APIs + PubMed for comprehensive medical analysis
 """
 
 import sys
-import os
 
-# Import modules
-try:
-    from phase3_nlp_preprocessing import nlp_preprocess
-except ImportError:
-    print("⚠️ Language detection unavailable, using fallback")
-    def nlp_preprocess(text):
-        return "en", text.lower().strip()
-
-from phase7_explainable_output import generate_explainable_output
-from groq_gemini_medical_apis import gemini_fact_correction
-from real_medical_apis import comprehensive_medical_search, enhanced_groq_detection
-from article_message_processor import enhanced_input_processor
+# Stages resolve on first use; optional ones (language detection, input
+# processor, explainable report) fall back to built-in versions
+from pipeline_stages import get_stage
 
 def universal_health_analyzer():
     """
@@ -55,7 +45,7 @@ def universal_health_analyzer():
     # Phase 2: Content Extraction and Classification
     print("\n🔍 Phase 2: Content Analysis...")
     try:
-        extracted = enhanced_input_processor(user_input)
+        extracted = get_stage('input_processor')(user_input)
         
         print(f"📋 Input Type: {extracted['type'].upper()}")
         print(f"📄 Source: {extracted['source']}")
@@ -83,7 +73,7 @@ def universal_health_analyzer():
     try:
         # Extract key medical terms for better search
         search_query = content_to_analyze[:200]  # Use first 200 chars for search
-        literature = comprehensive_medical_search(search_query)
+        literature = get_stage('medical_search')(search_query)
         
         print(f"📚 Consulted {len(literature)} authoritative sources:")
         
@@ -112,7 +102,7 @@ def universal_health_analyzer():
     # Phase 4: NLP Preprocessing
     print(f"\n🧠 Phase 4: Language Processing...")
     try:
-        language, cleaned_text = nlp_preprocess(content_to_analyze)
+        language, cleaned_text = get_stage('nlp_preprocess')(content_to_analyze)
         print(f"🌐 Language: {language}")
         print(f"🧹 Cleaned text: {cleaned_text[:80]}...")
     except Exception as e:
@@ -124,7 +114,7 @@ def universal_health_analyzer():
     try:
         # Use enhanced detection with context
         content_context = f"Source: {extracted['source']}, Type: {extracted['type']}"
-        analysis = enhanced_groq_detection(cleaned_text, content_context)
+        analysis = get_stage('groq_detection')(cleaned_text, content_context)
         
         verdict = analysis['verdict']
         confidence = analysis['confidence']
@@ -161,8 +151,6 @@ def universal_health_analyzer():
     # Phase 6: Medical Fact-Checking
     print(f"\n🏥 Phase 6: Medical Fact-Checking (Gemini AI)...")
     try:
-        sources_summary = [f"{art['source']}: {art['title']}" for art in literature[:3]]
-        
         # Create context for fact-checking
         fact_check_context = f"""
         Content Type: {extracted['type']}
@@ -171,7 +159,7 @@ def universal_health_analyzer():
         Content: {content_to_analyze[:500]}
         """
         
-        corrected_facts = gemini_fact_correction(fact_check_context, sources_summary)
+        corrected_facts = get_stage('fact_check')(fact_check_context, literature[:3])
         print("✅ Medical fact-check completed")
         
     except Exception as e:
@@ -239,7 +227,7 @@ Always consult qualified healthcare professionals for medical decisions.
         citations.insert(0, f"Original Source: {extracted['source']}")
     
     # Generate final comprehensive report
-    final_output = generate_explainable_output(
+    final_output = get_stage('report')(
         verdict=final_verdict,
         reasoning=reasoning.strip(),
         citations=citations,
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Upstream Rate Limiter
+Process-wide per-host pacing for external APIs (NCBI E-utilities allows 3 req/s, 10 with an API key)
+
+Limits are per host, not per process: a server with N pre-forked workers calls
+set_rate_share(1 / N) in each, so together they stay under the host's limit.
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from request_scheduler import TokenBucket
+
+try:
+    from config import NCBI_API_KEY
+except ImportError:
+    NCBI_API_KEY = ""
+
+NCBI_HOST = 'eutils.ncbi.nlm.nih.gov'
+
+# Requests/sec per host: 'anonymous' without an API key, 'keyed' with one
+HOST_LIMITS = {
+    NCBI_HOST: {'anonymous': 3, 'keyed': 10, 'api_key': NCBI_API_KEY, 'key_param': 'api_key'},
+}
+
+MAX_RETRIES = 3
+
+# Share of each host's limit this process may use (1 / serving processes)
+_rate_share = 1.0
+
+class RateLimitTimeout(Exception):
+    """Raised when a request cannot be sent before its deadline"""
+
+class HostRateLimiter:
+    """Token bucket for one upstream host with FIFO queueing"""
+
+    def __init__(self, host, rate, api_key="", key_param=None):
+        self.host = host
+        self.rate = rate
+        self.api_key = api_key
+        self.key_param = key_param
+        # Burst of 1 keeps us strictly under the per-second limit
+        self.bucket = TokenBucket(rate, 1)
+        self.queue_lock = threading.Lock()
+        self.stats = {'sent': 0, 'throttled': 0, 'timed_out': 0}
+
+    def acquire(self, deadline=None):
+        """Wait for a slot; returns False if the slot would come after deadline"""
+        # One waiter at a time, so queued callers are served in arrival order
+        with self.queue_lock:
+            while True:
+                wait = self.bucket.wait_time()
+                if wait <= 0 and self.bucket.try_acquire():
+                    self.stats['sent'] += 1
+                    return True
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    self.stats['timed_out'] += 1
+                    return False
+                time.sleep(wait)
+
+    def penalize(self, seconds):
+        """Back off after a 429 by draining the bucket for the given time"""
+        self.stats['throttled'] += 1
+        with self.bucket.lock:
+            self.bucket.tokens = -seconds * self.rate
+            self.bucket.updated = time.monotonic()
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(host):
+    """Process-wide limiter for a host (None if the host is not rate limited)"""
+    limits = HOST_LIMITS.get(host)
+    if not limits:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            api_key = limits.get('api_key')
+            rate = (limits['keyed'] if api_key else limits['anonymous']) * _rate_share
+            limiter = HostRateLimiter(host, rate, api_key, limits.get('key_param'))
+            _limiters[host] = limiter
+        return limiter
+
+def set_rate_share(share):
+    """Use only this share of every host's limit (existing limiters included)"""
+    global _rate_share
+    with _limiters_lock:
+        _rate_share = share
+        for host, limiter in _limiters.items():
+            limits = HOST_LIMITS[host]
+            limiter.rate = (limits['keyed'] if limiter.api_key else limits['anonymous']) * share
+            with limiter.bucket.lock:
+                limiter.bucket.rate = limiter.rate
+
+def rate_limited_get(url, params=None, timeout=15, deadline=None, **kwargs):
+    """requests.get paced by the host's limiter, retrying 429s until the deadline"""
+    limiter = get_limiter(urlparse(url).netloc)
+    if limiter is None:
+        return requests.get(url, params=params, timeout=timeout, **kwargs)
+
+    if deadline is None:
+        deadline = time.monotonic() + timeout * 2
+    params = dict(params or {})
+    if limiter.api_key and limiter.key_param:
+        params[limiter.key_param] = limiter.api_key
+
+    for attempt in range(MAX_RETRIES):
+        if not limiter.acquire(deadline):
+            raise RateLimitTimeout(f"{limiter.host}: no request slot before deadline")
+
+        remaining = max(deadline - time.monotonic(), 1)
+        response = requests.get(url, params=params, timeout=min(timeout, remaining), **kwargs)
+        if response.status_code != 429:
+            return response
+
+        retry_after = response.headers.get('Retry-After', '')
+        backoff = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+        print(f"⚠️ {limiter.host} throttled (429), backing off {backoff:.1f}s")
+        limiter.penalize(backoff)
+
+    raise RateLimitTimeout(f"{limiter.host}: still throttled after {MAX_RETRIES} attempts")
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+def coalesce(key, fn):
+    """Run fn once for concurrent callers with the same key; all get the same result"""
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            _flights[key] = flight
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+def get_limiter_stats():
+    """Counters for every active host limiter"""
+    with _limiters_lock:
+        return {host: dict(limiter.stats, rate=limiter.rate) for host, limiter in _limiters.items()}
+
+if __name__ == "__main__":
+    # Test the module: pace a burst of requests against the NCBI limit without network calls
+    limiter = get_limiter(NCBI_HOST)
+    print(f"NCBI limit: {limiter.rate} req/s ({'API key' if limiter.api_key else 'anonymous'})")
+
+    start = time.monotonic()
+    for _ in range(10):
+        limiter.acquire()
+    elapsed = time.monotonic() - start
+    print(f"10 slots in {elapsed:.2f}s ({10 / elapsed:.1f} req/s)")
+
+    calls = []
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['12345']
+
+    threads = [threading.Thread(target=coalesce, args=(('pubmed', 'vitamin d'), slow_search)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"5 concurrent identical searches -> {len(calls)} upstream call(s)")
+    print(f"Stats: {get_limiter_stats()}")
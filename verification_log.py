@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Verification Log
+Append-only log of verification events for analytics, written off the request
+path: events are queued, a background thread appends them in batches to a
+write-ahead log (JSON lines, one segment file per process), and sealed segments
+are compacted, by a second background thread, into columnar files (numpy .npz,
+one array per column) that analysts scan for trending claims without touching
+the serving processes. Column files of the same day are merged column-wise
+once there are more than a few of them.
+
+  verification_log/wal/wal-<pid>-<seq>.open    segment being written
+  verification_log/wal/wal-<pid>-<seq>.log     sealed, waiting for compaction
+  verification_log/columns/events-<time>.npz   compacted events
+
+Event columns: ts, claim_hash (FNV-1a 64 of the normalized claim, as in
+page_scan), claim (its first 500 characters), origin, input_type, verdict,
+confidence, degraded, cached,
+total_ms, stage_ms.<stage> (NaN where the stage did not run) and sources
+(ragged: sources.offsets into sources.codes, codes into sources.dictionary).
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+LOG_DIR = os.environ.get('VERIFICATION_LOG_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'verification_log')
+
+QUEUE_SIZE = 10000          # events waiting for the writer; beyond this they are dropped
+BATCH_SIZE = 512            # events per write (and fsync)
+FLUSH_INTERVAL = 1.0        # seconds the writer waits to fill a batch
+SEGMENT_BYTES = 4 * 2 ** 20 # a segment is sealed at this size...
+SEGMENT_AGE = 300.0         # ...or after this many seconds
+COMPACT_SEGMENTS = 4        # compact once this many segments are sealed
+MERGE_WINDOW = 86400        # column files are merged only with files of the same window (seconds)...
+MERGE_FILES = 8             # ...once the window has more than this many
+
+CLAIM_CHARS = 500           # claim text kept per event (repeats are stored once per column file)
+
+CATEGORY_COLUMNS = ('claim', 'origin', 'input_type', 'verdict')
+
+def input_type_of(text):
+    """Phase 1 input type (url, forwarded_message, article, plain_text)"""
+    from phase1_user_input import classify_input_type
+    return classify_input_type(text).get('type', 'text')
+
+def make_event(text, verdict, origin, input_type=None, confidence=None, degraded=False, cached=False,
+               total_ms=None, stage_ms=None, sources=()):
+    """Event dict for log_event()
+
+    The writer thread hashes the claim (and classifies the input type if not
+    given) off the request path.
+    """
+    return {
+        'ts': time.time(),
+        'claim': text,
+        'origin': origin,
+        'input_type': input_type,
+        'verdict': verdict or 'unknown',
+        'confidence': confidence,
+        'degraded': bool(degraded),
+        'cached': bool(cached),
+        'total_ms': total_ms,
+        'stage_ms': {name: round(ms, 3) for name, ms in (stage_ms or {}).items()},
+        'sources': [source for source in sources if source]
+    }
+
+class VerificationLog:
+    """Queue + background writer + compactor for one process"""
+
+    def __init__(self, log_dir=LOG_DIR, fsync=True):
+        self.log_dir = log_dir
+        self.wal_dir = os.path.join(log_dir, 'wal')
+        self.columns_dir = os.path.join(log_dir, 'columns')
+        self.fsync = fsync
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.stats = {'logged': 0, 'dropped': 0, 'written': 0, 'batches': 0, 'segments': 0,
+                      'compactions': 0, 'write_errors': 0, 'compaction_errors': 0}
+        self.pid = None
+        self.thread = None
+        self.compactor = None
+        self.compact_wanted = threading.Event()
+        self.stopping = False
+        self.segment = None
+        self.segment_path = None
+        self.segment_opened = 0.0
+        self.segment_seq = 0
+
+    def log(self, event):
+        """Queue an event; never blocks (events are dropped if the writer falls behind)"""
+        if self.pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(event)
+            self.stats['logged'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # Threads and open segments do not survive fork: each process gets its own
+            self.pid = os.getpid()
+            self.queue = queue.Queue(QUEUE_SIZE)
+            self.segment = None
+            self.stopping = False
+            self.compact_wanted = threading.Event()
+            self.thread = threading.Thread(target=self._writer, name='verification-log', daemon=True)
+            self.thread.start()
+            # Compaction (and merging) can take seconds: it must not stall the writer
+            self.compactor = threading.Thread(target=self._compactor, name='verification-log-compactor', daemon=True)
+            self.compactor.start()
+            atexit.register(self.close)
+
+    def _writer(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=FLUSH_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                self._write([event for event in batch if event is not None])
+                self._seal()
+                return
+            if batch:
+                self._write(batch)
+            if self.segment is not None and (self.segment.tell() >= SEGMENT_BYTES
+                                             or time.time() - self.segment_opened >= SEGMENT_AGE):
+                self._seal()
+                self.compact_wanted.set()
+
+    def _compactor(self):
+        while True:
+            self.compact_wanted.wait()
+            self.compact_wanted.clear()
+            if self.stopping:
+                return
+            try:
+                self.maybe_compact()
+            except Exception as e:
+                # Sealed segments stay in the WAL and are retried after the next seal
+                self.stats['compaction_errors'] += 1
+                print(f"⚠️ Verification log compaction failed: {e}")
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            if self.segment is None:
+                os.makedirs(self.wal_dir, exist_ok=True)
+                self.segment_seq += 1
+                self.segment_path = os.path.join(self.wal_dir, f"wal-{self.pid}-{int(time.time())}-{self.segment_seq}.open")
+                self.segment = open(self.segment_path, 'ab')
+                self.segment_opened = time.time()
+            import json  # (and re) loaded by the writer thread, not at import
+            # One write and one fsync per batch (group commit)
+            self.segment.write(''.join(json.dumps(_stored(event), separators=(',', ':')) + '\n'
+                                       for event in batch).encode('utf-8'))
+            self.segment.flush()
+            if self.fsync:
+                os.fsync(self.segment.fileno())
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        except OSError as e:
+            self.stats['write_errors'] += 1
+            print(f"⚠️ Verification log write failed: {e}")
+
+    def _seal(self):
+        if self.segment is None:
+            return
+        self.segment.close()
+        self.segment = None
+        os.replace(self.segment_path, self.segment_path[:-len('.open')] + '.log')
+        self.stats['segments'] += 1
+
+    def flush(self, timeout=5.0):
+        """Wait until queued events are written (for tests and shutdown)"""
+        deadline = time.time() + timeout
+        while not self.queue.empty() and time.time() < deadline:
+            time.sleep(0.01)
+        # The writer may still hold the last batch it took from the queue
+        time.sleep(min(0.05, max(0.0, deadline - time.time())))
+
+    def close(self):
+        """Write what is queued, seal the open segment and stop the writer"""
+        if self.thread is None or self.pid != os.getpid() or not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        # A compaction in progress finishes (its files are replaced atomically either way)
+        self.stopping = True
+        self.compact_wanted.set()
+        self.compactor.join(timeout=10)
+
+    def maybe_compact(self):
+        sealed = _files(self.wal_dir, '.log')
+        if len(sealed) >= COMPACT_SEGMENTS:
+            self.compact()
+
+    def compact(self):
+        """Turn sealed WAL segments into a column file; returns the number of events compacted"""
+        with _exclusive(os.path.join(self.log_dir, 'compact.lock')) as locked:
+            if not locked:
+                return 0  # another process is compacting
+            _remove_compacted_segments(self.columns_dir)
+            segments = sorted(_files(self.wal_dir, '.log') + _orphaned_segments(self.wal_dir))
+            events = []
+            for path in segments:
+                events.extend(_read_segment(path))
+            if events:
+                write_columns(self.columns_dir, events, [os.path.basename(path) for path in segments])
+            for path in segments:
+                os.remove(path)
+            merge_column_files(self.columns_dir)
+            self.stats['compactions'] += 1
+            return len(events)
+
+    def get_stats(self):
+        return dict(self.stats, queued=self.queue.qsize())
+
+def _stored(event):
+    """The event as written: claim hashed and truncated, input type filled in"""
+    if 'claim_hash' not in event:
+        from page_scan import block_hash  # imports the rule engine; kept off entry points' startup
+        text = event['claim']
+        event = dict(event, claim=text[:CLAIM_CHARS], claim_hash=block_hash(text))
+        event['input_type'] = event.get('input_type') or input_type_of(text)
+    return event
+
+class _exclusive:
+    """Non-blocking exclusive lock file across processes (no-op where fcntl is missing)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()  # releases the lock
+
+def _files(directory, suffix):
+    """Paths of the files in directory ending in suffix (glob would import re at startup)"""
+    try:
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(suffix)]
+    except FileNotFoundError:
+        return []
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def _orphaned_segments(wal_dir):
+    """Open segments of processes that died without sealing them"""
+    orphaned = []
+    for path in _files(wal_dir, '.open'):
+        try:
+            pid = int(os.path.basename(path).split('-')[1])
+        except (IndexError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            orphaned.append(path)
+    return orphaned
+
+def _read_segment(path):
+    import json
+    events = []
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                pass  # torn last line of a crashed writer
+    return events
+
+def _encode_category(values):
+    import numpy as np
+    dictionary = sorted(set(values))
+    codes = {value: i for i, value in enumerate(dictionary)}
+    # uint32: a long-running server sees far more than 65,535 distinct claims
+    return np.array(dictionary, dtype=str), np.array([codes[value] for value in values], dtype=np.uint32)
+
+def _columns_from_events(events):
+    """Column name -> numpy array"""
+    import numpy as np
+
+    n = len(events)
+    columns = {
+        'ts': np.array([event['ts'] for event in events], dtype=np.float64),
+        'claim_hash': np.array([int(event['claim_hash'], 16) for event in events], dtype=np.uint64),
+        'confidence': np.array([np.nan if event.get('confidence') is None else event['confidence']
+                                for event in events], dtype=np.float32),
+        'degraded': np.array([event.get('degraded', False) for event in events], dtype=bool),
+        'cached': np.array([event.get('cached', False) for event in events], dtype=bool),
+        'total_ms': np.array([np.nan if event.get('total_ms') is None else event['total_ms']
+                              for event in events], dtype=np.float32),
+    }
+    for name in CATEGORY_COLUMNS:
+        columns[f"{name}.dictionary"], columns[name] = _encode_category([str(event.get(name)) for event in events])
+
+    stages = sorted({stage for event in events for stage in event.get('stage_ms', {})})
+    for stage in stages:
+        column = np.full(n, np.nan, dtype=np.float32)
+        for row, event in enumerate(events):
+            if stage in event.get('stage_ms', {}):
+                column[row] = event['stage_ms'][stage]
+        columns[f"stage_ms.{stage}"] = column
+
+    flat = [source for event in events for source in event.get('sources', [])]
+    columns['sources.dictionary'], columns['sources.codes'] = _encode_category(flat)
+    columns['sources.offsets'] = np.cumsum([0] + [len(event.get('sources', [])) for event in events], dtype=np.int64)
+    return columns
+
+def write_columns(columns_dir, events, segments=()):
+    """Compacted column file for events (sorted by time); segments names the WAL files it replaces"""
+    import numpy as np
+
+    events = sorted(events, key=lambda event: event['ts'])
+    columns = _columns_from_events(events)
+    columns['_segments'] = np.array(list(segments) or [''], dtype=str)
+    return _save_columns(columns_dir, columns)
+
+def _save_columns(columns_dir, columns):
+    """Write a column file atomically, named after its first timestamp and row count"""
+    import numpy as np
+    os.makedirs(columns_dir, exist_ok=True)
+    path = os.path.join(columns_dir, f"events-{columns['ts'][0]:.6f}-{len(columns['ts'])}.npz")
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez_compressed(f, **columns)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return path
+
+def _remove_compacted_segments(columns_dir):
+    """Delete WAL segments a column file already holds (compaction crashed before deleting them)"""
+    import numpy as np
+    wal_dir = os.path.join(os.path.dirname(columns_dir), 'wal')
+    for path in _files(columns_dir, '.npz'):
+        try:
+            with np.load(path) as data:
+                names = data['_segments'] if '_segments' in data.files else []
+        except Exception as e:
+            print(f"⚠️ Unreadable column file {os.path.basename(path)}: {e}")
+            continue
+        for name in names:
+            if name and os.path.exists(os.path.join(wal_dir, name)):
+                os.remove(os.path.join(wal_dir, name))
+
+def _decode_category(data, name):
+    """Decoded values of a category column ('' for files written before it existed)"""
+    if f"{name}.dictionary" not in (data.files if hasattr(data, 'files') else data):
+        import numpy as np
+        return np.full(len(data['ts']), '', dtype=str)
+    return data[f"{name}.dictionary"][data[name]]
+
+def _file_start(path):
+    """First timestamp of a column file, from its name (events-<ts>-<rows>.npz)"""
+    return float(os.path.basename(path).split('-')[1])
+
+def _merge_columns(parts):
+    """Column-wise concatenation of column files' arrays, rows re-sorted by time
+
+    Dictionaries are unioned and codes remapped with searchsorted; stage columns
+    missing from a file are NaN; the ragged sources column is re-gathered.
+    """
+    import numpy as np
+
+    ts = np.concatenate([part['ts'] for part in parts])
+    order = np.argsort(ts, kind='stable')
+    merged = {'ts': ts[order]}
+    for name in ('claim_hash', 'confidence', 'degraded', 'cached', 'total_ms'):
+        merged[name] = np.concatenate([part[name] for part in parts])[order]
+
+    stages = sorted({name for part in parts for name in part if name.startswith('stage_ms.')})
+    for name in stages:
+        merged[name] = np.concatenate([part[name] if name in part else np.full(len(part['ts']), np.nan, dtype=np.float32)
+                                       for part in parts])[order]
+
+    def remap(dictionaries, codes):
+        dictionary = np.unique(np.concatenate(dictionaries))
+        return dictionary, np.concatenate([np.searchsorted(dictionary, d).astype(np.uint32)[c]
+                                           for d, c in zip(dictionaries, codes)])
+
+    for name in CATEGORY_COLUMNS:
+        # Files written before a category column existed decode it as ''
+        dictionaries = [part[f"{name}.dictionary"] if f"{name}.dictionary" in part else np.array([''])
+                        for part in parts]
+        codes = [part[name] if name in part else np.zeros(len(part['ts']), dtype=np.uint32) for part in parts]
+        merged[f"{name}.dictionary"], all_codes = remap(dictionaries, codes)
+        merged[name] = all_codes[order]
+
+    dictionary, codes = remap([part['sources.dictionary'] for part in parts],
+                              [part['sources.codes'] for part in parts])
+    lengths = np.concatenate([np.diff(part['sources.offsets']) for part in parts])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    new_lengths = lengths[order]
+    offsets = np.concatenate([[0], np.cumsum(new_lengths)]).astype(np.int64)
+    # Position of every source of every row, rows taken in time order
+    gather = np.repeat(starts[order] - offsets[:-1], new_lengths) + np.arange(offsets[-1])
+    merged['sources.dictionary'] = dictionary
+    merged['sources.codes'] = codes[gather] if len(codes) else codes
+    merged['sources.offsets'] = offsets
+    merged['_segments'] = np.array([''], dtype=str)
+    return merged
+
+def merge_column_files(columns_dir, window=MERGE_WINDOW, max_files=MERGE_FILES):
+    """Merge the column files of any window (by first timestamp) holding more than max_files
+
+    Work per merge is bounded by one window's events, however long the log
+    gets; returns the paths written.
+    """
+    import numpy as np
+
+    windows = {}
+    for path in _files(columns_dir, '.npz'):
+        windows.setdefault(int(_file_start(path) // window), []).append(path)
+    written = []
+    for paths in windows.values():
+        if len(paths) <= max_files:
+            continue
+        paths.sort()
+        parts = []
+        for path in paths:
+            with np.load(path) as data:
+                parts.append({name: data[name] for name in data.files})
+        merged = _save_columns(columns_dir, _merge_columns(parts))
+        for path in paths:
+            if path != merged:
+                os.remove(path)
+        written.append(merged)
+    return written
+
+def scan(columns, since=None, log_dir=LOG_DIR):
+    """Compacted events as {column: array}, reading only the requested columns
+
+    Category columns (claim, origin, input_type, verdict) come back decoded; pass
+    'sources' for a per-event list of sources. since filters on ts.
+    """
+    import numpy as np
+
+    wanted = {name: [] for name in columns}
+    for path in sorted(_files(os.path.join(log_dir, 'columns'), '.npz')):
+        with np.load(path) as data:
+            ts = data['ts']
+            keep = ts >= since if since is not None else slice(None)
+            for name in columns:
+                if name in CATEGORY_COLUMNS:
+                    values = _decode_category(data, name)
+                elif name == 'sources':
+                    codes = data['sources.dictionary'][data['sources.codes']] if len(data['sources.codes']) else []
+                    offsets = data['sources.offsets']
+                    values = np.empty(len(ts), dtype=object)
+                    values[:] = [list(codes[offsets[i]:offsets[i + 1]]) for i in range(len(ts))]
+                elif name in data.files:
+                    values = data[name]
+                else:
+                    values = np.full(len(ts), np.nan, dtype=np.float32)  # stage absent from this file
+                wanted[name].append(values[keep])
+    return {name: np.concatenate(parts) if parts else np.array([]) for name, parts in wanted.items()}
+
+def trending_claims(since=None, top=10, log_dir=LOG_DIR):
+    """[(claim_hash, count)] of the most verified claims since a timestamp"""
+    import numpy as np
+    hashes = scan(['claim_hash'], since, log_dir)['claim_hash']
+    if not len(hashes):
+        return []
+    unique, counts = np.unique(hashes, return_counts=True)
+    order = np.argsort(counts)[::-1][:top]
+    return [(f"{int(unique[i]):016x}", int(counts[i])) for i in order]
+
+def recent_claims(hours=24, limit=100, log_dir=LOG_DIR):
+    """[(claim, count)] most verified in the last `hours`, from column files and WAL segments not yet compacted"""
+    since = time.time() - hours * 3600
+    counts = {}
+    for claim in scan(['claim'], since, log_dir)['claim'].tolist():
+        if claim:
+            counts[claim] = counts.get(claim, 0) + 1
+    wal_dir = os.path.join(log_dir, 'wal')
+    for path in _files(wal_dir, '.log') + _files(wal_dir, '.open'):
+        for event in _read_segment(path):
+            if event.get('ts', 0) >= since and event.get('claim'):
+                counts[event['claim']] = counts.get(event['claim'], 0) + 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+_log = None
+_log_lock = threading.Lock()
+
+def get_verification_log():
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                _log = VerificationLog()
+    return _log
+
+def log_event(event):
+    """Queue an event for the process-wide log (see make_event)"""
+    get_verification_log().log(event)
+
+if __name__ == "__main__":
+    # Test the module: log a burst of events, compact and scan them
+    import random
+    import tempfile
+
+    random.seed(3)
+    claims = [f"claim number {i} about vitamins and immunity" for i in range(2000)]
+    weights = [1.0 / (i + 1) for i in range(len(claims))]
+    log = VerificationLog(tempfile.mkdtemp(prefix='verification-log-'))
+
+    n = 100000
+    picks = random.choices(claims, weights, k=n)
+    elapsed = 0.0
+    for i, text in enumerate(picks):
+        start = time.perf_counter()
+        log.log(make_event(text, random.choice(['harmful', 'caution', 'safe']), 'demo', input_type='text',
+                           confidence=0.8, total_ms=random.uniform(1, 50),
+                           stage_ms={'detection': 1.0, 'sources': 2.5}, sources=['https://www.who.int/']))
+        elapsed += time.perf_counter() - start
+        if i % 5000 == 4999:
+            log.flush()  # paced like real traffic, so the writer keeps up
+    print(f"📝 {n} events logged, {elapsed * 1e6 / n:.1f} µs each on the request path")
+    log.close()
+    print(f"📊 Writer: {log.get_stats()}")
+
+    wal_bytes = sum(os.path.getsize(path) for path in _files(log.wal_dir, '.log'))
+    start = time.perf_counter()
+    compacted = log.compact()
+    column_path = max(_files(log.columns_dir, '.npz'), key=os.path.getmtime)
+    print(f"🗜️ Compacted {compacted} events in {time.perf_counter() - start:.2f}s: "
+          f"{wal_bytes // 1024} KB of WAL -> {os.path.getsize(column_path) // 1024} KB of columns")
+
+    start = time.perf_counter()
+    top = trending_claims(top=5, log_dir=log.log_dir)
+    print(f"🔥 Top claims over {len(scan(['ts'], log_dir=log.log_dir)['ts'])} events "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms: {top}")